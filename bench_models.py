@@ -0,0 +1,63 @@
+"""
+Chart validation benchmark: the old load/AI parsing paths against
+parse_chart() and the list TypeAdapters
+
+    python bench_models.py [node counts...]
+"""
+import json
+from models import NodeData, EdgeData, ChartData, NODE_LIST, EDGE_LIST, parse_chart
+
+
+def _legacy_load(data):
+    # What /api/load did: a dict first, then a second walk over the nodes
+    chart = ChartData(**json.loads(data))
+    for node in chart.nodes:
+        if getattr(node, 'type', 'text') == 'image':
+            if not getattr(node, 'src', None) or not getattr(node, 'position', None):
+                raise ValueError(f"Image node {node.id} is incomplete.")
+    return chart
+
+
+def _legacy_per_node(data):
+    # What the AI endpoints did: one NodeData at a time
+    raw = json.loads(data)
+    nodes = []
+    for node in raw["nodes"]:
+        if node.get('type', 'text') == 'image' and (not node.get('src') or not node.get('position')):
+            raise ValueError(f"Image node {node.get('id')} is incomplete.")
+        nodes.append(NodeData(**node))
+    return ChartData(nodes=nodes, edges=[EdgeData(**edge) for edge in raw["edges"]])
+
+
+def _adapters(data):
+    raw = json.loads(data)
+    return ChartData(nodes=NODE_LIST.validate_python(raw["nodes"]), edges=EDGE_LIST.validate_python(raw["edges"]))
+
+
+def _sample_chart(count):
+    nodes = [{
+        "id": str(i), "type": "text", "name": f"Person {i}", "role": "Associate", "department": "Litigation",
+        "position": {"x": (i % 50) * 180, "y": (i // 50) * 150}
+    } for i in range(count)]
+    nodes.append({"id": "logo", "type": "image", "src": "/uploads/logo.png", "position": {"x": 0, "y": -150}})
+    edges = [{"source": str((i - 1) // 4), "target": str(i)} for i in range(1, count)]
+    return json.dumps({"nodes": nodes, "edges": edges}).encode("utf-8")
+
+
+if __name__ == "__main__":
+    import sys
+    import timeit
+
+    for count in [int(arg) for arg in sys.argv[1:]] or [1000, 10000]:
+        payload = _sample_chart(count)
+        runs = max(3, 20000 // count)
+        paths = (
+            ("load: json.loads + ChartData(**data)", _legacy_load),
+            ("AI: NodeData(**node) per node", _legacy_per_node),
+            ("AI: list TypeAdapters", _adapters),
+            ("parse_chart (model_validate_json)", parse_chart),
+            ("parse_chart (dict)", lambda payload: parse_chart(json.loads(payload)))
+        )
+        for label, parse in paths:
+            seconds = min(timeit.repeat(lambda: parse(payload), number=runs, repeat=3)) / runs
+            print(f"{count:>7} nodes  {label:<40} {seconds * 1000:8.2f} ms  {count / seconds:>12,.0f} nodes/s")
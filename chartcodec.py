@@ -0,0 +1,363 @@
+import os
+from collections import Counter
+from dotenv import load_dotenv
+from prompts import count_tokens
+
+load_dotenv()
+
+# Token budget for a chart embedded in a prompt; deeper subtrees are summarized past it
+CHART_PROMPT_TOKEN_BUDGET = int(os.getenv("CHART_PROMPT_TOKEN_BUDGET", "8000"))
+# Offsets used to place nodes the model adds under an existing manager
+NEW_NODE_DX = 180
+NEW_NODE_DY = 150
+# What Gemini writes for /api/ai-generate-orgchart: "lines" (one short line
+# per person, expanded here) or "json" (full node objects)
+GENERATE_FORMAT = os.getenv("GENERATE_FORMAT", "lines").lower()
+
+
+def _field(value):
+    # Keep one node per line and the column separator unambiguous
+    return " ".join(str(value).replace("|", "/").split()) if value is not None else ""
+
+
+def _get(node, key):
+    return node.get(key) if isinstance(node, dict) else getattr(node, key, None)
+
+
+class ChartCodec:
+    """
+    Compact prompt encoding of a chart, and the way back
+
+    Nodes get short ids (n1, n2, ...) and are written as an indented outline
+    of 'id|name|role|department' lines under their manager; positions, nulls,
+    image sources and extra fields are left out. When the outline is over the
+    token budget the deepest levels are folded into one summary line per
+    manager, and if that is not enough the tail is cut. decode_chart() maps
+    ids back and restores everything that was left out or hidden.
+    """
+
+    def __init__(self, chart, budget=CHART_PROMPT_TOKEN_BUDGET):
+        """
+        Args:
+            chart: ChartData (or dict with 'nodes'/'edges') to encode
+            budget (int): Maximum tokens for the encoded text
+        """
+        self.nodes = {}
+        for node in _get(chart, "nodes") or []:
+            node = node if isinstance(node, dict) else node.model_dump()
+            self.nodes.setdefault(str(node["id"]), node)
+        self.edges = [
+            (str(_get(e, "source")), str(_get(e, "target"))) for e in _get(chart, "edges") or []
+        ]
+        self.short = {}
+        self.original = {}
+        for index, node_id in enumerate(self.nodes, 1):
+            self.short[node_id] = f"n{index}"
+            self.original[f"n{index}"] = node_id
+        self._new_ids = {}
+        self.hidden = set()
+        self.budget = budget
+        self.text = self._encode(budget)
+        self.tokens = count_tokens(self.text)
+
+    def _walk(self):
+        """Depth-first (depth, id) order plus edges not used by the tree"""
+        children = {node_id: [] for node_id in self.nodes}
+        has_parent = set()
+        for source, target in self.edges:
+            if source in children and target in children and source != target:
+                children[source].append(target)
+                has_parent.add(target)
+        order, extra, placed = [], [], set()
+        roots = [node_id for node_id in self.nodes if node_id not in has_parent]
+        # Cycles leave nodes without a root; they are picked up afterwards
+        for start in roots + list(self.nodes):
+            if start in placed:
+                continue
+            placed.add(start)
+            stack = [(start, 0)]
+            while stack:
+                node_id, depth = stack.pop()
+                order.append((depth, node_id))
+                for child in reversed(children[node_id]):
+                    if child in placed:
+                        extra.append((node_id, child))
+                    else:
+                        placed.add(child)
+                        stack.append((child, depth + 1))
+        return order, extra
+
+    def _line(self, node_id, depth):
+        node = self.nodes[node_id]
+        if node.get("type", "text") == "image":
+            cols = (self.short[node_id], "[image]", _field(node.get("title")), _field(node.get("description")))
+        else:
+            cols = (self.short[node_id], _field(node.get("name")), _field(node.get("role")), _field(node.get("department")))
+        return "  " * depth + "|".join(cols).rstrip("|")
+
+    def _render(self, order, extra, depth_limit=None, max_lines=None):
+        lines, hidden = [], set()
+        index = 0
+        while index < len(order):
+            depth, node_id = order[index]
+            if max_lines is not None and len(lines) >= max_lines:
+                hidden.update(nid for _, nid in order[index:])
+                lines.append(f"~ {len(order) - index} more nodes not shown")
+                break
+            line = self._line(node_id, depth)
+            if depth_limit is not None and depth == depth_limit:
+                # Fold the whole subtree below this node into a summary
+                end = index + 1
+                while end < len(order) and order[end][0] > depth:
+                    end += 1
+                folded = [nid for _, nid in order[index + 1:end]]
+                if folded:
+                    hidden.update(folded)
+                    roles = Counter(self.nodes[nid].get("role") or "Unspecified" for nid in folded)
+                    summary = ", ".join(f"{role} x{count}" for role, count in roles.most_common(3))
+                    line += f" ~ +{len(folded)} hidden reports: {summary}"
+                lines.append(line)
+                index = end
+                continue
+            lines.append(line)
+            index += 1
+
+        extra_lines = [
+            f"{self.short[s]}>{self.short[t]}" for s, t in extra if s not in hidden and t not in hidden
+        ]
+        header = f"{len(self.nodes)} nodes"
+        if hidden:
+            header += f", {len(hidden)} summarized"
+        text = header + "\n" + "\n".join(lines)
+        if extra_lines:
+            text += "\nAlso reports (manager>report): " + " ".join(extra_lines)
+        return text, hidden
+
+    def _encode(self, budget):
+        order, extra = self._walk()
+        text, hidden = self._render(order, extra)
+        if budget and count_tokens(text) > budget:
+            depth_limit = max((depth for depth, _ in order), default=0)
+            while depth_limit > 0 and count_tokens(text) > budget:
+                depth_limit -= 1
+                text, hidden = self._render(order, extra, depth_limit)
+            if count_tokens(text) > budget:
+                # Even one level is too much: keep as many lines as fit
+                low, high = 1, len(order)
+                while low < high:
+                    mid = (low + high + 1) // 2
+                    if count_tokens(self._render(order, extra, depth_limit, mid)[0]) <= budget:
+                        low = mid
+                    else:
+                        high = mid - 1
+                text, hidden = self._render(order, extra, depth_limit, low)
+        self.hidden = hidden
+        return text
+
+    def original_id(self, node_id):
+        """Map an id from the model's response back to the chart's id space"""
+        node_id = str(node_id)
+        if node_id in self.original:
+            return self.original[node_id]
+        # A new node; keep its id unless it collides with an existing one
+        if node_id not in self._new_ids:
+            new_id = node_id
+            while new_id in self.nodes:
+                new_id += "-new"
+            self._new_ids[node_id] = new_id
+        return self._new_ids[node_id]
+
+    def decode_node(self, node):
+        """
+        One node from the model's response in the original id space, with
+        the fields the model never saw restored; None if it has no id
+        """
+        if not isinstance(node, dict) or "id" not in node:
+            return None
+        short_id = str(node["id"])
+        node_id = self.original_id(short_id)
+        values = {k: v for k, v in node.items() if v is not None and k != "id"}
+        if short_id in self.original:
+            # The model never saw positions or image sources; keep the originals
+            merged = dict(self.nodes[node_id])
+            values.pop("position", None)
+            values.pop("src", None)
+            if values.get("type") == "image" or values.get("name") == "[image]":
+                values.pop("name", None)
+            merged.update(values)
+        else:
+            merged = values
+        merged["id"] = node_id
+        return merged
+
+    def decode_edge(self, edge):
+        if not isinstance(edge, dict) or "source" not in edge or "target" not in edge:
+            return None
+        return {"source": self.original_id(edge["source"]), "target": self.original_id(edge["target"])}
+
+    def decode_chart(self, chart, partial=False):
+        """
+        Translate a chart from the model's response back to original ids,
+        restoring positions, image sources and extra fields of existing nodes
+        plus every node and edge that was summarized away
+
+        Args:
+            chart (dict): Parsed 'nodes'/'edges' from the model
+            partial (bool): The response was cut off and repaired. Nodes the
+                model never reached are kept, and so are the reporting lines
+                of every node it wrote no edge into.
+        Returns:
+            dict: 'nodes' and 'edges' ready for NodeData/EdgeData
+        """
+        nodes, order = {}, []
+        for node in chart.get("nodes") or []:
+            node = self.decode_node(node)
+            if node is None:
+                continue
+            if node["id"] not in nodes:
+                order.append(node["id"])
+            nodes[node["id"]] = node
+
+        edges, seen = [], set()
+        for edge in chart.get("edges") or []:
+            edge = self.decode_edge(edge)
+            if edge is None:
+                continue
+            pair = (edge["source"], edge["target"])
+            if pair not in seen:
+                seen.add(pair)
+                edges.append(edge)
+
+        if partial:
+            # What the model never reached stays as submitted, in chart order
+            rewired = {edge["target"] for edge in edges}
+            for node_id in self.nodes:
+                if node_id not in nodes:
+                    nodes[node_id] = dict(self.nodes[node_id])
+            order = [node_id for node_id in self.nodes] + [node_id for node_id in order if node_id not in self.nodes]
+            for source, target in self.edges:
+                if target not in rewired and (source, target) not in seen:
+                    seen.add((source, target))
+                    edges.append({"source": source, "target": target})
+
+        # Summarized nodes were not shown, so the model cannot have meant to drop them
+        for node_id in self.nodes:
+            if node_id in self.hidden and node_id not in nodes:
+                nodes[node_id] = dict(self.nodes[node_id])
+                order.append(node_id)
+        for source, target in self.edges:
+            if (source in self.hidden or target in self.hidden) and source in nodes and target in nodes:
+                if (source, target) not in seen:
+                    seen.add((source, target))
+                    edges.append({"source": source, "target": target})
+
+        # New nodes without a position go under their manager
+        placed = {}
+        for source, target in ((e["source"], e["target"]) for e in edges):
+            node = nodes.get(target)
+            if node is not None and not node.get("position") and nodes.get(source, {}).get("position"):
+                parent = nodes[source]["position"]
+                slot = placed.get(source, 0)
+                placed[source] = slot + 1
+                node["position"] = {"x": parent.get("x", 0) + slot * NEW_NODE_DX, "y": parent.get("y", 0) + NEW_NODE_DY}
+        for node_id in order:
+            nodes[node_id].setdefault("position", {"x": 0, "y": 0})
+            if not nodes[node_id]["position"]:
+                nodes[node_id]["position"] = {"x": 0, "y": 0}
+
+        return {"nodes": [nodes[node_id] for node_id in order], "edges": edges}
+
+
+class ChartLineStream:
+    """
+    Expander for the compact generation format, one line per person:
+    'id|name|role|department|manager id', managers separated by ';', ended
+    by a line with only END
+
+    feed() takes model output as it arrives and returns ('node', dict) and
+    ('edge', dict) events for every line that became complete, like
+    jsonstream.JsonItemStream. Nodes have no positions; those come from the
+    layout. Anything that is not a chart line (fences, prose, a header) is
+    skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.nodes = {}
+        self.edges = []
+        self.ended = False
+        self._seen = set()
+        # manager id not listed yet -> ids of its reports
+        self._pending = {}
+
+    def feed(self, chunk):
+        """
+        Returns:
+            list: (event name, item) pairs completed by this chunk
+        """
+        self.buffer += chunk
+        lines = self.buffer.split("\n")
+        self.buffer = lines.pop()
+        events = []
+        for line in lines:
+            self._line(line, events)
+        return events
+
+    def close(self):
+        """Events for a final line without a trailing newline"""
+        events = []
+        if self.buffer:
+            self._line(self.buffer, events)
+            self.buffer = ""
+        return events
+
+    def _edge(self, source, target, events):
+        if source != target and (source, target) not in self._seen:
+            self._seen.add((source, target))
+            edge = {"source": source, "target": target}
+            self.edges.append(edge)
+            events.append(("edge", edge))
+
+    def _line(self, line, events):
+        # Also accept list bullets and markdown table rows
+        line = line.strip().lstrip("-*").strip().strip("|")
+        if self.ended or not line:
+            return
+        if line.upper() == "END":
+            self.ended = True
+            return
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) < 4 or not fields[0] or fields[0].lower() == "id" or fields[0] in self.nodes:
+            return
+        if not any(field.strip("-: ") for field in fields):
+            # Markdown table separator row, e.g. ---|:---:|---
+            return
+        node_id, name, role, department = fields[:4]
+        node = {"id": node_id, "type": "text", "name": name or None, "role": role or None,
+                "department": department or None}
+        self.nodes[node_id] = node
+        events.append(("node", node))
+        managers = fields[4] if len(fields) > 4 else ""
+        for manager in (m.strip() for m in managers.replace(",", ";").split(";")):
+            if not manager:
+                continue
+            if manager in self.nodes:
+                self._edge(manager, node_id, events)
+            else:
+                self._pending.setdefault(manager, []).append(node_id)
+        # Reports listed before their manager
+        for report in self._pending.pop(node_id, []):
+            self._edge(node_id, report, events)
+
+
+def expand_chart_lines(text):
+    """
+    Expand a complete compact-format response into a chart
+
+    Returns:
+        tuple: ({'nodes', 'edges'} without positions, True if the END line was seen)
+    """
+    stream = ChartLineStream()
+    stream.feed(text or "")
+    stream.close()
+    return {"nodes": list(stream.nodes.values()), "edges": stream.edges}, stream.ended
@@ -0,0 +1,167 @@
+def _as_dict(obj):
+    return obj.model_dump() if hasattr(obj, "model_dump") else obj
+
+
+def _index(chart):
+    """(id -> node dict in chart order, id -> sorted managers, set of (source, target))"""
+    chart = _as_dict(chart)
+    nodes = {}
+    for node in chart.get("nodes") or []:
+        node = _as_dict(node)
+        nodes.setdefault(str(node["id"]), node)
+    managers = {node_id: [] for node_id in nodes}
+    edges = set()
+    for edge in chart.get("edges") or []:
+        edge = _as_dict(edge)
+        pair = (str(edge["source"]), str(edge["target"]))
+        if pair not in edges:
+            edges.add(pair)
+            if pair[1] in managers:
+                managers[pair[1]].append(pair[0])
+    for sources in managers.values():
+        sources.sort()
+    return nodes, managers, edges
+
+
+def _fields(node, ignore):
+    """Comparable content of a node: unset/None fields dropped, type defaulted"""
+    fields = {k: v for k, v in node.items() if v is not None and k not in ignore}
+    fields.setdefault("type", "text")
+    return fields
+
+
+def diff_charts(original, modified, ignore_positions=True):
+    """
+    Node and edge level differences between two charts, in O(N+E)
+
+    Both charts are indexed by id; a node is compared field by field only
+    when its content differs. Reporting-line changes of nodes present in
+    both charts are reported as re-parenting.
+
+    Args:
+        original: ChartData or dict
+        modified: ChartData or dict
+        ignore_positions (bool): Don't report nodes that only moved
+    Returns:
+        dict: 'added', 'removed', 'modified' and 'reparented' node records,
+            'edges' ('added'/'removed') and 'summary' counts
+    """
+    old_nodes, old_managers, old_edges = _index(original)
+    new_nodes, new_managers, new_edges = _index(modified)
+    ignore = {"id", "position"} if ignore_positions else {"id"}
+
+    added, modified_nodes, reparented = [], [], []
+    for node_id, node in new_nodes.items():
+        old = old_nodes.get(node_id)
+        if old is None:
+            added.append({"id": node_id, "node": node, "managers": new_managers[node_id]})
+            continue
+        before, after = _fields(old, ignore), _fields(node, ignore)
+        if before != after:
+            changes = {
+                key: {"old": before.get(key), "new": after.get(key)}
+                for key in sorted(before.keys() | after.keys()) if before.get(key) != after.get(key)
+            }
+            modified_nodes.append({"id": node_id, "changes": changes})
+        if old_managers[node_id] != new_managers[node_id]:
+            reparented.append({"id": node_id, "from": old_managers[node_id], "to": new_managers[node_id]})
+    removed = [{"id": node_id, "node": node} for node_id, node in old_nodes.items() if node_id not in new_nodes]
+
+    edges_added = [{"source": s, "target": t} for s, t in sorted(new_edges - old_edges)]
+    edges_removed = [{"source": s, "target": t} for s, t in sorted(old_edges - new_edges)]
+    return {
+        "added": added,
+        "removed": removed,
+        "modified": modified_nodes,
+        "reparented": reparented,
+        "edges": {"added": edges_added, "removed": edges_removed},
+        "summary": {
+            "nodes_added": len(added),
+            "nodes_removed": len(removed),
+            "nodes_modified": len(modified_nodes),
+            "nodes_reparented": len(reparented),
+            "edges_added": len(edges_added),
+            "edges_removed": len(edges_removed)
+        }
+    }
+
+
+def _sentence(text):
+    return text[:1].upper() + text[1:] + "."
+
+
+def _label(node, node_id):
+    return node.get("name") or node.get("role") or node.get("title") or node_id
+
+
+def describe_changes(diff, original=None, modified=None):
+    """
+    One change record per affected node, with a plain-language reason
+
+    Args:
+        diff (dict): Output of diff_charts()
+        original, modified: The charts, only used to name managers
+    Returns:
+        list: dicts with employeeId, action ('add', 'remove', 'modify' or
+            'reparent') and reason
+    """
+    names = {}
+    for chart in (original, modified):
+        if chart is not None:
+            for node_id, node in _index(chart)[0].items():
+                names[node_id] = _label(node, node_id)
+
+    def managers(ids):
+        return ", ".join(names.get(node_id, node_id) for node_id in ids) or "no one"
+
+    records = {}
+    for item in diff["added"]:
+        node = item["node"]
+        what = node.get("role") or node.get("title") or "position"
+        reason = f"Added {what}" + (f" in {node['department']}" if node.get("department") else "")
+        if item["managers"]:
+            reason += f", reporting to {managers(item['managers'])}"
+        records[item["id"]] = {"employeeId": item["id"], "action": "add", "reason": reason + "."}
+    for item in diff["modified"]:
+        parts = [f"{key} changed from {change['old']!r} to {change['new']!r}" for key, change in item["changes"].items()]
+        records[item["id"]] = {"employeeId": item["id"], "action": "modify", "reason": _sentence("; ".join(parts))}
+    for item in diff["reparented"]:
+        text = f"Now reports to {managers(item['to'])} instead of {managers(item['from'])}."
+        if item["id"] in records:
+            records[item["id"]]["reason"] += " " + text
+        else:
+            records[item["id"]] = {"employeeId": item["id"], "action": "reparent", "reason": text}
+    for item in diff["removed"]:
+        records[item["id"]] = {
+            "employeeId": item["id"], "action": "remove", "reason": f"Removed {_label(item['node'], item['id'])}."
+        }
+    return list(records.values())
+
+
+def merge_changes(computed, claimed):
+    """
+    Combine the computed change list with the one the model wrote
+
+    Every real change is kept. Where the model explained the same employee,
+    its action and reason are used; the model's entries for employees that
+    did not actually change are dropped.
+
+    Args:
+        computed (list): describe_changes() records
+        claimed (list): The model's changes (dicts or ChangeData)
+    Returns:
+        tuple: (merged list of dicts, number of model entries dropped)
+    """
+    reasons = {}
+    for change in claimed:
+        change = _as_dict(change)
+        employee_id = str(change.get("employeeId"))
+        if change.get("reason") and employee_id not in reasons:
+            reasons[employee_id] = change
+    merged = []
+    for record in computed:
+        claim = reasons.pop(record["employeeId"], None)
+        if claim is not None:
+            record = {**record, "action": str(claim.get("action") or record["action"]), "reason": str(claim["reason"])}
+        merged.append(record)
+    return merged, len(reasons)
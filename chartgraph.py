@@ -0,0 +1,230 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Examples listed per issue kind in a report; counts are always exact
+CHART_REPORT_EXAMPLES = int(os.getenv("CHART_REPORT_EXAMPLES", "50"))
+
+# Issues that break the front end; the rest are reported but allowed
+ERROR_KINDS = ("duplicate_ids", "dangling_edges", "self_loops", "cycles")
+WARNING_KINDS = ("duplicate_edges", "multiple_roots", "orphans", "multiple_managers")
+
+
+def _get(obj, key):
+    return obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+
+
+def _column(items, key):
+    """str() of one field across a list of dicts or models, in one pass"""
+    return [str(item.get(key) if isinstance(item, dict) else getattr(item, key, None)) for item in items]
+
+
+class ChartGraph:
+    """
+    Index over a chart for structural checks in O(N+E)
+
+    Nodes are numbered in chart order (id -> index); edges become parallel
+    source/target index arrays with -1 for ids that do not exist, and the
+    reporting lines an adjacency list per node. Everything is computed once
+    when the graph is built; report() and repair() only read it.
+    """
+
+    def __init__(self, chart):
+        """
+        Args:
+            chart: ChartData or dict with 'nodes' and 'edges' (models or dicts)
+        """
+        self.nodes = list(_get(chart, "nodes") or [])
+        self.edges = list(_get(chart, "edges") or [])
+        self.ids = _column(self.nodes, "id")
+        self.index = {}
+        # Later nodes that reuse an id: (position in self.nodes, id)
+        self.duplicates = []
+        for position, node_id in enumerate(self.ids):
+            if node_id in self.index:
+                self.duplicates.append((position, node_id))
+            else:
+                self.index[node_id] = position
+
+        n = len(self.nodes)
+        self.children = [[] for _ in range(n)]
+        self.in_degree = [0] * n
+        self.dangling = []
+        self.self_loops = []
+        self.duplicate_edges = []
+        seen = set()
+        index = self.index
+        self.source = [index.get(node_id, -1) for node_id in _column(self.edges, "source")]
+        self.target = [index.get(node_id, -1) for node_id in _column(self.edges, "target")]
+        for k, (s, t) in enumerate(zip(self.source, self.target)):
+            if s == -1 or t == -1:
+                self.dangling.append(k)
+            elif s == t:
+                self.self_loops.append(k)
+            elif (s, t) in seen:
+                self.duplicate_edges.append(k)
+            else:
+                seen.add((s, t))
+                self.children[s].append((t, k))
+                self.in_degree[t] += 1
+        self.back_edges = self._find_cycles()
+
+    def _find_cycles(self):
+        """
+        Iterative three-colour DFS over every node. Each edge that closes a
+        cycle (points at a node still on the stack) is returned once;
+        removing them all leaves the chart acyclic.
+        """
+        n = len(self.nodes)
+        state = bytearray(n)  # 0 unvisited, 1 on stack, 2 done
+        back = []
+        for start in range(n):
+            if state[start]:
+                continue
+            state[start] = 1
+            stack = [(start, 0)]
+            while stack:
+                node, i = stack[-1]
+                kids = self.children[node]
+                if i == len(kids):
+                    state[node] = 2
+                    stack.pop()
+                    continue
+                stack[-1] = (node, i + 1)
+                child, k = kids[i]
+                if state[child] == 0:
+                    state[child] = 1
+                    stack.append((child, 0))
+                elif state[child] == 1:
+                    back.append(k)
+        return back
+
+    def _edge(self, k):
+        edge = self.edges[k]
+        return {"source": str(_get(edge, "source")), "target": str(_get(edge, "target"))}
+
+    def report(self, examples=CHART_REPORT_EXAMPLES):
+        """
+        Returns:
+            dict: 'valid' (no errors), node/edge counts and, per issue kind
+                found, {'count', 'examples'}
+        """
+        connected = [False] * len(self.nodes)
+        for s, t in zip(self.source, self.target):
+            if s != -1 and t != -1 and s != t:
+                connected[s] = connected[t] = True
+        roots, orphans, managers = [], [], []
+        for node_id, position in self.index.items():
+            if not connected[position]:
+                # Unconnected image nodes are logos, not people missing a manager
+                if (_get(self.nodes[position], "type") or "text") != "image":
+                    orphans.append(node_id)
+            elif self.in_degree[position] == 0:
+                roots.append(node_id)
+            elif self.in_degree[position] > 1:
+                managers.append(node_id)
+
+        found = {
+            "duplicate_ids": [node_id for _, node_id in self.duplicates],
+            "dangling_edges": [
+                {**self._edge(k), "missing": [
+                    end for end, position in (("source", self.source[k]), ("target", self.target[k])) if position == -1
+                ]} for k in self.dangling
+            ],
+            "self_loops": [self._edge(k) for k in self.self_loops],
+            "cycles": [self._edge(k) for k in self.back_edges],
+            "duplicate_edges": [self._edge(k) for k in self.duplicate_edges],
+            "multiple_roots": roots if len(roots) > 1 else [],
+            "orphans": orphans,
+            "multiple_managers": managers
+        }
+        issues = {
+            kind: {"count": len(items), "examples": items[:examples]}
+            for kind, items in found.items() if items
+        }
+        return {
+            "valid": not any(kind in issues for kind in ERROR_KINDS),
+            "nodes": len(self.nodes),
+            "edges": len(self.edges),
+            "issues": issues
+        }
+
+    @property
+    def valid(self):
+        return not (self.duplicates or self.dangling or self.self_loops or self.back_edges)
+
+    def repair(self):
+        """
+        Fix the errors: duplicate ids are renamed (the first node keeps the
+        id and its edges), dangling, self-referencing and repeated edges are
+        dropped, and the edge closing each cycle is removed. Multiple roots,
+        orphans and multiple managers are left alone.
+
+        Returns:
+            tuple: ({'nodes', 'edges'} holding the original node/edge objects
+                where unchanged, list of repair descriptions)
+        """
+        actions = []
+        nodes = list(self.nodes)
+        used = set(self.index)
+        for position, node_id in self.duplicates:
+            new_id, suffix = node_id, 2
+            while new_id in used:
+                new_id = f"{node_id}-{suffix}"
+                suffix += 1
+            used.add(new_id)
+            node = nodes[position]
+            if hasattr(node, "model_copy"):
+                nodes[position] = node.model_copy(update={"id": new_id})
+            else:
+                nodes[position] = {**node, "id": new_id}
+            actions.append(f"renamed duplicate node id {node_id} to {new_id}")
+
+        dropped = {}
+        for kind, ks in (("dangling", self.dangling), ("self-referencing", self.self_loops),
+                         ("duplicate", self.duplicate_edges), ("cycle-closing", self.back_edges)):
+            for k in ks:
+                dropped[k] = kind
+        for k in sorted(dropped):
+            edge = self._edge(k)
+            actions.append(f"removed {dropped[k]} edge {edge['source']} -> {edge['target']}")
+        edges = [edge for k, edge in enumerate(self.edges) if k not in dropped]
+        return {"nodes": nodes, "edges": edges}, actions
+
+
+def validate_chart(chart):
+    """Structural report for a chart, see ChartGraph.report()"""
+    return ChartGraph(chart).report()
+
+
+def repair_chart(chart):
+    """
+    Returns:
+        tuple: (repaired {'nodes', 'edges'}, list of repairs made)
+    """
+    graph = ChartGraph(chart)
+    if graph.valid:
+        return {"nodes": graph.nodes, "edges": graph.edges}, []
+    return graph.repair()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import random
+
+    random.seed(1)
+    for count in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        chart = {
+            "nodes": [{"id": str(i)} for i in range(count)],
+            "edges": [{"source": str(random.randrange(0, i)), "target": str(i)} for i in range(1, count)]
+        }
+        chart["edges"] += [{"source": "1", "target": "0"}, {"source": "x", "target": "2"}]
+        start = time.perf_counter()
+        report = validate_chart(chart)
+        validated = time.perf_counter() - start
+        repaired, actions = repair_chart(chart)
+        total = time.perf_counter() - start
+        print(f"{count:>7} nodes  validate {validated * 1000:7.1f} ms  validate+repair {total * 1000:7.1f} ms"
+              f"  issues: {sorted(report['issues'])}  repairs: {len(actions)}")
@@ -0,0 +1,244 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Most nodes one suggestion call is asked to handle
+SUGGEST_SHARD_MAX_NODES = int(os.getenv("SUGGEST_SHARD_MAX_NODES", "60"))
+# In "auto" mode, charts with more nodes than this are split into shards
+SUGGEST_SHARD_THRESHOLD = int(os.getenv("SUGGEST_SHARD_THRESHOLD", "120"))
+# Shard calls running at once for a single request
+SUGGEST_SHARD_CONCURRENCY = int(os.getenv("SUGGEST_SHARD_CONCURRENCY", "4"))
+
+
+def _as_dict(obj):
+    return obj.model_dump() if hasattr(obj, "model_dump") else obj
+
+
+class Shard:
+    """
+    Part of a chart sent to its own suggestion call. The shard owns its
+    nodes; the anchor is the manager its subtrees report to, included for
+    context only.
+    """
+
+    def __init__(self, index, owned, anchor=None):
+        self.index = index
+        self.owned = owned
+        self.anchor = anchor
+        self.chart = None
+
+    def build(self, nodes, edges):
+        visible = set(self.owned)
+        if self.anchor is not None:
+            visible.add(self.anchor)
+        self.chart = {
+            "nodes": [nodes[node_id] for node_id in nodes if node_id in visible],
+            "edges": [
+                {"source": s, "target": t} for s, t in edges
+                if s in visible and t in visible and (s in self.owned or t in self.owned)
+            ]
+        }
+        return self
+
+
+def _tree(nodes, edges):
+    """First-parent spanning forest: (children, roots) over every node"""
+    children = {node_id: [] for node_id in nodes}
+    parent = {}
+    for source, target in edges:
+        if source in children and target in children and source != target and target not in parent:
+            parent[target] = source
+            children[source].append(target)
+    roots = [node_id for node_id in nodes if node_id not in parent]
+    # Nodes only reachable through a cycle have no root; cut the cycle at the first one
+    reached = set()
+    stack = list(roots)
+    while stack:
+        node_id = stack.pop()
+        reached.add(node_id)
+        stack.extend(children[node_id])
+    for node_id in nodes:
+        if node_id not in reached:
+            roots.append(node_id)
+            children[parent[node_id]].remove(node_id)
+            stack = [node_id]
+            while stack:
+                current = stack.pop()
+                reached.add(current)
+                stack.extend(c for c in children[current] if c not in reached)
+    return children, roots
+
+
+def shard_chart(chart, max_nodes=SUGGEST_SHARD_MAX_NODES):
+    """
+    Split a chart into department/subtree shards of at most max_nodes
+
+    Subtrees that fit are packed together under their shared manager (the
+    shard's anchor). Managers whose subtree is too big are split further and
+    collected in leadership shards of their own.
+
+    Returns:
+        list: Shard objects with .chart ready for ChartData
+    """
+    nodes = {}
+    for node in _as_dict(chart)["nodes"]:
+        node = _as_dict(node)
+        nodes.setdefault(str(node["id"]), node)
+    edges = [(str(_as_dict(e)["source"]), str(_as_dict(e)["target"])) for e in _as_dict(chart)["edges"]]
+    children, roots = _tree(nodes, edges)
+
+    # Subtree sizes, children before parents
+    size = {}
+    order = []
+    stack = list(roots)
+    while stack:
+        node_id = stack.pop()
+        order.append(node_id)
+        stack.extend(children[node_id])
+    for node_id in reversed(order):
+        size[node_id] = 1 + sum(size[c] for c in children[node_id])
+
+    def subtree(root):
+        members, stack = [], [root]
+        while stack:
+            node_id = stack.pop()
+            members.append(node_id)
+            stack.extend(children[node_id])
+        return members
+
+    shards, leadership = [], []
+    pending = [(None, roots)]
+    while pending:
+        anchor, units = pending.pop(0)
+        group, group_size = [], 0
+        for unit in units:
+            if size[unit] > max_nodes:
+                # Too big for one call: the manager goes to leadership, its teams are split
+                leadership.append(unit)
+                pending.append((unit, children[unit]))
+                continue
+            if group and group_size + size[unit] > max_nodes:
+                shards.append(Shard(len(shards), {m for u in group for m in subtree(u)}, anchor))
+                group, group_size = [], 0
+            group.append(unit)
+            group_size += size[unit]
+        if group:
+            shards.append(Shard(len(shards), {m for u in group for m in subtree(u)}, anchor))
+
+    for start in range(0, len(leadership), max_nodes):
+        shards.append(Shard(len(shards), set(leadership[start:start + max_nodes])))
+    return [shard.build(nodes, edges) for shard in shards]
+
+
+def merge_suggestions(chart, shards, results):
+    """
+    Merge per-shard suggestions into one chart and change list
+
+    Each shard may only change the nodes it owns. An id it could not see
+    (owned by another shard, or invented) is a new node, renamed if it is
+    already taken; edges to ids it neither saw nor created are dropped as
+    conflicts. A reporting line between shards belongs to the shard owning
+    its target: it is kept if that shard returned it, or never saw it and
+    left the target's reporting lines alone, or failed; otherwise it is
+    dropped and counted as a conflict. A shard whose call failed (None
+    result) keeps its original nodes and edges.
+
+    Args:
+        chart: Original ChartData or dict
+        shards (list): Shards from shard_chart()
+        results (list): Per-shard dict with 'nodes', 'edges', 'changes', or None
+    Returns:
+        dict: 'nodes', 'edges', 'changes' and 'conflicts' (count)
+    """
+    original = {}
+    for node in _as_dict(chart)["nodes"]:
+        node = _as_dict(node)
+        original.setdefault(str(node["id"]), node)
+    original_edges = [(str(_as_dict(e)["source"]), str(_as_dict(e)["target"])) for e in _as_dict(chart)["edges"]]
+    owner = {node_id: shard.index for shard in shards for node_id in shard.owned}
+
+    nodes, new_nodes, edges, changes = {}, {}, [], []
+    conflicts = 0
+    # Edges the shards returned, and owned nodes whose reporting lines they changed
+    returned, rewired = set(), set()
+    for shard, result in zip(shards, results):
+        if result is None:
+            for node_id in original:
+                if node_id in shard.owned:
+                    nodes[node_id] = original[node_id]
+            edges.extend((s, t) for s, t in original_edges if s in shard.owned and t in shard.owned)
+            continue
+
+        renamed = {}
+        visible = set(shard.owned)
+        if shard.anchor is not None:
+            visible.add(shard.anchor)
+
+        def resolve(node_id):
+            # The shard never saw the other shards' ids, so reusing one is a new person
+            node_id = str(node_id)
+            if node_id in visible:
+                return node_id
+            if node_id not in renamed:
+                new_id = node_id
+                while new_id in original or new_id in new_nodes or new_id in renamed.values():
+                    new_id = f"{new_id}-s{shard.index}"
+                renamed[node_id] = new_id
+            return renamed[node_id]
+
+        created = set()
+        for node in result.get("nodes", []):
+            node = dict(_as_dict(node))
+            node_id = resolve(node["id"])
+            if node_id == shard.anchor:
+                # Context only; its owner decides what happens to it
+                continue
+            if node_id in shard.owned:
+                nodes[node_id] = {**node, "id": node_id}
+            else:
+                new_nodes[node_id] = {**node, "id": node_id}
+                created.add(node_id)
+
+        kept = set()
+        allowed = visible | created
+        for edge in result.get("edges", []):
+            edge = _as_dict(edge)
+            source, target = resolve(edge["source"]), resolve(edge["target"])
+            if source in allowed and target in allowed:
+                edges.append((source, target))
+                kept.add((source, target))
+            else:
+                conflicts += 1
+        before = {(e["source"], e["target"]) for e in shard.chart["edges"] if e["target"] in shard.owned}
+        after = {(s, t) for s, t in kept if t in shard.owned}
+        rewired.update(t for _, t in before ^ after)
+        returned |= kept
+
+        for change in result.get("changes", []):
+            change = dict(_as_dict(change))
+            employee_id = resolve(change["employeeId"])
+            if employee_id in shard.owned or employee_id in created:
+                changes.append({**change, "employeeId": employee_id})
+            else:
+                conflicts += 1
+
+    # Cross-shard reporting lines: the shard owning the target decides
+    failed = {shard.index for shard, result in zip(shards, results) if result is None}
+    for s, t in original_edges:
+        if t not in nodes or s not in owner or owner[s] == owner[t] or (s, t) in returned:
+            continue
+        shard = shards[owner[t]]
+        if owner[t] in failed or not (s == shard.anchor or t in rewired):
+            edges.append((s, t))
+        else:
+            conflicts += 1
+
+    merged = [nodes[node_id] for node_id in original if node_id in nodes] + list(new_nodes.values())
+    present = {node["id"] for node in merged}
+    seen, merged_edges = set(), []
+    for pair in edges:
+        if pair not in seen and pair[0] in present and pair[1] in present:
+            seen.add(pair)
+            merged_edges.append({"source": pair[0], "target": pair[1]})
+    return {"nodes": merged, "edges": merged_edges, "changes": changes, "conflicts": conflicts}
@@ -0,0 +1,151 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared request timeout (seconds) for every upstream client that supports one
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "120"))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+# Per-key clients kept alive at once, and how long an unused one survives
+CLIENT_POOL_MAX_CLIENTS = int(os.getenv("CLIENT_POOL_MAX_CLIENTS", "32"))
+CLIENT_POOL_IDLE_TIMEOUT = int(os.getenv("CLIENT_POOL_IDLE_TIMEOUT", "900"))
+# HTTP connection pool size for clients that let us set one
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "8"))
+
+
+def _key_id(api_key):
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class ClientPool:
+    """
+    Registry of keep-alive upstream clients keyed by (kind, hashed API key),
+    with LRU eviction and an idle timeout. Reusing a client keeps its HTTP
+    connection pool and TLS sessions warm across requests.
+    """
+
+    def __init__(self, max_clients=CLIENT_POOL_MAX_CLIENTS, idle_timeout=CLIENT_POOL_IDLE_TIMEOUT):
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def get(self, kind, api_key, factory, pinned=False):
+        """
+        Args:
+            kind (str): Client family, e.g. "openai"
+            api_key (str): API key the client is bound to (only its hash is stored)
+            factory (callable): factory(api_key) building a new client
+            pinned (bool): Never evict (for process-wide singletons)
+        Returns:
+            The cached or newly created client
+        """
+        key = (kind, _key_id(api_key))
+        now = time.time()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry:
+                entry["last_used"] = now
+                self._clients.move_to_end(key)
+                self.reused += 1
+                return entry["client"]
+
+        client = factory(api_key)
+        with self._lock:
+            # Another thread may have built one meanwhile; keep the first
+            entry = self._clients.get(key)
+            if entry:
+                self._close(client)
+                self.reused += 1
+                return entry["client"]
+            self._clients[key] = {"client": client, "last_used": now, "pinned": pinned}
+            self.created += 1
+            self._evict_lru()
+        return client
+
+    def _evict_idle(self, now):
+        expired = [
+            k for k, e in self._clients.items()
+            if not e["pinned"] and now - e["last_used"] > self.idle_timeout
+        ]
+        for key in expired:
+            # Drop rather than close: a crawl thread may still hold the client,
+            # and the SDKs close their connections when garbage collected
+            del self._clients[key]
+            self.evicted += 1
+
+    def _evict_lru(self):
+        while len(self._clients) > self.max_clients:
+            key = next((k for k, e in self._clients.items() if not e["pinned"]), None)
+            if key is None:
+                return
+            del self._clients[key]
+            self.evicted += 1
+
+    @staticmethod
+    def _close(client):
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                print(f"Error closing upstream client: {e}")
+
+    def firecrawl(self, api_key):
+        from firecrawl import FirecrawlApp
+        return self.get("firecrawl", api_key, lambda key: FirecrawlApp(api_key=key))
+
+    def openai(self, api_key):
+        from openai import OpenAI
+        return self.get(
+            "openai",
+            api_key,
+            lambda key: OpenAI(api_key=key, timeout=UPSTREAM_TIMEOUT, max_retries=UPSTREAM_MAX_RETRIES)
+        )
+
+    def gemini(self, api_key):
+        from google import genai
+        from google.genai import types
+        return self.get(
+            "gemini",
+            api_key,
+            lambda key: genai.Client(
+                api_key=key,
+                # google-genai takes the timeout in milliseconds
+                http_options=types.HttpOptions(timeout=int(UPSTREAM_TIMEOUT * 1000))
+            ),
+            pinned=True
+        )
+
+    def pinecone(self, api_key):
+        from pinecone import Pinecone
+        return self.get(
+            "pinecone",
+            api_key,
+            lambda key: Pinecone(api_key=key, pool_threads=UPSTREAM_POOL_SIZE),
+            pinned=True
+        )
+
+    def stats(self):
+        with self._lock:
+            kinds = {}
+            for kind, _ in self._clients:
+                kinds[kind] = kinds.get(kind, 0) + 1
+        return {
+            "clients": kinds,
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+            "timeout": UPSTREAM_TIMEOUT
+        }
+
+
+client_pool = ClientPool()
@@ -0,0 +1,163 @@
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from dotenv import load_dotenv
+import urlfilter
+
+load_dotenv()
+
+# SQLite file holding scraped pages; set to an empty string to disable the cache.
+# Defaults to the temp dir so checkouts and container images stay read-only
+CRAWL_CACHE_DB = os.getenv("CRAWL_CACHE_DB", os.path.join(tempfile.gettempdir(), "orgchart_crawl_cache.sqlite3"))
+# How long (seconds) a cached page stays fresh, per urlfilter.url_category()
+CRAWL_CACHE_MAX_AGE = {
+    "news": int(os.getenv("CRAWL_CACHE_MAX_AGE_NEWS", str(24 * 3600))),
+    "core": int(os.getenv("CRAWL_CACHE_MAX_AGE_CORE", str(30 * 24 * 3600))),
+    "other": int(os.getenv("CRAWL_CACHE_MAX_AGE_OTHER", str(7 * 24 * 3600)))
+}
+
+_TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid")
+
+
+def normalize_url(url):
+    """
+    Canonical form of a URL for cache lookups: lowercase scheme/host, no
+    fragment, default port, tracking params or trailing slash, sorted query
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme, parts.port) in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_hash(markdown):
+    return hashlib.sha256((markdown or "").encode("utf-8")).hexdigest()
+
+
+class CrawlCache:
+    """
+    Scraped pages keyed by normalized requested URL, with markdown stored
+    zlib-compressed and the final (post-redirect) URL kept for responses
+    """
+
+    def __init__(self, db_path=CRAWL_CACHE_DB, max_age=CRAWL_CACHE_MAX_AGE):
+        self.db_path = db_path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS pages ("
+                    "url TEXT PRIMARY KEY, final_url TEXT, title TEXT, markdown BLOB, "
+                    "content_hash TEXT NOT NULL, fetched_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                print(f"Error opening crawl cache {db_path}: {e}")
+                self._db = None
+
+    @property
+    def enabled(self):
+        return self._db is not None
+
+    def is_fresh(self, url, fetched_at, now=None):
+        max_age = self.max_age.get(urlfilter.url_category(url), self.max_age["other"])
+        return (now or time.time()) - fetched_at < max_age
+
+    def split(self, urls):
+        """
+        Split URLs into pages that can be served from cache and URLs to scrape
+
+        Returns:
+            tuple: (cached pages as title/url/markdown dicts, URLs that are new or stale)
+        """
+        if not self.enabled:
+            return [], list(urls)
+        keys = {url: normalize_url(url) for url in urls}
+        with self._lock:
+            rows = {}
+            unique = list(set(keys.values()))
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self._db.execute(
+                    f"SELECT url, title, markdown, fetched_at, final_url FROM pages WHERE url IN ({placeholders})", chunk
+                ):
+                    rows[row[0]] = row
+
+        now = time.time()
+        cached, stale = [], []
+        for url in urls:
+            row = rows.get(keys[url])
+            if row and self.is_fresh(url, row[3], now):
+                cached.append({
+                    "title": row[1],
+                    "url": row[4] or url,
+                    "markdown": zlib.decompress(row[2]).decode("utf-8") if row[2] else ""
+                })
+            else:
+                stale.append(url)
+        self.hits += len(cached)
+        self.misses += len(stale)
+        return cached, stale
+
+    def store(self, pages, source_urls=None):
+        """
+        Save freshly scraped pages
+
+        Args:
+            pages (list): title/url/markdown dicts
+            source_urls (list): Optional requested URL per page, used as the
+                cache key so redirected pages are found on the next crawl
+        Returns:
+            int: Number of pages whose content differs from the cached copy
+        """
+        if not self.enabled or not pages:
+            return 0
+        now = time.time()
+        changed = 0
+        with self._lock:
+            for index, page in enumerate(pages):
+                url = source_urls[index] if source_urls and index < len(source_urls) else page["url"]
+                key = normalize_url(url)
+                digest = content_hash(page.get("markdown"))
+                row = self._db.execute("SELECT content_hash FROM pages WHERE url = ?", (key,)).fetchone()
+                if not row or row[0] != digest:
+                    changed += 1
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages (url, final_url, title, markdown, content_hash, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, page["url"], page.get("title"), zlib.compress((page.get("markdown") or "").encode("utf-8")), digest, now)
+                )
+            self._db.commit()
+        return changed
+
+    def stats(self):
+        pages = 0
+        if self.enabled:
+            with self._lock:
+                pages = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"enabled": self.enabled, "pages": pages, "hits": self.hits, "misses": self.misses}
+
+
+crawl_cache = CrawlCache()
@@ -0,0 +1,133 @@
+import os
+import time
+import uuid
+import asyncio
+import legalcrawler
+
+# Finished jobs are kept this long (seconds) so clients can fetch the result
+CRAWL_JOB_TTL = int(os.getenv("CRAWL_JOB_TTL", "3600"))
+
+PENDING_STATUSES = ("queued", "running")
+
+
+class CrawlJob:
+    def __init__(self, url, max_wait_time):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.max_wait_time = max_wait_time
+        self.status = "queued"
+        self.stage = None
+        self.progress = {}
+        self.events = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self):
+        return self.status not in PENDING_STATUSES
+
+    def record(self, stage, **info):
+        """Store a progress event and wake any SSE subscribers"""
+        self.stage = stage
+        self.progress = info
+        self.updated_at = time.time()
+        self.events.append({"stage": stage, "status": self.status, "time": self.updated_at, **info})
+        # Swap the event so waiters wake once and new waiters block again
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "url": self.url,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+    async def follow(self):
+        """
+        Yield progress events as they are recorded, starting from the first,
+        until the job finishes
+        """
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await changed.wait()
+
+
+class CrawlJobManager:
+    """
+    Runs law firm crawls as background asyncio tasks and keeps their status
+    and results in memory
+    """
+
+    def __init__(self, ttl=CRAWL_JOB_TTL):
+        self.ttl = ttl
+        self.jobs = {}
+        self._tasks = set()
+
+    def submit(self, url, max_wait_time, api_key_firecrawl, api_key_openai, use_cache=True, clean_markdown=True):
+        self.prune()
+        job = CrawlJob(url, max_wait_time)
+        self.jobs[job.id] = job
+        job.record("queued", url=url)
+        task = asyncio.create_task(self._run(job, api_key_firecrawl, api_key_openai, use_cache, clean_markdown))
+        # Hold a reference so the task isn't garbage collected mid-crawl
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job, api_key_firecrawl, api_key_openai, use_cache, clean_markdown):
+        job.status = "running"
+        try:
+            result = await legalcrawler.crawl_lawfirm_website_async(
+                url=job.url,
+                max_wait_time=job.max_wait_time,
+                api_key_firecrawl=api_key_firecrawl,
+                api_key_openai=api_key_openai,
+                progress=job.record,
+                use_cache=use_cache,
+                clean_markdown=clean_markdown
+            )
+            job.result = result
+            if result.get("error"):
+                job.status = "failed"
+                job.error = result["error"]
+            else:
+                job.status = "completed"
+        except Exception as e:
+            print(f"Error in crawl job {job.id}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        scraped = len(job.result.get("scraped", [])) if job.result else 0
+        job.record(job.status, scraped=scraped, error=job.error)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def prune(self):
+        """Drop finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self.jobs.values() if j.done and j.updated_at < cutoff]:
+            del self.jobs[job_id]
+
+    def stats(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"jobs": len(self.jobs), "running_tasks": len(self._tasks), "by_status": counts}
+
+
+crawl_jobs = CrawlJobManager()
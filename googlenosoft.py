@@ -1,8 +1,10 @@
 import os
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
+import time
 import asyncio
+from clientpool import client_pool
+from prompts import GENERATE_PROMPT
 
 
 load_dotenv()
@@ -12,59 +14,137 @@ google_api_key = os.getenv('GOOGLE_API_KEY')
 if not google_api_key:
     raise ValueError("GOOGLE_API_KEY environment variable is required")
 
-class myGemini:
-    def __init__(self, system_instruction=None):
-        self.system_instructions = system_instruction or (
-            f'''
-            You are LegalSoft AI, an expert in organizational design and virtual staffing. You can handle this type of request:
-
-            **Org Chart Generation**: Create complete organizational charts from descriptions or images
-    
-            For **Org Chart Generation**, return a JSON object with this schema:
-            {{
-            "nodes": [
-                {{
-                "id": "string", // unique identifier
-                "name": "string", // employee name
-                "role": "string", // job title
-                "department": "string", // department name
-                "position": {{"x": number, "y": number}} // layout position
-                }}
-            ],
-            "edges": [
-                {{"source": "string", "target": "string"}} // reporting relationships
-            ]
-            }}
-
+# Explicit context caches are only accepted above a model-specific prompt
+# size; below it the system instruction is sent inline (still only once)
+GEMINI_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CACHE_MIN_TOKENS", "1024"))
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))
 
-            Instructions:
-            - Infer missing roles, hierarchy, or structure if the request is vague or incomplete
-            - Use logical, realistic org chart structures
-            - Assign unique IDs to each node
-            - Assign reasonable x/y positions for layout (e.g., root at y=50, children at y=200, etc.)
-            - For improvements, focus on LegalSoft's virtual staffing capabilities
-            - Return only a valid JSON object matching the appropriate schema, no extra text
-            - Do not assign random names when asked to make an org chart, however if there are names on an org chart image that is submitted include those 
-            - If arrows or hierarchy are extremely ambigious for a position just create the nodes without edges 
 
-            '''
+class myGemini:
+    TEXT_MODEL = 'gemini-2.0-flash-lite'
+    IMAGE_MODEL = 'gemini-2.5-flash'
+
+    def __init__(self, system_instruction=None, template=GENERATE_PROMPT):
+        self.template = template
+        self.system_instructions = system_instruction or template.prefix
+
+        # Shared keep-alive client with the common upstream timeout
+        self.client = client_pool.gemini(google_api_key)
+
+        # model -> (cached content name or None, time to retry/refresh)
+        self._context_caches = {}
+        self._cache_lock = asyncio.Lock()
+
+    async def _cached_content(self, model):
+        """
+        Name of a Gemini cached content holding the system instruction, or
+        None to send it inline. Failed creations are retried after the TTL.
+        """
+        if self.template.prefix_tokens < GEMINI_CACHE_MIN_TOKENS:
+            return None
+        entry = self._context_caches.get(model)
+        if entry and time.time() < entry[1]:
+            return entry[0]
+        async with self._cache_lock:
+            entry = self._context_caches.get(model)
+            if entry and time.time() < entry[1]:
+                return entry[0]
+            try:
+                cache = await self.client.aio.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=self.system_instructions,
+                        ttl=f"{GEMINI_CACHE_TTL}s",
+                        display_name=f"orgchart-{self.template.name}-{self.template.fingerprint}"
+                    )
+                )
+                # Refresh a little before the upstream copy expires
+                self._context_caches[model] = (cache.name, time.time() + GEMINI_CACHE_TTL - 60)
+            except Exception as e:
+                print(f"Gemini context cache unavailable for {model}, sending instructions inline: {e}")
+                self._context_caches[model] = (None, time.time() + GEMINI_CACHE_TTL)
+            return self._context_caches[model][0]
+
+    async def _generate(self, model, contents, body):
+        cached = await self._cached_content(model)
+        start = time.perf_counter()
+        if cached:
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=types.GenerateContentConfig(cached_content=cached)
+                )
+                self.template.record(body, prefix_sent=False, usage=response.usage_metadata,
+                                     seconds=time.perf_counter() - start)
+                return response.text
+            except Exception as e:
+                # Expired or deleted upstream: recreate on the next call, answer this one inline
+                print(f"Gemini cached content {cached} failed, retrying inline: {e}")
+                self._context_caches.pop(model, None)
+
+        response = await self.client.aio.models.generate_content(
+            model=model,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                system_instruction=self.system_instructions
+            )
         )
-
-        self.client = genai.Client(api_key=google_api_key)
+        self.template.record(body, usage=response.usage_metadata, seconds=time.perf_counter() - start)
+        return response.text
+
+    async def chat_stream(self, question, image=None, mime_type=None):
+        """
+        Stream the generated text chunk by chunk (text-only, or with an image)
+
+        Errors are raised rather than returned as "Error: ..." strings, since
+        part of the answer may already have been sent.
+        """
+        body = self.template.render(user_prompt=question)
+        if image is None:
+            model, contents = self.TEXT_MODEL, body
+        else:
+            model = self.IMAGE_MODEL
+            contents = [types.Part.from_text(text=body), types.Part.from_bytes(data=image, mime_type=mime_type)]
+
+        cached = await self._cached_content(model)
+        start = time.perf_counter()
+        started = False
+        usage = None
+        try:
+            config = (
+                types.GenerateContentConfig(cached_content=cached) if cached
+                else types.GenerateContentConfig(system_instruction=self.system_instructions)
+            )
+            async for chunk in await self.client.aio.models.generate_content_stream(
+                model=model, contents=contents, config=config
+            ):
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    started = True
+                    yield chunk.text
+        except Exception as e:
+            if not cached or started:
+                raise
+            # Cached content gone before anything was sent: retry inline
+            print(f"Gemini cached content {cached} failed, retrying inline: {e}")
+            self._context_caches.pop(model, None)
+            cached = None
+            async for chunk in await self.client.aio.models.generate_content_stream(
+                model=model,
+                contents=contents,
+                config=types.GenerateContentConfig(system_instruction=self.system_instructions)
+            ):
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    yield chunk.text
+        self.template.record(body, prefix_sent=not cached, usage=usage, seconds=time.perf_counter() - start)
 
     async def chat(self, question):
         try:
-            # Combine system instructions with user question
-            full_prompt = f"{self.system_instructions}\n\nUser Request: {question}"
-            
-            response = await self.client.aio.models.generate_content(
-                model='gemini-2.0-flash-lite',
-                contents=full_prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=self.system_instructions
-                )
-            )
-            return response.text
+            # The system instruction travels in the config (or a context cache), not in the prompt
+            body = self.template.render(user_prompt=question)
+            return await self._generate(self.TEXT_MODEL, body, body)
         except Exception as e:
             print(f"Error: {str(e)}")
             return f"Error: {str(e)}"
@@ -73,30 +153,28 @@ class myGemini:
         try:
             # Create image part for multimodal input
             image_part = types.Part.from_bytes(data=image, mime_type=mime_type)
-            text_part = types.Part.text =f"{self.system_instructions}\n\nUser Request: {question}"
+            body = self.template.render(user_prompt=question)
+            text_part = types.Part.from_text(text=body)
 
             # Create the multimodal content
             content = [
                 text_part,
                 image_part
             ]
-            
-            # Generate content with image       
-            response = await self.client.aio.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=content,
-                config=types.GenerateContentConfig(
-                    system_instruction=self.system_instructions
-                )
-            )
-            
-    
-            return response.text
-                
+
+            # Generate content with image
+            return await self._generate(self.IMAGE_MODEL, content, body)
+
         except Exception as e:
             print(f"Error: {str(e)}")
             return f"Error: {str(e)}"
 
+    def stats(self):
+        return {
+            "context_cache_min_tokens": GEMINI_CACHE_MIN_TOKENS,
+            "context_caches": {model: bool(entry[0]) for model, entry in self._context_caches.items()}
+        }
+
     def test(self):
         """Test method to verify the AI connection"""
         try:
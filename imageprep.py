@@ -0,0 +1,202 @@
+import io
+import os
+import math
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+
+# Optional: without Pillow images are sent to Gemini unchanged
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+load_dotenv()
+
+# Longest side (px) after downsizing; Gemini tiles images at 768px, so larger
+# inputs only add tokens and upload time
+IMAGE_PREP_MAX_SIDE = int(os.getenv("IMAGE_PREP_MAX_SIDE", "1536"))
+# Output format sent to Gemini ("webp", "jpeg" or "png") and its lossy quality
+IMAGE_PREP_FORMAT = os.getenv("IMAGE_PREP_FORMAT", "webp").lower()
+IMAGE_PREP_QUALITY = int(os.getenv("IMAGE_PREP_QUALITY", "85"))
+# Worker processes for decoding/resizing; 0 runs it in a thread instead
+IMAGE_PREP_WORKERS = int(os.getenv("IMAGE_PREP_WORKERS", "2"))
+# Assumed upstream bandwidth, used to estimate the upload time saved
+IMAGE_PREP_UPLINK_MBPS = float(os.getenv("IMAGE_PREP_UPLINK_MBPS", "20"))
+
+_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png")
+}
+
+
+def estimate_image_tokens(width, height):
+    """Gemini 2.x image token cost: 258 for small images, else 258 per 768px tile"""
+    if width <= 384 and height <= 384:
+        return 258
+    tile = max(256, min(768, min(width, height) / 1.5))
+    return 258 * math.ceil(width / tile) * math.ceil(height / tile)
+
+
+def _read(source):
+    if isinstance(source, (bytes, bytearray)):
+        return source
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def _source_size(source):
+    return len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+
+
+def preprocess_image(source, max_side=IMAGE_PREP_MAX_SIDE, fmt=IMAGE_PREP_FORMAT, quality=IMAGE_PREP_QUALITY,
+                     crop=None, grayscale=False):
+    """
+    Downsize, optionally crop/grayscale and re-encode an image (runs in a worker process)
+
+    Args:
+        source (bytes or str): Original image, or the path of a file holding it
+        max_side (int): Longest side of the output in pixels
+        fmt (str): Output format key from _FORMATS
+        crop (list): Optional [left, top, right, bottom] as 0-1 fractions
+        grayscale (bool): Convert to grayscale (smaller, fine for whiteboards)
+    Returns:
+        tuple: (bytes, mime type or None if unchanged, info dict)
+    """
+    pil_format, mime_type = _FORMATS.get(fmt, _FORMATS["webp"])
+    original_bytes = _source_size(source)
+    with Image.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source) as img:
+        original_size = img.size
+        # JPEG can decode straight to a reduced scale, much cheaper for phone photos
+        if img.format == "JPEG" and not crop:
+            img.draft("RGB", (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        if crop:
+            width, height = img.size
+            left, top, right, bottom = crop
+            img = img.crop((int(left * width), int(top * height), int(right * width), int(bottom * height)))
+        if grayscale:
+            img = img.convert("L")
+        elif img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+        if pil_format == "JPEG" and img.mode == "RGBA":
+            img = img.convert("RGB")
+        if max(img.size) > max_side:
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        out = io.BytesIO()
+        if pil_format == "PNG":
+            img.save(out, format=pil_format, optimize=True)
+        else:
+            img.save(out, format=pil_format, quality=quality)
+        info = {
+            "original_size": list(original_size),
+            "size": list(img.size),
+            "original_tokens": estimate_image_tokens(*original_size),
+            "tokens": estimate_image_tokens(*img.size)
+        }
+    result = out.getvalue()
+    if len(result) >= original_bytes and not crop and not grayscale and max(original_size) <= max_side:
+        # Nothing gained; keep the original bytes and format
+        info["size"], info["tokens"] = info["original_size"], info["original_tokens"]
+        return _read(source), None, info
+    return result, mime_type, info
+
+
+class ImagePreprocessor:
+    """
+    Runs preprocess_image in a process pool and keeps totals for /api/metrics
+    """
+
+    def __init__(self, workers=IMAGE_PREP_WORKERS):
+        self.workers = workers
+        self._pool = None
+        self.processed = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def _executor(self):
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            # spawn: forking a process that already runs threads is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    @property
+    def enabled(self):
+        return Image is not None
+
+    def signature(self, crop=None, grayscale=False):
+        """Settings that change the prepared image, for response cache keys"""
+        if not self.enabled:
+            return "raw"
+        return f"{IMAGE_PREP_MAX_SIDE}:{IMAGE_PREP_FORMAT}:{IMAGE_PREP_QUALITY}:{crop or ''}:{int(grayscale)}"
+
+    async def prepare(self, source, mime_type, crop=None, grayscale=False):
+        """
+        Args:
+            source (bytes or str): Original image, or a file path so large
+                images reach the worker without being copied through the pool
+            mime_type (str): Original MIME type
+        Returns:
+            tuple: (image bytes, MIME type, report dict or None if not preprocessed)
+        """
+        if not self.enabled:
+            return await asyncio.to_thread(_read, source), mime_type, None
+        original_bytes = _source_size(source)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, new_mime, info = await loop.run_in_executor(
+                self._executor(), preprocess_image, source,
+                IMAGE_PREP_MAX_SIDE, IMAGE_PREP_FORMAT, IMAGE_PREP_QUALITY, crop, grayscale
+            )
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # A crashed worker breaks the whole pool; start a fresh one next time
+                self._pool = None
+            # A bad or exotic image still goes to Gemini as uploaded
+            print(f"Error preprocessing image: {e}")
+            self.failed += 1
+            return await asyncio.to_thread(_read, source), mime_type, None
+        elapsed = time.perf_counter() - start
+
+        self.processed += 1
+        self.bytes_in += original_bytes
+        self.bytes_out += len(result)
+        self.seconds += elapsed
+        saved = original_bytes - len(result)
+        report = {
+            **info,
+            "original_bytes": original_bytes,
+            "bytes": len(result),
+            "bytes_saved": saved,
+            "mime_type": new_mime or mime_type,
+            "prep_ms": round(elapsed * 1000, 1),
+            # Upload time saved at the assumed uplink, minus the time spent preparing
+            "latency_saved_ms": round(saved * 8 / (IMAGE_PREP_UPLINK_MBPS * 1000) - elapsed * 1000, 1)
+        }
+        return result, new_mime or mime_type, report
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "avg_prep_ms": round(self.seconds * 1000 / self.processed, 1) if self.processed else 0.0
+        }
+
+
+image_preprocessor = ImagePreprocessor()
@@ -0,0 +1,275 @@
+import re
+import json
+import threading
+
+# Start of a fenced ```json block; its object is preferred over any brace in the prose around it
+_FENCE_RE = re.compile(r"```[a-zA-Z]*\s*(?=[{\[])")
+# How many cut points to try, newest first, when repairing a truncated object
+MAX_REPAIR_ATTEMPTS = 64
+# How many '{' to try as the start of the object when earlier ones are stray braces in prose
+MAX_OBJECT_STARTS = 16
+
+_stats_lock = threading.Lock()
+json_parse_stats = {"parsed": 0, "clean": 0, "fenced": 0, "repaired": 0, "salvaged": 0, "failed": 0}
+
+
+class JsonParseError(ValueError):
+    pass
+
+
+class JsonItemStream:
+    """
+    Incremental scanner that pulls complete array items out of a JSON
+    object while the LLM is still writing it
+
+    feed() takes the next chunk of model output and returns the items that
+    became complete, e.g. each object of "nodes" as soon as its closing
+    brace arrives. Text before the first '{' is skipped. The scanner also
+    remembers where the text could be cut and closed, which repair() uses
+    when the output stops early.
+    """
+
+    def __init__(self, paths=None):
+        """
+        Args:
+            paths (dict): Key path tuple -> event name, e.g.
+                {("modifiedChart", "nodes"): "node", ("changes",): "change"}
+        """
+        self.paths = paths or {}
+        self.buffer = ""
+        self.pos = 0
+        self.start = None
+        self.end = None
+        self.collected = {event: [] for event in self.paths.values()}
+        self._stack = []  # [kind, path, key, expecting_key, item_start]
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        # (position, open container kinds) where text[start:position] + closers is valid JSON
+        self._cuts = []
+
+    @property
+    def done(self):
+        return self.end is not None
+
+    def feed(self, chunk):
+        """
+        Returns:
+            list: (event name, item) pairs completed by this chunk
+        """
+        self.buffer += chunk
+        items = []
+        buffer = self.buffer
+        i = self.pos
+        while i < len(buffer) and self.end is None:
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    top = self._stack[-1]
+                    if top[0] == "obj" and top[3]:
+                        try:
+                            top[2] = json.loads(buffer[self._string_start:i + 1])
+                        except ValueError:
+                            top[2] = None
+                    elif top[0] == "arr" or not top[3]:
+                        self._cuts.append((i + 1, self._kinds()))
+            elif self.start is None:
+                if ch == "{":
+                    self.start = i
+                    self._stack.append(["obj", (), None, True, None])
+                    self._cuts.append((i + 1, self._kinds()))
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                parent = self._stack[-1]
+                if parent[0] == "obj":
+                    path = parent[1] + (parent[2],)
+                    start = None
+                else:
+                    path = parent[1] + ("*",)
+                    # An element of a watched array starts here
+                    start = i if parent[1] in self.paths else None
+                kind = "obj" if ch == "{" else "arr"
+                self._stack.append([kind, path, None, kind == "obj", start])
+                self._cuts.append((i + 1, self._kinds()))
+            elif ch in "}]":
+                closed = self._stack.pop()
+                if closed[4] is not None:
+                    event = self.paths[closed[1][:-1]]
+                    try:
+                        item = json.loads(_strip_trailing_commas(buffer[closed[4]:i + 1]))
+                        items.append((event, item))
+                        self.collected[event].append(item)
+                    except ValueError:
+                        pass
+                if not self._stack:
+                    self.end = i + 1
+                else:
+                    self._cuts.append((i + 1, self._kinds()))
+            elif ch == ":":
+                self._stack[-1][3] = False
+            elif ch == ",":
+                if self._stack[-1][0] == "obj":
+                    self._stack[-1][3] = True
+            elif ch.isalnum() or ch in "-.+":
+                # End of a number/true/false/null is only known at the next delimiter
+                nxt = i + 1
+                if nxt < len(buffer) and not (buffer[nxt].isalnum() or buffer[nxt] in "-.+"):
+                    self._cuts.append((nxt, self._kinds()))
+            i += 1
+        self.pos = i
+        return items
+
+    def close(self):
+        """Nothing is held back at the end of the input; here to match ChartLineStream"""
+        return []
+
+    def _kinds(self):
+        return tuple(entry[0] for entry in self._stack)
+
+    def text(self):
+        """The complete top-level object, or None while it is still open"""
+        return self.buffer[self.start:self.end] if self.end is not None else None
+
+    def repair(self):
+        """
+        Close a truncated object: cut back to the last point where the text
+        ends on a complete value, then close the open arrays and objects
+
+        Returns:
+            dict or None
+        """
+        if self.start is None:
+            return None
+        for position, kinds in reversed(self._cuts[-MAX_REPAIR_ATTEMPTS:]):
+            closers = "".join("}" if kind == "obj" else "]" for kind in reversed(kinds))
+            candidate = _strip_trailing_commas(self.buffer[self.start:position].rstrip().rstrip(",") + closers)
+            try:
+                value = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(value, dict):
+                return value
+        return None
+
+    def salvage(self):
+        """Rebuild an object from every complete item seen, or None if there were none"""
+        if not any(self.collected.values()):
+            return None
+        result = {}
+        for path, event in self.paths.items():
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = list(self.collected[event])
+        return result
+
+
+def _strip_trailing_commas(text):
+    """Drop commas directly before a closing bracket, outside strings"""
+    if "," not in text:
+        return text
+    out = []
+    in_string = escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "}]":
+            # Walk back over whitespace to a dangling comma
+            j = len(out) - 1
+            while j >= 0 and out[j].isspace():
+                j -= 1
+            if j >= 0 and out[j] == ",":
+                del out[j]
+        out.append(ch)
+    return "".join(out)
+
+
+def _count(outcome):
+    with _stats_lock:
+        json_parse_stats["parsed"] += 1
+        json_parse_stats[outcome] += 1
+
+
+def extract_json(text, paths=None):
+    """
+    Pull the JSON object out of an LLM response
+
+    Prefers a fenced ```json block, ignores prose and stray braces around
+    the object, fixes trailing commas, closes a truncated object at its last
+    complete value and, failing all that, rebuilds one from every complete
+    item under paths.
+
+    Args:
+        text (str): Model output
+        paths (dict): Array key paths to salvage items from, as for JsonItemStream
+    Returns:
+        tuple: (dict, outcome) with outcome "clean", "fenced", "repaired" or "salvaged"
+    Raises:
+        JsonParseError: If nothing usable is found
+    """
+    text = text or ""
+    fence = _FENCE_RE.search(text)
+    offsets = [fence.end()] if fence else []
+    offsets.append(text.find("{"))
+
+    scanners = []
+    tried = set()
+    while offsets and len(tried) < MAX_OBJECT_STARTS:
+        offset = offsets.pop(0)
+        if offset == -1 or offset in tried:
+            continue
+        tried.add(offset)
+        scanner = JsonItemStream(paths)
+        scanner.feed(text[offset:])
+        scanners.append(scanner)
+        complete = scanner.text()
+        if complete is None:
+            # Runs to the end of the text: every later brace is inside it
+            continue
+        try:
+            value = json.loads(_strip_trailing_commas(complete))
+        except ValueError:
+            # Stray braces in prose; the object may start at the next '{'
+            offsets.append(text.find("{", offset + 1))
+            continue
+        if isinstance(value, dict):
+            outcome = "fenced" if fence and offset == fence.end() else "clean"
+            _count(outcome)
+            return value, outcome
+
+    for scanner in scanners:
+        if not scanner.done:
+            value = scanner.repair()
+            if value is not None:
+                _count("repaired")
+                return value, "repaired"
+    for scanner in scanners:
+        value = scanner.salvage()
+        if value is not None:
+            _count("salvaged")
+            return value, "salvaged"
+    _count("failed")
+    raise JsonParseError("AI response did not contain a usable JSON object.")
+
+
+def parse_stats():
+    with _stats_lock:
+        stats = dict(json_parse_stats)
+    parsed = stats["parsed"] or 1
+    stats["repair_rate"] = round((stats["repaired"] + stats["salvaged"]) / parsed, 4)
+    stats["failure_rate"] = round(stats["failed"] / parsed, 4)
+    return stats
@@ -0,0 +1,302 @@
+import os
+from dotenv import load_dotenv
+
+# Optional: vectorizes the coordinate passes; the layout is identical without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+load_dotenv()
+
+# Node box sizes and spacing (px); positions are the top-left corner of each box
+LAYOUT_NODE_WIDTH = float(os.getenv("LAYOUT_NODE_WIDTH", "180"))
+LAYOUT_IMAGE_WIDTH = float(os.getenv("LAYOUT_IMAGE_WIDTH", "120"))
+LAYOUT_SIBLING_GAP = float(os.getenv("LAYOUT_SIBLING_GAP", "40"))
+LAYOUT_LEVEL_HEIGHT = float(os.getenv("LAYOUT_LEVEL_HEIGHT", "150"))
+# Lay out AI-generated charts here instead of trusting the model's positions
+AUTO_LAYOUT_AI = os.getenv("AUTO_LAYOUT_AI", "true").lower() != "false"
+
+
+def _as_dict(obj):
+    return obj.model_dump() if hasattr(obj, "model_dump") else obj
+
+
+class _Tree:
+    """
+    Spanning forest over the chart as parallel arrays, indexed by node
+    position. Index n is a virtual root above every real root, so a forest
+    is laid out as one tree and its trees never overlap.
+    """
+
+    def __init__(self, ids, widths, edges):
+        n = len(ids)
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        self.n = n
+        self.width = list(widths) + [0.0]
+        self.parent = [-1] * (n + 1)
+        self.children = [[] for _ in range(n + 1)]
+        # First reporting line wins; further managers of the same node are
+        # kept as edges but do not move it
+        for source, target in edges:
+            s, t = index.get(source), index.get(target)
+            if s is None or t is None or s == t or self.parent[t] != -1:
+                continue
+            self.parent[t] = s
+            self.children[s].append(t)
+
+        self.children[n] = [i for i in range(n) if self.parent[i] == -1]
+        for i in self.children[n]:
+            self.parent[i] = n
+
+        # Breadth-first order: parents before children, one depth band at a time
+        self.depth = [0] * (n + 1)
+        self.number = [0] * (n + 1)
+        self.order = [n]
+        self._extend(0)
+        if len(self.order) <= n:
+            # Nodes only reachable through a cycle: cut it and start a new tree there
+            reached = bytearray(n + 1)
+            for i in self.order:
+                reached[i] = 1
+            for i in range(n):
+                if not reached[i]:
+                    self.children[self.parent[i]].remove(i)
+                    self.parent[i] = n
+                    self.number[i] = len(self.children[n])
+                    self.children[n].append(i)
+                    self.depth[i] = 1
+                    mark = len(self.order)
+                    self.order.append(i)
+                    self._extend(mark)
+                    for j in self.order[mark:]:
+                        reached[j] = 1
+
+    def _extend(self, k):
+        """Breadth-first from order[k:], appending children as they are found"""
+        children, depth, number, order = self.children, self.depth, self.number, self.order
+        while k < len(order):
+            i = order[k]
+            d = depth[i] + 1
+            for position, c in enumerate(children[i]):
+                depth[c] = d
+                number[c] = position
+                order.append(c)
+            k += 1
+
+
+def _tidy_x(tree):
+    """
+    Buchheim/Walker tidy tree, linear time and without recursion
+
+    Returns relative offsets: (prelim, mod) so that a node's x centre is its
+    prelim plus the mods of all its ancestors.
+    """
+    n = tree.n + 1
+    children, parent, number, width = tree.children, tree.parent, tree.number, tree.width
+    prelim = [0.0] * n
+    mod = [0.0] * n
+    shift = [0.0] * n
+    change = [0.0] * n
+    thread = [-1] * n
+    ancestor = list(range(n))
+    midpoint = [0.0] * n
+
+    def next_left(v):
+        return children[v][0] if children[v] else thread[v]
+
+    def next_right(v):
+        return children[v][-1] if children[v] else thread[v]
+
+    def distance(a, b):
+        return (width[a] + width[b]) / 2 + LAYOUT_SIBLING_GAP
+
+    def apportion(v, default_ancestor):
+        siblings = children[parent[v]]
+        k = number[v]
+        if k == 0:
+            return default_ancestor
+        vir = vor = v
+        vil = siblings[k - 1]
+        vol = siblings[0]
+        sir = sor = mod[v]
+        sil, sol = mod[vil], mod[vol]
+        while next_right(vil) != -1 and next_left(vir) != -1:
+            vil, vir = next_right(vil), next_left(vir)
+            vol, vor = next_left(vol), next_right(vor)
+            ancestor[vor] = v
+            gap = (prelim[vil] + sil) - (prelim[vir] + sir) + distance(vil, vir)
+            if gap > 0:
+                wl = ancestor[vil] if parent[ancestor[vil]] == parent[v] else default_ancestor
+                subtrees = number[v] - number[wl]
+                change[v] -= gap / subtrees
+                shift[v] += gap
+                change[wl] += gap / subtrees
+                prelim[v] += gap
+                mod[v] += gap
+                sir += gap
+                sor += gap
+            sil += mod[vil]
+            sir += mod[vir]
+            sol += mod[vol]
+            sor += mod[vor]
+        if next_right(vil) != -1 and next_right(vor) == -1:
+            thread[vor] = next_right(vil)
+            mod[vor] += sil - sor
+        if next_left(vir) != -1 and next_left(vol) == -1:
+            thread[vol] = next_left(vir)
+            mod[vol] += sir - sol
+            default_ancestor = v
+        return default_ancestor
+
+    # Children before parents. Each child's subtree is final when its parent
+    # is reached, so placing it next to its left sibling and apportioning it
+    # here matches the recursive first walk.
+    for v in reversed(tree.order):
+        kids = children[v]
+        if not kids:
+            continue
+        default_ancestor = kids[0]
+        for k, w in enumerate(kids):
+            if k:
+                prelim[w] = prelim[kids[k - 1]] + distance(kids[k - 1], w)
+                mod[w] = prelim[w] - midpoint[w]
+            else:
+                prelim[w] = midpoint[w]
+            default_ancestor = apportion(w, default_ancestor)
+        # Execute the shifts collected by apportion
+        total_shift = total_change = 0.0
+        for w in reversed(kids):
+            prelim[w] += total_shift
+            mod[w] += total_shift
+            total_change += change[w]
+            total_shift += shift[w] + total_change
+        midpoint[v] = (prelim[kids[0]] + prelim[kids[-1]]) / 2
+    prelim[tree.n] = midpoint[tree.n]
+    return prelim, mod
+
+
+def _absolute_x(tree, prelim, mod):
+    """Second walk: x centre = prelim + sum of ancestor mods"""
+    n = tree.n + 1
+    if np is not None:
+        order = np.asarray(tree.order, dtype=np.int64)
+        parent = np.asarray(tree.parent, dtype=np.int64)
+        depth = np.asarray(tree.depth, dtype=np.int64)[order]
+        mod_arr = np.asarray(mod)
+        offset = np.zeros(n)
+        # One vectorized step per depth band, parents already done
+        bounds = np.flatnonzero(np.diff(depth)) + 1
+        for band in np.split(order, bounds)[1:]:
+            p = parent[band]
+            offset[band] = offset[p] + mod_arr[p]
+        return np.asarray(prelim) + offset
+    offset = [0.0] * n
+    for v in tree.order[1:]:
+        p = tree.parent[v]
+        offset[v] = offset[p] + mod[p]
+    return [prelim[v] + offset[v] for v in range(n)]
+
+
+def compute_layout(chart):
+    """
+    Tidy-tree positions for every node of a chart
+
+    Managers are centred over their reports, subtrees never overlap and
+    sit as close as the sibling gap allows (Reingold-Tilford/Walker, in
+    Buchheim's linear-time form). Separate trees are placed side by side.
+    A node with several managers is placed under the first one; cycles are
+    cut. Image nodes that are not connected to anyone (logos) are lined up
+    above the top-left of the chart.
+
+    Args:
+        chart: ChartData or dict with 'nodes' and 'edges'
+    Returns:
+        dict: node id -> {"x": float, "y": float} (top-left corner)
+    """
+    chart = _as_dict(chart)
+    nodes = {}
+    for node in chart.get("nodes") or []:
+        if not isinstance(node, dict):
+            node = _as_dict(node)
+        nodes.setdefault(str(node["id"]), node)
+    edges = []
+    for edge in chart.get("edges") or []:
+        if not isinstance(edge, dict):
+            edge = _as_dict(edge)
+        edges.append((str(edge["source"]), str(edge["target"])))
+
+    ids, widths, images = [], [], []
+    for node_id, node in nodes.items():
+        if node.get("type") == "image":
+            images.append(node_id)
+        else:
+            ids.append(node_id)
+            widths.append(LAYOUT_NODE_WIDTH)
+    loose_images = []
+    if images:
+        connected = {node_id for edge in edges for node_id in edge}
+        for node_id in images:
+            if node_id in connected:
+                ids.append(node_id)
+                widths.append(LAYOUT_IMAGE_WIDTH)
+            else:
+                loose_images.append(node_id)
+
+    positions = {}
+    if ids:
+        tree = _Tree(ids, widths, edges)
+        prelim, mod = _tidy_x(tree)
+        x = _absolute_x(tree, prelim, mod)
+        count = len(ids)
+        if np is not None:
+            left_x = x[:count] - np.asarray(widths) / 2
+            left_x -= left_x.min()
+            ys = (np.asarray(tree.depth[:count]) - 1) * LAYOUT_LEVEL_HEIGHT
+            xs, ys = left_x.tolist(), ys.tolist()
+        else:
+            xs = [x[i] - widths[i] / 2 for i in range(count)]
+            left = min(xs)
+            xs = [value - left for value in xs]
+            ys = [(tree.depth[i] - 1) * LAYOUT_LEVEL_HEIGHT for i in range(count)]
+        for node_id, node_x, node_y in zip(ids, xs, ys):
+            positions[node_id] = {"x": node_x, "y": node_y}
+    top = -LAYOUT_LEVEL_HEIGHT if ids else 0.0
+    for k, node_id in enumerate(loose_images):
+        positions[node_id] = {"x": k * (LAYOUT_IMAGE_WIDTH + LAYOUT_SIBLING_GAP), "y": top}
+    return positions
+
+
+def apply_layout(chart):
+    """
+    Copy of a chart with every node's position replaced by compute_layout()
+
+    Returns:
+        dict: 'nodes' and 'edges', ready for parse_chart()
+    """
+    chart = _as_dict(chart)
+    positions = compute_layout(chart)
+    nodes = []
+    for node in chart.get("nodes") or []:
+        node = dict(_as_dict(node))
+        node["position"] = positions.get(str(node["id"]), node.get("position") or {"x": 0.0, "y": 0.0})
+        nodes.append(node)
+    return {"nodes": nodes, "edges": [_as_dict(e) for e in chart.get("edges") or []]}
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import random
+
+    random.seed(1)
+    for count in [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]:
+        chart = {
+            "nodes": [{"id": str(i), "position": {"x": 0, "y": 0}} for i in range(count)],
+            "edges": [{"source": str(random.randrange(max(1, i // 2), i) if i > 1 else 0), "target": str(i)}
+                      for i in range(1, count)]
+        }
+        start = time.perf_counter()
+        positions = compute_layout(chart)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>7} nodes  {elapsed * 1000:8.1f} ms  numpy: {'yes' if np is not None else 'no'}")
@@ -1,14 +1,28 @@
 import requests
 import json
-import time
 import os
-from firecrawl import FirecrawlApp
-from openai import OpenAI
+import re
+import asyncio
+import hashlib
 from dotenv import load_dotenv
 import datetime
+import urlfilter
+from crawlcache import crawl_cache
+from clientpool import client_pool
 
 load_dotenv()
 
+# Batch scrape polling starts fast and backs off exponentially up to the max
+FIRECRAWL_POLL_INITIAL = float(os.getenv("FIRECRAWL_POLL_INITIAL", "2"))
+FIRECRAWL_POLL_MAX = float(os.getenv("FIRECRAWL_POLL_MAX", "30"))
+FIRECRAWL_POLL_BACKOFF = float(os.getenv("FIRECRAWL_POLL_BACKOFF", "1.5"))
+# "ambiguous": ask OpenAI only about URLs the local rules can't decide; "off": rules only
+URL_FILTER_LLM = os.getenv("URL_FILTER_LLM", "ambiguous")
+# Max simultaneous Firecrawl requests per API key, across all crawls
+FIRECRAWL_MAX_CONCURRENCY_PER_KEY = int(os.getenv("FIRECRAWL_MAX_CONCURRENCY_PER_KEY", "3"))
+# A markdown block/line on at least this share of a crawl's pages is boilerplate
+BOILERPLATE_MIN_SHARE = float(os.getenv("BOILERPLATE_MIN_SHARE", "0.5"))
+
 
 def mapSite(url, firecrawl_app):
     #app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
@@ -16,11 +30,7 @@ def mapSite(url, firecrawl_app):
     return map_result
 
 
-def filter_lawfirm_urls(urls, openai_client):
-    """
-    Filter URLs to maximize law firm relevant coverage using OpenAI
-    """
-    system_prompt = """You are the "firecrawl_filter" AI for WebsiteIntelligenceAgent.
+FILTER_SYSTEM_PROMPT = """You are the "firecrawl_filter" AI for WebsiteIntelligenceAgent.
 ● INPUT: JSON array of raw URLs (strings), all from the same law‑firm domain.
 ● OUTPUT: JSON array named "results" of URLs filtered to maximize firm‑relevant coverage—while still dropping purely utility pages.
 TEMPORARY LIMIT: Maximum 80 URLs in output (this clause will be removed soon)
@@ -58,11 +68,19 @@ If a URL matches both inclusion and exclusion, include it.
 If filtered results exceed 30 URLs, prioritize in this order: homepage, core pages (about/team/services), then news/blog content, stopping at 30 total.
 Output strictly valid JSON array named "results"—no comments or extra fields."""
 
+
+def llm_filter_lawfirm_urls(urls, openai_client):
+    """
+    Filter URLs with the firecrawl_filter prompt on gpt-4o-mini
+
+    Returns:
+        list: Filtered URLs, or None if the call failed
+    """
     try:
         response = openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": FILTER_SYSTEM_PROMPT},
                 {"role": "user", "content": json.dumps(urls)}
             ],
             response_format={"type": "json_object"},
@@ -74,12 +92,39 @@ Output strictly valid JSON array named "results"—no comments or extra fields."
         return result.get("results", [])
     except Exception as e:
         print(f"Error filtering URLs with OpenAI: {e}")
-        return urls[:50]  # Fallback to first 50 URLs
+        return None
+
+
+def filter_lawfirm_urls(urls, openai_client, llm_mode=URL_FILTER_LLM):
+    """
+    Filter URLs to maximize law firm relevant coverage
+
+    The mechanical rules run locally (urlfilter.py); OpenAI only sees the
+    URLs no rule could decide on, and only while there is room under the cap.
+
+    Args:
+        urls (list): Mapped URLs
+        openai_client: OpenAI client, may be None
+        llm_mode (str): "ambiguous" to send undecided URLs to the LLM, "off" to skip it
+    """
+    prefiltered = urlfilter.prefilter_lawfirm_urls(urls)
+    results = prefiltered["results"]
+    ambiguous = prefiltered["ambiguous"]
+    room = urlfilter.MAX_FILTERED_URLS - len(results)
+    print(f"Rule filter kept {len(results)}, dropped {prefiltered['dropped']}, ambiguous {len(ambiguous)}")
+
+    if llm_mode == "ambiguous" and openai_client and ambiguous and room > 0:
+        approved = llm_filter_lawfirm_urls(ambiguous, openai_client)
+        if approved:
+            # Only accept URLs we actually sent, in their original order
+            approved = set(approved)
+            results = results + [u for u in ambiguous if u in approved][:room]
+    return results
 
 
 def get_scrape_w_format(url, frmt, api_key_firecrawl):
     try:
-        firecrawl_app = FirecrawlApp(api_key=api_key_firecrawl)
+        firecrawl_app = client_pool.firecrawl(api_key_firecrawl)
         if frmt == "screenshot":
             response = firecrawl_app.async_batch_scrape_urls([url], formats=['screenshot@fullPage'])
         else:
@@ -120,110 +165,437 @@ def get_scrape_status(batch_id, firecrawl_app):
         return None
 
 
-# def deslopify_markdown(data):
+_IMAGE_RE = re.compile(r"!\[[^\]]*\]\((?:[^()]|\([^)]*\))*\)")
+_LINK_RE = re.compile(r"\[([^\]]*)\]\((?:[^()]|\([^)]*\))*\)")
+_AUTOLINK_RE = re.compile(r"<(https?://[^>]+)>")
+_INNER_SPACE_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+_WORD_RE = re.compile(r"\w")
+# Lines shorter than this (in word characters) are never treated as boilerplate,
+# so table separators, rules and short headings survive
+_MIN_BOILERPLATE_LINE = 20
 
-def crawl_lawfirm_website(url, max_wait_time=500, api_key_firecrawl=None, api_key_openai=None):
+
+def _clean_markdown_line(line):
+    line = _IMAGE_RE.sub("", line)
+    line = _LINK_RE.sub(lambda m: m.group(1), line)
+    line = _AUTOLINK_RE.sub(lambda m: m.group(1), line)
+    return _INNER_SPACE_RE.sub(" ", line.rstrip())
+
+
+def _markdown_blocks(markdown):
+    """Split markdown into blocks of cleaned, non-empty lines separated by blank lines"""
+    blocks, current = [], []
+    for raw in (markdown or "").splitlines():
+        had_text = bool(raw.strip())
+        line = _clean_markdown_line(raw)
+        if line.strip():
+            current.append(line)
+        elif not had_text and current:
+            # Only real blank lines end a block; lines emptied by image removal don't
+            blocks.append(current)
+            current = []
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def _fingerprint(text):
+    return hashlib.blake2b(" ".join(text.lower().split()).encode("utf-8"), digest_size=8).digest()
+
+
+def deslopify_markdown(pages, min_share=BOILERPLATE_MIN_SHARE, stats=None):
     """
-    Complete law firm website crawling function that replicates the n8n workflow
-    
+    Strip cross-page boilerplate and link/image noise from one crawl's pages
+
+    Blocks (and long lines) whose fingerprint appears on at least
+    min_share of the pages - nav bars, footers, cookie banners, contact
+    blocks - are dropped. Images are removed, links reduced to their text
+    and whitespace normalized. Pages are yielded one at a time.
+
+    Args:
+        pages (list): title/url/markdown dicts
+        min_share (float): Fraction of pages a block must appear on to be boilerplate
+        stats (dict): Optional dict updated with pages, bytes_in, bytes_out,
+            bytes_saved and boilerplate_blocks
+    Yields:
+        dict: Page with cleaned markdown
+    """
+    if stats is None:
+        stats = {}
+    stats.update({"pages": 0, "bytes_in": 0, "bytes_out": 0, "bytes_saved": 0, "boilerplate_blocks": 0})
+
+    # Pass 1: count on how many pages each block/line fingerprint occurs
+    parsed = []
+    block_pages, line_pages = {}, {}
+    for page in pages:
+        blocks = _markdown_blocks(page.get("markdown"))
+        parsed.append(blocks)
+        block_keys, line_keys = set(), set()
+        for block in blocks:
+            block_keys.add(_fingerprint("\n".join(block)))
+            for line in block:
+                if len(_WORD_RE.findall(line)) >= _MIN_BOILERPLATE_LINE:
+                    line_keys.add(_fingerprint(line))
+        for key in block_keys:
+            block_pages[key] = block_pages.get(key, 0) + 1
+        for key in line_keys:
+            line_pages[key] = line_pages.get(key, 0) + 1
+
+    # A single page has no cross-page repetition to learn from
+    threshold = max(2, int(len(parsed) * min_share + 0.999999))
+    boilerplate_blocks = {k for k, n in block_pages.items() if n >= threshold}
+    boilerplate_lines = {k for k, n in line_pages.items() if n >= threshold}
+    stats["boilerplate_blocks"] = len(boilerplate_blocks)
+
+    # Pass 2: rebuild each page without the boilerplate
+    for page, blocks in zip(pages, parsed):
+        kept = []
+        for block in blocks:
+            if _fingerprint("\n".join(block)) in boilerplate_blocks:
+                continue
+            lines = [line for line in block if _fingerprint(line) not in boilerplate_lines]
+            if lines:
+                kept.append("\n".join(lines))
+        markdown = "\n\n".join(kept)
+        bytes_in = len((page.get("markdown") or "").encode("utf-8"))
+        bytes_out = len(markdown.encode("utf-8"))
+        stats["pages"] += 1
+        stats["bytes_in"] += bytes_in
+        stats["bytes_out"] += bytes_out
+        stats["bytes_saved"] += bytes_in - bytes_out
+        yield {**page, "markdown": markdown}
+
+
+def _deslopify_pages(pages):
+    stats = {}
+    cleaned = list(deslopify_markdown(pages, stats=stats))
+    return cleaned, stats
+
+def api_key_id(api_key):
+    """Stable, non-reversible identifier for an API key (safe to log or key dicts on)"""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class BatchScrapePoller:
+    """
+    Single background task that polls every outstanding Firecrawl batch
+    scrape. Each batch is checked on its own adaptive schedule (fast at
+    first, then exponential backoff) and Firecrawl requests are capped per
+    API key, so dozens of concurrent crawls don't each run their own loop.
+    """
+
+    def __init__(self, initial_interval=FIRECRAWL_POLL_INITIAL, max_interval=FIRECRAWL_POLL_MAX,
+                 backoff=FIRECRAWL_POLL_BACKOFF, max_per_key=FIRECRAWL_MAX_CONCURRENCY_PER_KEY):
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_per_key = max(1, max_per_key)
+        self._loop = None
+        self._pending = {}
+        self._key_slots = {}
+        self._wakeup = None
+        self._task = None
+        # In-flight _check tasks, held so they aren't garbage-collected mid-poll
+        self._checks = set()
+        self.checks = 0
+
+    def _bind_loop(self):
+        # State is tied to one event loop; rebind if called from a new one (e.g. asyncio.run)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = {}
+            self._key_slots = {}
+            self._wakeup = asyncio.Event()
+            self._task = None
+            self._checks = set()
+        return loop
+
+    def key_slots(self, api_key):
+        """Semaphore limiting concurrent Firecrawl requests for one API key"""
+        self._bind_loop()
+        key = api_key_id(api_key)
+        if key not in self._key_slots:
+            self._key_slots[key] = asyncio.Semaphore(self.max_per_key)
+        return self._key_slots[key]
+
+    async def call(self, api_key, fn, *args, **kwargs):
+        """Run a blocking Firecrawl SDK call in a thread under the key's concurrency cap"""
+        async with self.key_slots(api_key):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def wait(self, firecrawl_app, api_key, batch_id, max_wait_time, on_status=None):
+        """
+        Wait until a batch scrape finishes
+
+        Args:
+            firecrawl_app: FirecrawlApp that submitted the batch
+            api_key (str): Firecrawl API key (for per-key limits)
+            batch_id (str): Batch scrape id
+            max_wait_time (int): Seconds before giving up
+            on_status (callable): Optional callback receiving each in-progress status
+        Returns:
+            The final status response ("completed" or "failed"), or None on timeout
+        """
+        loop = self._bind_loop()
+        now = loop.time()
+        entry = {
+            "app": firecrawl_app,
+            "api_key": api_key,
+            "batch_id": batch_id,
+            "future": loop.create_future(),
+            "interval": self.initial_interval,
+            "next_check": now + self.initial_interval,
+            "deadline": now + max_wait_time,
+            "checking": False,
+            "on_status": on_status
+        }
+        # Key on the entry itself so two waiters on one batch id can't clobber each other
+        token = id(entry)
+        self._pending[token] = entry
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        try:
+            return await entry["future"]
+        finally:
+            self._pending.pop(token, None)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            self._wakeup.clear()
+            now = loop.time()
+            waiting = [e for e in self._pending.values() if not e["checking"]]
+            for entry in waiting:
+                if entry["next_check"] <= now:
+                    entry["checking"] = True
+                    task = asyncio.create_task(self._check(entry))
+                    self._checks.add(task)
+                    task.add_done_callback(self._checks.discard)
+            upcoming = [e["next_check"] for e in self._pending.values() if not e["checking"]]
+            timeout = max(0.0, min(upcoming) - now) if upcoming else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check(self, entry):
+        loop = asyncio.get_running_loop()
+        future = entry["future"]
+        try:
+            status_response = await self.call(
+                entry["api_key"], entry["app"].check_batch_scrape_status, entry["batch_id"]
+            )
+            self.checks += 1
+            if status_response and status_response.status in ("completed", "failed"):
+                if not future.done():
+                    future.set_result(status_response)
+                # Let the loop see the batch is done (and exit when nothing is left)
+                self._wakeup.set()
+                return
+            if status_response and entry["on_status"]:
+                entry["on_status"](status_response)
+        except Exception as e:
+            print(f"Error getting batch status for {entry['batch_id']}: {e}")
+
+        now = loop.time()
+        if now >= entry["deadline"]:
+            if not future.done():
+                future.set_result(None)
+            self._wakeup.set()
+            return
+        entry["interval"] = min(entry["interval"] * self.backoff, self.max_interval)
+        entry["next_check"] = min(now + entry["interval"], entry["deadline"])
+        entry["checking"] = False
+        self._wakeup.set()
+
+    async def close(self):
+        """Cancel the polling loop and any status checks still running"""
+        tasks = list(self._checks)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for entry in list(self._pending.values()):
+            if not entry["future"].done():
+                entry["future"].cancel()
+
+    def stats(self):
+        return {
+            "outstanding_batches": len(self._pending),
+            "status_checks": self.checks,
+            "max_concurrency_per_key": self.max_per_key
+        }
+
+
+batch_poller = BatchScrapePoller()
+
+
+def _clean_scrape_results(results, source_urls=None):
+    """
+    Reduce Firecrawl scrape documents to title/url/markdown dicts
+
+    Args:
+        results: Completed batch scrape status response
+        source_urls (list): Optional list that receives the requested URL of
+            each kept page (metadata 'url' is the final URL after redirects)
+    """
+    cleaned_results = []
+    for scraped in results.data:
+        try:
+            cleaned_results.append({
+                "title": scraped.metadata['title'],
+                "url": scraped.metadata['url'],
+                "markdown": getattr(scraped, 'markdown', '')
+            })
+            if source_urls is not None:
+                source_urls.append(scraped.metadata.get('sourceURL') or scraped.metadata['url'])
+        except Exception as e:
+            print(f"Error processing scraped item: {e}")
+            continue
+    return cleaned_results
+
+
+async def crawl_lawfirm_website_async(url, max_wait_time=500, api_key_firecrawl=None, api_key_openai=None,
+                                      progress=None, use_cache=True, clean_markdown=True):
+    """
+    Async law firm crawl: map -> filter -> batch scrape -> poll, without blocking the event loop
+
+    The blocking SDK calls run in worker threads under the per-key Firecrawl
+    limit and status polling is handed to the shared batch_poller, so many
+    crawls can share one event loop.
+
     Args:
         url (str): The law firm website URL to crawl
         max_wait_time (int): Maximum time to wait for batch scrape completion (seconds)
         api_key_firecrawl (str): Firecrawl API key
         api_key_openai (str): OpenAI API key
+        progress (callable): Optional progress(stage, **info) callback, called on the event loop
+        use_cache (bool): Serve still-fresh pages from crawl_cache and only scrape new/stale URLs
+        clean_markdown (bool): Run deslopify_markdown over the pages before returning
     Returns:
-        dict: Contains 'all_links' (original mapped URLs) and 'scraped' (scraped data)
+        dict: Contains 'all_links' (original mapped URLs), 'scraped' (scraped data),
+            'cache' (pages served from cache vs. scraped) and, when cleaning,
+            'deslopify' (bytes saved)
     """
+    def report(stage, **info):
+        if progress:
+            try:
+                progress(stage, **info)
+            except Exception as e:
+                print(f"Error reporting crawl progress: {e}")
+
+    async def finish(pages, cache_info, **extra):
+        result = {"all_links": all_links, "scraped": pages, "cache": cache_info, **extra}
+        if clean_markdown and pages:
+            # Raw pages stay in crawl_cache; only the response is cleaned
+            result["scraped"], result["deslopify"] = await asyncio.to_thread(_deslopify_pages, pages)
+            print(f"Deslopify saved {result['deslopify']['bytes_saved']} bytes")
+        return result
+
     try:
-        # Initialize clients
-        #firecrawl_app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
-        #openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        firecrawl_app = FirecrawlApp(api_key=api_key_firecrawl)
-        openai_client = OpenAI(api_key=api_key_openai)
+        firecrawl_app = client_pool.firecrawl(api_key_firecrawl)
+        openai_client = client_pool.openai(api_key_openai)
 
         print(f"Starting crawl for: {url}")
-        
+
         # Step 1: Map the website to get all URLs
-        print("Step 1: Mapping website...")
-        map_result = firecrawl_app.map_url(url)
+        report("mapping", url=url)
+        map_result = await batch_poller.call(api_key_firecrawl, firecrawl_app.map_url, url)
         all_links = map_result.links if hasattr(map_result, 'links') else []
         print(f"Found {len(all_links)} URLs")
-        
+
         if not all_links:
             return {"all_links": [], "scraped": []}
-        
-        # Step 2: Filter URLs using OpenAI
-        print("Step 2: Filtering URLs with AI...")
-        filtered_urls = filter_lawfirm_urls(all_links, openai_client)
+
+        # Step 2: Filter URLs (local rules, OpenAI for the ambiguous remainder)
+        report("filtering", found=len(all_links))
+        filtered_urls = await asyncio.to_thread(filter_lawfirm_urls, all_links, openai_client)
         print(f"Filtered to {len(filtered_urls)} relevant URLs")
-        
+
         if not filtered_urls:
             return {"all_links": all_links, "scraped": []}
-        
-        # Step 3: Submit batch scrape
-        print("Step 3: Submitting batch scrape...")
-        #batch_response = batch_scrape_urls(filtered_urls, firecrawl_app)
-        batch_response = firecrawl_app.async_batch_scrape_urls(filtered_urls, formats=['markdown'])
+
+        # Step 3: Reuse fresh pages from the crawl cache
+        if use_cache:
+            cached_pages, to_scrape = await asyncio.to_thread(crawl_cache.split, filtered_urls)
+        else:
+            cached_pages, to_scrape = [], filtered_urls
+        cache_info = {"hits": len(cached_pages), "scraped": len(to_scrape), "changed": 0}
+        print(f"{len(cached_pages)} pages from cache, {len(to_scrape)} to scrape")
+
+        if not to_scrape:
+            return await finish(cached_pages, cache_info)
+
+        # Step 4: Submit batch scrape for new or stale URLs
+        report("scraping", urls=len(to_scrape), cached=len(cached_pages))
+        batch_response = await batch_poller.call(
+            api_key_firecrawl, firecrawl_app.async_batch_scrape_urls, to_scrape, formats=['markdown']
+        )
         print(f"Batch response: {batch_response}")
         batch_id = batch_response.id if hasattr(batch_response, 'id') else None
 
         if not batch_id:
             print("No batch ID received")
-            print(f"Batch response: {batch_response}")
-            return {"all_links": all_links, "scraped": [], "error": "No batch ID"}
-        
+            return await finish(cached_pages, cache_info, error="No batch ID")
+
+        # Step 5: Wait for completion and get results
+        report("waiting", batch_id=batch_id)
+        status_response = await batch_poller.wait(
+            firecrawl_app,
+            api_key_firecrawl,
+            batch_id,
+            max_wait_time,
+            on_status=lambda st: report(
+                "waiting",
+                batch_id=batch_id,
+                completed=getattr(st, 'completed', None),
+                total=getattr(st, 'total', None)
+            )
+        )
 
-        # Step 4: Wait for completion and get results
-        print("Step 4: Waiting for scrape completion...")
-        start_time = time.time()
-        
+        if status_response is None:
+            print(f"Timeout reached after {max_wait_time} seconds")
+            return await finish(cached_pages, cache_info)
+
+        if status_response.status == "failed":
+            print("Batch scrape failed")
+            return await finish(cached_pages, cache_info)
+
+        print("Scrape completed, retrieving results...")
+        if not hasattr(status_response, 'data'):
+            print("No results received or invalid results structure")
+            return await finish(cached_pages, cache_info, error="No valid results")
+
+        source_urls = []
+        scraped_pages = _clean_scrape_results(status_response, source_urls)
+        cache_info["changed"] = await asyncio.to_thread(crawl_cache.store, scraped_pages, source_urls)
+        return await finish(cached_pages + scraped_pages, cache_info)
 
-        while time.time() - start_time < max_wait_time:
-            status_response = firecrawl_app.check_batch_scrape_status(batch_id)
-            
-            if status_response and status_response.status == "completed":
-                print("Scrape completed, retrieving results...")
-                results = firecrawl_app.check_batch_scrape_status(batch_id)
-                #print(f"Results: {results}")
-                if results and hasattr(results, 'data'):
-                    cleaned_results = []
-                    for scraped in results.data:
-                        try:
-                            cleaned_results.append({
-                                "title": scraped.metadata['title'],
-                                "url": scraped.metadata['url'],
-                                "markdown": getattr(scraped, 'markdown', '')
-                            })
-                        except Exception as e:
-                            print(f"Error processing scraped item: {e}")
-                            continue
-                    return {
-                        "all_links": all_links,
-                        "scraped": cleaned_results
-                    }
-                else:
-                    print("No results received or invalid results structure")
-                    print(f"Results type: {type(results)}")
-                    return {"all_links": all_links, "scraped": [], "error": "No valid results"}
-            
-            elif status_response and status_response.status == "failed":
-                print("Batch scrape failed")
-                return {"all_links": all_links, "scraped": []}
-            
-            # Wait 10 seconds before checking again (matching n8n workflow)
-            time.sleep(10)
-        
-        print(f"Timeout reached after {max_wait_time} seconds")
-        return {"all_links": all_links, "scraped": []}
-        
     except Exception as e:
-        print(f"Error in crawl_lawfirm_website: {e}")
+        print(f"Error in crawl_lawfirm_website_async: {e}")
         import traceback
         traceback.print_exc()
         return {"all_links": [], "scraped": [], "error": str(e)}
 
 
+def crawl_lawfirm_website(url, max_wait_time=500, api_key_firecrawl=None, api_key_openai=None):
+    """
+    Complete law firm website crawling function that replicates the n8n workflow
+    
+    Args:
+        url (str): The law firm website URL to crawl
+        max_wait_time (int): Maximum time to wait for batch scrape completion (seconds)
+        api_key_firecrawl (str): Firecrawl API key
+        api_key_openai (str): OpenAI API key
+    Returns:
+        dict: Contains 'all_links' (original mapped URLs) and 'scraped' (scraped data)
+    """
+    return asyncio.run(crawl_lawfirm_website_async(url, max_wait_time, api_key_firecrawl, api_key_openai))
+
+
 # Example usage
 if __name__ == "__main__":
     # Example law firm URL
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# In-memory tier size and entry lifetime
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+# Optional SQLite file so cached responses survive restarts (disabled when empty)
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "")
+# When true, two charts that only differ in node positions share a cache entry
+LLM_CACHE_IGNORE_POSITIONS = os.getenv("LLM_CACHE_IGNORE_POSITIONS", "false").lower() == "true"
+
+
+def _as_dict(obj):
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    return obj
+
+
+def canonical_chart_hash(chart, include_positions=True):
+    """
+    Hash a chart independent of node/edge order and dict key order
+
+    Args:
+        chart: ChartData model or a plain {"nodes": [...], "edges": [...]} dict
+        include_positions (bool): Whether node positions are part of the hash
+    Returns:
+        str: sha256 hex digest
+    """
+    data = _as_dict(chart) or {}
+    nodes = []
+    for node in data.get("nodes", []):
+        node = dict(_as_dict(node))
+        if not include_positions:
+            node.pop("position", None)
+        # Null fields carry no information, so they must not change the hash
+        nodes.append({k: v for k, v in node.items() if v is not None})
+    edges = [_as_dict(edge) for edge in data.get("edges", [])]
+    nodes.sort(key=lambda n: str(n.get("id")))
+    edges.sort(key=lambda e: (str(e.get("source")), str(e.get("target"))))
+    payload = json.dumps({"nodes": nodes, "edges": edges}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_key(kind, model, prompt, chart=None, image=None, image_hash=None):
+    """
+    Build a content-addressed cache key for one LLM call
+
+    Args:
+        kind (str): Endpoint/call family, e.g. "suggest" or "generate"
+        model (str): Upstream model or assistant name
+        prompt (str): Prompt text (template or user prompt)
+        chart: Optional chart the prompt is about
+        image (bytes): Optional raw image bytes sent with the prompt
+        image_hash (str): sha256 hex digest of the image, when the bytes
+            aren't in memory (e.g. streamed to disk)
+    Returns:
+        str: sha256 hex digest
+    """
+    parts = {
+        "kind": kind,
+        "model": model,
+        "prompt": prompt,
+        "chart": canonical_chart_hash(chart, not LLM_CACHE_IGNORE_POSITIONS) if chart is not None else None,
+        "image": image_hash or (hashlib.sha256(image).hexdigest() if image else None)
+    }
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for raw LLM response text: an LRU dict with TTL in front
+    of an optional SQLite table
+    """
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL, db_path=LLM_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                print(f"Error opening LLM cache database {db_path}: {e}")
+                self._db = None
+
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_memory(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_disk(self, key):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] < time.time():
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+        return row
+
+    def _set_disk(self, key, value, expires_at):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._db.commit()
+
+    async def get(self, key):
+        value = self._get_memory(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self._db is not None:
+            try:
+                row = await asyncio.to_thread(self._get_disk, key)
+            except Exception as e:
+                print(f"Error reading LLM cache: {e}")
+                row = None
+            if row:
+                value, expires_at = row
+                self._set_memory(key, value, expires_at)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key, value):
+        if not value:
+            return
+        expires_at = time.time() + self.ttl
+        self._set_memory(key, value, expires_at)
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._set_disk, key, value, expires_at)
+            except Exception as e:
+                print(f"Error writing LLM cache: {e}")
+
+    def clear(self):
+        self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "disk": bool(self._db),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+response_cache = ResponseCache()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    coroutine and every duplicate that arrives while it is in flight awaits
+    the same result (or exception)
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.joined = 0
+
+    async def do(self, key, fn):
+        """
+        Args:
+            key (str): Coalescing key, usually from make_key()
+            fn: Zero-argument callable returning the coroutine to run
+        Returns:
+            The coroutine's result, shared by every concurrent caller
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.joined += 1
+        # Shield so one caller disconnecting doesn't cancel the shared call
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "joined": self.joined
+        }
+
+
+llm_flight = SingleFlight()
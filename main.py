@@ -1,23 +1,45 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Response, status, Body, Header
+from fastapi import FastAPI, HTTPException, File, Form, UploadFile, Response, status, Body, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse
+from fastapi import Request
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import json
-from pineconesoft import hmdceo
+from pineconesoft import hmdceo, ASSISTANT_NAME
 from googlenosoft import myGemini
+from llmcache import response_cache, llm_flight, make_key
 import legalcrawler
+from crawljobs import crawl_jobs
+from crawlcache import crawl_cache
+from clientpool import client_pool
+from middleware import CompressionMiddleware, BodyLimitMiddleware, compression_stats
+from uploads import (
+    UPLOAD_DIR, ALLOWED_IMAGE_TYPES, MAX_IMAGE_SIZE, MAX_SOURCE_IMAGE_SIZE, UploadTooLarge, UploadStaticFiles,
+    store_upload, spool_upload, find_upload, file_sha256, generate_derivatives
+)
+from serialization import iter_chart_json, iter_json, iter_ndjson, dumps_bytes, FastJSONResponse
+from imageprep import image_preprocessor
+from prompts import SUGGEST_PROMPT, GENERATE_PROMPT, GENERATE_LINES_PROMPT, prompt_stats
+from chartcodec import ChartCodec, ChartLineStream, expand_chart_lines, CHART_PROMPT_TOKEN_BUDGET, GENERATE_FORMAT
+from jsonstream import JsonItemStream, extract_json, parse_stats
+from chartgraph import ChartGraph, repair_chart
+from chartdiff import diff_charts, describe_changes, merge_changes
+from layout import compute_layout, apply_layout, AUTO_LAYOUT_AI
+from models import NodeData, EdgeData, ChartData, ChangeData, NODE_LIST, EDGE_LIST, parse_chart
+from pydantic import ValidationError
+from chartshard import (
+    shard_chart, merge_suggestions, SUGGEST_SHARD_MAX_NODES, SUGGEST_SHARD_THRESHOLD, SUGGEST_SHARD_CONCURRENCY
+)
 import base64
-import io
 import datetime
 import imghdr
-from fastapi.staticfiles import StaticFiles
 import os
-import uuid
+import asyncio
 from firecrawl import FirecrawlApp
 import legalcrawler
 
-app = FastAPI()
+# orjson-backed responses; endpoints returning large charts hand models to it directly
+app = FastAPI(default_response_class=FastJSONResponse)
 
 @app.get("/")
 async def root():
@@ -38,62 +60,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize myGemini instance
-gemini_ai = myGemini()
+# Negotiated zstd/br/gzip compression, streaming-aware
+app.add_middleware(CompressionMiddleware)
+# Reject oversized uploads while they stream in (multipart overhead allowed)
+app.add_middleware(BodyLimitMiddleware, limits={
+    "/api/upload-logo": MAX_IMAGE_SIZE + 64 * 1024,
+    "/api/ai-generate-orgchart/upload": MAX_SOURCE_IMAGE_SIZE + 64 * 1024
+})
 
-# Pydantic models
-class NodeData(BaseModel):
-    id: str
-    # Node type: 'text' (default) or 'image'
-    type: Optional[str] = "text"
-    # For text nodes
-    name: Optional[str] = None
-    role: Optional[str] = None
-    department: Optional[str] = None
-    position: Dict[str, float]
-    # For image nodes
-    src: Optional[str] = None  # data URI or URL
-    title: Optional[str] = None
-    description: Optional[str] = None
-    # Optionally allow extra fields for compatibility
-    class Config:
-        extra = "allow"
-
-class EdgeData(BaseModel):
-    source: str
-    target: str
-
-class ChartData(BaseModel):
-    nodes: List[NodeData]
-    edges: List[EdgeData]
-
-class ChangeData(BaseModel):
-    employeeId: str
-    action: str
-    reason: str
+# Initialize myGemini instance; the compact line format cuts output tokens,
+# and with them most of the generation latency
+gemini_ai = myGemini(template=GENERATE_LINES_PROMPT if GENERATE_FORMAT == "lines" else GENERATE_PROMPT)
 
+# Pydantic models
 class SuggestRequest(BaseModel):
     chart: ChartData
+    # 'single' (one call), 'sharded' (one call per department subtree) or 'auto' (shard large charts)
+    mode: Optional[str] = "auto"
 
 class SuggestResponse(BaseModel):
     modifiedChart: ChartData
     changes: List[ChangeData] = []
 
+class DiffRequest(BaseModel):
+    original: ChartData
+    modified: ChartData
+    ignore_positions: bool = True  # nodes that only moved are not reported
+
 class AIGenerateRequest(BaseModel):
     mode: str  # 'text' or 'image_and_text'
     prompt: str
     image_data: Optional[str] = None  # base64 encoded image
+    crop: Optional[List[float]] = None  # [left, top, right, bottom] as 0-1 fractions of the image
+    grayscale: bool = False
 
 class AIGenerateResponse(BaseModel):
     orgChart: ChartData
+    imagePrep: Optional[Dict[str, Any]] = None  # bytes/latency saved by image preprocessing
 
-UPLOAD_DIR = os.path.join(os.path.dirname(__file__), 'uploads')
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-ALLOWED_IMAGE_TYPES = {"image/png", "image/jpeg", "image/jpg", "image/svg+xml"}
-MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
-
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 @app.get("/")
 async def root():
@@ -103,112 +108,312 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "org-chart-builder"}
 
+@app.on_event("shutdown")
+async def shutdown():
+    # Stop Firecrawl batch polling so no status check outlives the app
+    await legalcrawler.batch_poller.close()
+
+@app.get("/api/metrics")
+async def metrics():
+    return {
+        "pinecone": hmdceo.stats(),
+        "llm_cache": response_cache.stats(),
+        "llm_single_flight": llm_flight.stats(),
+        "crawl_jobs": crawl_jobs.stats(),
+        "firecrawl_poller": legalcrawler.batch_poller.stats(),
+        # SQLite COUNT(*), kept off the event loop like split() and store()
+        "crawl_cache": await asyncio.to_thread(crawl_cache.stats),
+        "upstream_clients": client_pool.stats(),
+        "compression": compression_stats,
+        "image_prep": image_preprocessor.stats(),
+        "prompts": prompt_stats(),
+        "gemini": gemini_ai.stats(),
+        "json_parse": parse_stats()
+    }
+
 @app.options("/test-cors")
 def test_cors():
     return {"message": "cors okay"}
 
-@app.post("/api/suggest", response_model=SuggestResponse)
-async def suggest_changes(request: SuggestRequest):
+# Arrays whose complete items are streamed, and salvaged from broken output
+SUGGEST_ITEM_PATHS = {
+    ("modifiedChart", "nodes"): "node",
+    ("modifiedChart", "edges"): "edge",
+    ("changes",): "change"
+}
+GENERATE_ITEM_PATHS = {("nodes",): "node", ("edges",): "edge"}
+
+def _build_nodes(raw_nodes, strict: bool) -> List[NodeData]:
+    """
+    NodeData for each parsed node, validated as one list (image-node rules
+    included); with strict=False (repaired or salvaged output) nodes that
+    are cut short are dropped instead of failing the chart
+    """
+    try:
+        return NODE_LIST.validate_python(raw_nodes)
+    except ValidationError:
+        if strict:
+            raise
+    nodes = []
+    for node in raw_nodes:
+        try:
+            nodes.extend(NODE_LIST.validate_python([node]))
+        except ValidationError as e:
+            print(f"Dropping incomplete node from AI response: {e.errors()[0]['msg']}")
+    return nodes
+
+def _build_edges(raw_edges, node_ids, strict: bool) -> List[EdgeData]:
+    try:
+        edges = EDGE_LIST.validate_python(raw_edges)
+    except ValidationError:
+        if strict:
+            raise
+        edges = []
+        for edge in raw_edges:
+            try:
+                edges.append(EdgeData.model_validate(edge))
+            except ValidationError as e:
+                print(f"Dropping incomplete edge from AI response: {e.errors()[0]['msg']}")
+    if strict:
+        return edges
+    # Reporting lines to nodes lost with the truncated tail go too
+    return [edge for edge in edges if edge.source in node_ids and edge.target in node_ids]
+
+def _repaired(nodes, edges) -> ChartData:
+    """ChartData with duplicate ids, dangling edges and cycles from the model fixed"""
+    repaired, actions = repair_chart({"nodes": nodes, "edges": edges})
+    if actions:
+        print(f"Repaired AI chart ({len(actions)} fixes), e.g. {actions[0]}")
+    return ChartData(nodes=repaired["nodes"], edges=repaired["edges"])
+
+def _parse_suggestion(ai_response: str, codec: ChartCodec) -> Tuple[SuggestResponse, bool]:
+    """
+    Turn the assistant's text into a SuggestResponse in the original id space
+
+    A repaired or salvaged reply only covers what the model wrote before it
+    was cut off, so it is laid over the submitted chart rather than
+    replacing it.
+
+    Returns:
+        tuple: (SuggestResponse, True if the JSON was complete; False when it
+            was repaired or salvaged and should not be cached)
+    Raises:
+        ValueError: If no usable JSON object is found (json.JSONDecodeError included)
+    """
+    ai_json, outcome = extract_json(ai_response, SUGGEST_ITEM_PATHS)
+    complete = outcome in ("clean", "fenced")
+    if complete and ('modifiedChart' not in ai_json or 'changes' not in ai_json):
+        raise ValueError("AI response missing required keys.")
+    if not isinstance(ai_json.get('modifiedChart'), dict):
+        raise ValueError("AI response missing required keys.")
+    # Validate chart, back in the original id space
+    chart = codec.decode_chart(ai_json['modifiedChart'], partial=not complete)
+    nodes = _build_nodes(chart['nodes'], complete)
+    edges = _build_edges(chart['edges'], {node.id for node in nodes}, complete)
+    # Validate changes robustly
+    changes = []
+    for idx, chg in enumerate(ai_json.get('changes') or []):
+        change = _decode_change(chg, codec, idx)
+        if change is not None:
+            changes.append(change)
+    return SuggestResponse(
+        modifiedChart=_repaired(nodes, edges),
+        changes=changes
+    ), complete
+
+def _decode_change(chg, codec: ChartCodec, idx=None) -> Optional[ChangeData]:
+    if not isinstance(chg, dict):
+        print(f"Malformed change at index {idx}: not a dict: {chg}")
+        return None
+    missing = [k for k in ('employeeId', 'action', 'reason') if k not in chg]
+    if missing:
+        print(f"Malformed change at index {idx}: missing keys {missing}: {chg}")
+        return None
     try:
-        # Prepare chart JSON, including all node fields (text and image nodes)
-        chart_json = json.dumps({
-            "nodes": [node.dict() for node in request.chart.nodes],
-            "edges": [edge.dict() for edge in request.chart.edges]
-        }, indent=2)
-
-        # Compose context for image nodes
-        image_nodes = [n for n in request.chart.nodes if getattr(n, 'type', 'text') == 'image']
-        image_context = ""
-        if image_nodes:
-            image_context = "\nThe org chart includes the following company logo/image nodes: "
-            for img in image_nodes:
-                image_context += f"\n- Title: {img.title or ''}, Description: {img.description or ''}"
-
-        prompt = f"""
-You are LegalSoft AI, an expert in virtual staffing and organizational design. Analyze the following org chart and recommend improvements, focusing on where LegalSoft virtual staff can replace or augment roles for greater efficiency, productivity, or cost savings.
-
-Current org chart:
-{chart_json}
-Optional org data: 
-{image_context}
-
-Instructions:
-- Use knowledge of Legalsoft and the organization structure and scale to suggest replacements or additions of virtual staff where appropriate.
-- For each recommended replacement or new virtual staff member, include a clear, concise justification in natural language explaining why the change improves efficiency, productivity, or cost. Focus on LegalSoft's core strengths in virtual staffing.
-- Return a JSON object with two keys:
-  1. 'modifiedChart': the improved org chart (with 'nodes' and 'edges')
-  2. 'changes': an array of objects, each with these keys: employeeId, action, reason,(in a pydandic dic) describing every replacement or addition and the reason for it.
-- Use the same employeeId for any replaced or added node as in the chart, or a new unique id for new staff.
-- Preserve any image/logo nodes (type: 'image') in the chart and do not remove or alter them unless explicitly instructed.
-- Format your response as a clean JSON object, no extra text or explanation.
-"""
-
-        ai_raw_response = hmdceo.chat(prompt)
+        return ChangeData(
+            employeeId=codec.original_id(chg['employeeId']),
+            action=str(chg['action']),
+            reason=str(chg['reason'])
+        )
+    except Exception as e:
+        print(f"Error constructing ChangeData at index {idx}: {e}, data: {chg}")
+        return None
+
+def _suggest_key(chart: ChartData) -> str:
+    return make_key("suggest", ASSISTANT_NAME, f"{SUGGEST_PROMPT.fingerprint}:{CHART_PROMPT_TOKEN_BUDGET}", chart=chart)
+
+async def _suggest_from_ai(chart_data: ChartData, cache_key: str) -> SuggestResponse:
+    # Compact outline with short ids, folded to fit the token budget
+    codec = ChartCodec(chart_data)
+    body = SUGGEST_PROMPT.render(chart_outline=codec.text)
+
+    ai_response = await response_cache.get(cache_key)
+    if ai_response is None:
+        # The assistant takes a single message, so the static instructions lead it
+        ai_raw_response = await hmdceo.achat(f"{SUGGEST_PROMPT.prefix}\n\n{body}")
         if not ai_raw_response:
             raise HTTPException(status_code=500, detail="Failed to get AI response")
+        SUGGEST_PROMPT.record(body, usage=getattr(ai_raw_response, "usage", None))
+        ai_response = ai_raw_response.message.content
+        from_cache = False
+    else:
+        from_cache = True
+
+    try:
+        result, complete = _parse_suggestion(ai_response, codec)
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Error parsing AI response: {e}")
+        print(f"AI Response: {ai_response}")
+        return SuggestResponse(modifiedChart=chart_data, changes=[])
+    # Only cache complete responses; a repaired one is served once and retried next time
+    if not from_cache and complete:
+        await response_cache.set(cache_key, ai_response)
+    return result
+
+async def _suggest_single(chart: ChartData) -> SuggestResponse:
+    cache_key = _suggest_key(chart)
+    # Identical charts submitted at the same time share one assistant call
+    return await llm_flight.do(cache_key, lambda: _suggest_from_ai(chart, cache_key))
+
+async def _suggest_sharded(chart: ChartData) -> SuggestResponse:
+    """
+    Map-reduce suggestions: one assistant call per department subtree, run
+    in parallel under a cap, merged back into a single response. Unchanged
+    shards are answered from the response cache on later requests.
+    """
+    shards = shard_chart(chart, SUGGEST_SHARD_MAX_NODES)
+    if len(shards) <= 1:
+        return await _suggest_single(chart)
+    slots = asyncio.Semaphore(SUGGEST_SHARD_CONCURRENCY)
+
+    async def run(shard):
+        async with slots:
+            try:
+                result = await _suggest_single(ChartData.model_validate(shard.chart))
+                return {
+                    "nodes": [node.model_dump() for node in result.modifiedChart.nodes],
+                    "edges": [edge.model_dump() for edge in result.modifiedChart.edges],
+                    "changes": [change.model_dump() for change in result.changes]
+                }
+            except Exception as e:
+                # The shard keeps its original nodes; the other shards still count
+                print(f"Error in suggestion shard {shard.index}: {e}")
+                return None
+
+    results = await asyncio.gather(*(run(shard) for shard in shards))
+    merged = merge_suggestions(chart, shards, results)
+    failed = sum(1 for result in results if result is None)
+    print(f"Sharded suggestions: {len(shards)} shards, {failed} failed, {merged['conflicts']} conflicting edits dropped")
+    return SuggestResponse(
+        modifiedChart=_repaired(merged["nodes"], merged["edges"]),
+        changes=[ChangeData(**change) for change in merged["changes"]]
+    )
+
+def _reconcile_changes(original: ChartData, result: SuggestResponse) -> SuggestResponse:
+    """
+    Replace the model's change list with the actual differences between
+    the submitted and the suggested chart, keeping the model's reasons
+    """
+    modified = result.modifiedChart
+    diff = diff_charts(original, modified)
+    changes, dropped = merge_changes(describe_changes(diff, original, modified), result.changes)
+    if dropped:
+        print(f"Dropped {dropped} suggested changes with no matching chart change")
+    return result.model_copy(update={"changes": [ChangeData(**change) for change in changes]})
+
+@app.post("/api/suggest", response_model=SuggestResponse)
+async def suggest_changes(request: SuggestRequest):
+    mode = request.mode or "auto"
+    if mode not in ("single", "sharded", "auto"):
+        raise HTTPException(status_code=400, detail="Invalid mode. Use 'single', 'sharded' or 'auto'.")
+    try:
+        if mode == "sharded" or (mode == "auto" and len(request.chart.nodes) > SUGGEST_SHARD_THRESHOLD):
+            result = await _suggest_sharded(request.chart)
+        else:
+            result = await _suggest_single(request.chart)
+        return FastJSONResponse(_reconcile_changes(request.chart, result))
+    except Exception as e:
+        print(f"Error in suggest_changes: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps_bytes(data).decode('utf-8')}\n\n"
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+async def _aiter(chunks):
+    """Iterate a list or an async generator of text chunks alike"""
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        for chunk in chunks:
+            yield chunk
+
+@app.post("/api/suggest/stream")
+async def suggest_changes_stream(request: SuggestRequest):
+    """
+    Server-Sent Events version of /api/suggest (always a single assistant call)
+
+    Emits 'node', 'edge' and 'change' events as soon as each one is complete
+    in the assistant's output, then 'done' with the full SuggestResponse, or
+    'error' if the call fails.
+    """
+    chart_data = request.chart
+    cache_key = _suggest_key(chart_data)
+    codec = ChartCodec(chart_data)
+    body = SUGGEST_PROMPT.render(chart_outline=codec.text)
+
+    async def event_stream():
+        extractor = JsonItemStream(SUGGEST_ITEM_PATHS)
+        ai_response = await response_cache.get(cache_key)
+        from_cache = ai_response is not None
         try:
-            ai_response = ai_raw_response.message.content 
-            start_idx = ai_response.find('{')
-            end_idx = ai_response.rfind('}') + 1
-            if start_idx != -1 and end_idx != 0:
-                json_str = ai_response[start_idx:end_idx]
-                ai_json = json.loads(json_str)
-                if 'modifiedChart' not in ai_json or 'changes' not in ai_json:
-                    raise ValueError("AI response missing required keys.")
-                # Validate chart
-                chart = ai_json['modifiedChart']
-                nodes = []
-                for node in chart['nodes']:
-                    # Validate image-node required fields
-                    if node.get('type', 'text') == 'image':
-                        if not node.get('src'):
-                            raise ValueError(f"Image node {node.get('id')} missing 'src' field.")
-                        if not node.get('position'):
-                            raise ValueError(f"Image node {node.get('id')} missing 'position' field.")
-                    nodes.append(NodeData(**node))
-                edges = [EdgeData(**edge) for edge in chart['edges']]
-                # Validate changes robustly
-                changes = []
-                for idx, chg in enumerate(ai_json['changes']):
-                    if not isinstance(chg, dict):
-                        print(f"Malformed change at index {idx}: not a dict: {chg}")
-                        continue
-                    missing = [k for k in ('employeeId', 'action', 'reason') if k not in chg]
-                    if missing:
-                        print(f"Malformed change at index {idx}: missing keys {missing}: {chg}")
-                        continue
-                    try:
-                        changes.append(ChangeData(
-                            employeeId=str(chg['employeeId']),
-                            action=str(chg['action']),
-                            reason=str(chg['reason'])
-                        ))
-                    except Exception as e:
-                        print(f"Error constructing ChangeData at index {idx}: {e}, data: {chg}")
-                return SuggestResponse(
-                    modifiedChart=ChartData(nodes=nodes, edges=edges),
-                    changes=changes
-                )
+            if from_cache:
+                chunks = [ai_response]
             else:
-                return SuggestResponse(modifiedChart=request.chart, changes=[])
+                chunks = hmdceo.achat_stream(f"{SUGGEST_PROMPT.prefix}\n\n{body}")
+            parts = []
+            async for chunk in _aiter(chunks):
+                parts.append(chunk)
+                for event, item in extractor.feed(chunk):
+                    if event == "node":
+                        item = codec.decode_node(item)
+                    elif event == "edge":
+                        item = codec.decode_edge(item)
+                    else:
+                        item = _decode_change(item, codec)
+                        item = item.model_dump() if item else None
+                    if item is not None:
+                        yield _sse(event, item)
+            ai_response = "".join(parts)
+            if not from_cache:
+                SUGGEST_PROMPT.record(body)
+        except Exception as e:
+            print(f"Error in suggest_changes_stream: {e}")
+            yield _sse("error", {"detail": str(e)})
+            return
+
+        try:
+            result, complete = _parse_suggestion(ai_response, codec)
+            if not from_cache and complete:
+                await response_cache.set(cache_key, ai_response)
         except (json.JSONDecodeError, ValueError) as e:
             print(f"Error parsing AI response: {e}")
-            print(f"AI Response: {ai_response}")
-            return SuggestResponse(modifiedChart=request.chart, changes=[])
-    except Exception as e:
-        print(f"Error in suggest_changes: {e}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+            result = SuggestResponse(modifiedChart=chart_data, changes=[])
+        yield _sse("done", _reconcile_changes(chart_data, result).model_dump())
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 @app.post("/api/save")
-async def save_org_chart(chart: ChartData):
-    # Serialize chart to JSON (including image-nodes)
-    chart_json = json.dumps(chart.dict(), indent=2)
+async def save_org_chart(chart: ChartData, pretty: bool = True):
     # Generate filename with timestamp
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"orgchart_{timestamp}.json"
-    # Create a streaming response for download
+    # Stream the JSON (including image-nodes) node by node for download;
+    # ?pretty=false writes compact JSON, roughly a third smaller
     return StreamingResponse(
-        io.BytesIO(chart_json.encode("utf-8")),
+        iter_chart_json(chart, indent=2 if pretty else None),
         media_type="application/json",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
@@ -216,32 +421,220 @@ async def save_org_chart(chart: ChartData):
     )
 
 @app.post("/api/load")
-async def load_org_chart(file: UploadFile = File(None), json_data: Optional[Dict[str, Any]] = None):
+async def load_org_chart(file: UploadFile = File(None), json_data: Optional[Dict[str, Any]] = None,
+                         repair: bool = False):
     try:
         if file:
-            # Read and parse uploaded file
+            # Parse the uploaded bytes straight into the models
             content = await file.read()
-            data = json.loads(content)
+            chart = parse_chart(content)
         elif json_data:
-            data = json_data
+            chart = parse_chart(json_data)
         else:
             raise HTTPException(status_code=400, detail="No file or JSON data provided.")
-        # Validate with Pydantic (including image-nodes)
-        chart = ChartData(**data)
-        # Validate image-nodes
-        for node in chart.nodes:
-            if getattr(node, 'type', 'text') == 'image':
-                if not getattr(node, 'src', None):
-                    raise HTTPException(status_code=422, detail=f"Image node {node.id} missing 'src' field.")
-                if not getattr(node, 'position', None):
-                    raise HTTPException(status_code=422, detail=f"Image node {node.id} missing 'position' field.")
-        return chart
+        # Duplicate ids, dangling edges and cycles break the front end
+        graph = ChartGraph(chart)
+        if not graph.valid:
+            if not repair:
+                return FastJSONResponse(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    content={"detail": "Invalid org chart structure (retry with ?repair=true to fix it).",
+                             "validation": graph.report()}
+                )
+            repaired, actions = graph.repair()
+            print(f"Repaired loaded chart: {len(actions)} fixes")
+            chart = ChartData(nodes=repaired["nodes"], edges=repaired["edges"])
+        return FastJSONResponse(chart)
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             content={"detail": f"Invalid org chart JSON: {str(e)}"}
         )
 
+@app.post("/api/diff")
+async def diff_org_charts(request: DiffRequest):
+    """
+    Differences between two charts (e.g. two saves): added, removed,
+    modified and re-parented nodes, added/removed edges, and one
+    plain-language change record per affected node
+    """
+    def run():
+        diff = diff_charts(request.original, request.modified, request.ignore_positions)
+        diff["changes"] = describe_changes(diff, request.original, request.modified)
+        return diff
+    return FastJSONResponse(await asyncio.to_thread(run))
+
+@app.post("/api/validate")
+async def validate_org_chart(chart: ChartData, repair: bool = False):
+    """
+    Structural check of a chart in O(N+E): duplicate ids, dangling edges,
+    self-references and cycles (errors), plus repeated edges, several roots,
+    orphans and people with several managers (warnings). With ?repair=true
+    the errors are fixed and the repaired chart is returned as well.
+    """
+    graph = await asyncio.to_thread(ChartGraph, chart)
+    result = {"validation": graph.report()}
+    if repair:
+        repaired, actions = graph.repair()
+        result["repairs"] = actions
+        result["chart"] = {"nodes": repaired["nodes"], "edges": repaired["edges"]}
+    return FastJSONResponse(result)
+
+@app.post("/api/layout")
+async def layout_org_chart(chart: ChartData):
+    """
+    Tidy-tree positions for a chart: managers centred over their reports,
+    no overlaps, separate trees side by side. Nothing but positions changes.
+    """
+    # CPU-bound for large charts; keep the event loop free
+    laid_out = await asyncio.to_thread(apply_layout, chart)
+    return FastJSONResponse(laid_out)
+
+def _auto_layout(raw_nodes, raw_edges, force: bool = False):
+    """Replace the model's node positions with a tidy-tree layout, in place"""
+    if not (AUTO_LAYOUT_AI or force):
+        return
+    nodes = [node for node in raw_nodes if isinstance(node, dict) and "id" in node]
+    edges = [edge for edge in raw_edges if isinstance(edge, dict) and "source" in edge and "target" in edge]
+    positions = compute_layout({"nodes": nodes, "edges": edges})
+    for node in nodes:
+        node["position"] = positions[str(node["id"])]
+
+def _parse_generated(ai_response: str) -> Tuple[AIGenerateResponse, bool]:
+    """
+    Returns:
+        tuple: (AIGenerateResponse, True if the JSON was complete)
+    Raises:
+        ValueError: If no valid org chart JSON is found (json.JSONDecodeError included)
+    """
+    if gemini_ai.template is GENERATE_LINES_PROMPT:
+        chart, complete = expand_chart_lines(ai_response)
+        if chart['nodes']:
+            # The line format has no positions, so it is always laid out here
+            _auto_layout(chart['nodes'], chart['edges'], force=True)
+            nodes = _build_nodes(chart['nodes'], complete)
+            edges = _build_edges(chart['edges'], {node.id for node in nodes}, complete)
+            return AIGenerateResponse(orgChart=_repaired(nodes, edges)), complete
+        # No chart lines: the model may have answered in JSON anyway
+    ai_json, outcome = extract_json(ai_response, GENERATE_ITEM_PATHS)
+    complete = outcome in ("clean", "fenced")
+    raw_nodes = ai_json['nodes'] if complete else ai_json.get('nodes') or []
+    raw_edges = ai_json['edges'] if complete else ai_json.get('edges') or []
+    _auto_layout(raw_nodes, raw_edges)
+    # Validate chart (including image-nodes)
+    nodes = _build_nodes(raw_nodes, complete)
+    if not complete and not nodes:
+        raise ValueError("AI response did not contain any complete org chart nodes.")
+    chart = _repaired(nodes, _build_edges(raw_edges, {node.id for node in nodes}, complete))
+    return AIGenerateResponse(orgChart=chart), complete
+
+async def _generate_from_ai(cache_key: str, ask_ai) -> AIGenerateResponse:
+    ai_response = await response_cache.get(cache_key)
+    from_cache = ai_response is not None
+    if not from_cache:
+        ai_response = await ask_ai()
+        print(ai_response)
+
+    # Check for errors in AI response
+    if isinstance(ai_response, str) and ai_response.startswith("Error:"):
+        raise HTTPException(status_code=500, detail=ai_response)
+
+    # Parse JSON from AI response
+    try:
+        result, complete = _parse_generated(ai_response)
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        print(f"Error parsing AI response: {e}")
+        print(f"AI Response: {ai_response}")
+        raise HTTPException(status_code=500, detail="AI returned invalid org chart JSON.")
+    if not from_cache and complete:
+        await response_cache.set(cache_key, ai_response)
+    return result
+
+def _check_crop(crop):
+    if crop is not None and (len(crop) != 4 or not (0 <= crop[0] < crop[2] <= 1 and 0 <= crop[1] < crop[3] <= 1)):
+        raise HTTPException(status_code=400, detail="crop must be [left, top, right, bottom] fractions between 0 and 1.")
+
+
+def _generate_key(user_prompt: str, image=None, image_hash: str = None,
+                  crop: Optional[List[float]] = None, grayscale: bool = False) -> str:
+    if image is None:
+        return make_key("generate", gemini_ai.TEXT_MODEL, f"{gemini_ai.template.fingerprint}\n\n{user_prompt}")
+    # Image + text mode, keyed on the original bytes plus the preprocessing settings
+    prep_signature = image_preprocessor.signature(crop, grayscale)
+    return make_key(
+        "generate", gemini_ai.IMAGE_MODEL, f"{gemini_ai.template.fingerprint}\n\n{user_prompt}\n\n{prep_signature}",
+        image=image if isinstance(image, bytes) else None, image_hash=image_hash
+    )
+
+def _decode_image_data(request: AIGenerateRequest):
+    """Validate an image_and_text request and return (image bytes, MIME type)"""
+    if not request.image_data:
+        raise HTTPException(status_code=400, detail="Image data is required for image_and_text mode.")
+    try:
+        image_bytes = base64.b64decode(request.image_data)
+        # Detect image type
+        image_type = imghdr.what(None, h=image_bytes)
+        mime_type = f"image/{image_type}"
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
+    _check_crop(request.crop)
+    return image_bytes, mime_type
+
+async def _generate_orgchart(user_prompt: str, image=None, mime_type: str = None, image_hash: str = None,
+                             crop: Optional[List[float]] = None, grayscale: bool = False,
+                             delete_after: bool = False) -> AIGenerateResponse:
+    """
+    Generate an org chart with Gemini from a prompt and an optional image
+
+    Args:
+        user_prompt (str): User's description
+        image (bytes or str): Image bytes, or the path of a file holding them
+        mime_type (str): Image MIME type
+        image_hash (str): sha256 of the image when passing a path
+        crop (list): Optional crop box for preprocessing
+        grayscale (bool): Grayscale the image before sending it
+        delete_after (bool): image is a temp file to delete once it is no
+            longer needed. The shared call may outlive this request, so the
+            caller must not delete it.
+    """
+    image_report = {}
+    cache_key = _generate_key(user_prompt, image, image_hash, crop, grayscale)
+    if image is None:
+        # Text-only mode using myGemini
+        ask_ai = lambda: gemini_ai.chat(user_prompt)
+    else:
+        async def ask_ai():
+            # Downsize/re-encode off the event loop, only on a cache miss
+            prepared, prepared_mime, report = await image_preprocessor.prepare(image, mime_type, crop, grayscale)
+            image_report.update(report or {})
+            return await gemini_ai.chat_image(user_prompt, prepared, prepared_mime)
+
+    started = False
+
+    async def generate():
+        try:
+            return await _generate_from_ai(cache_key, ask_ai)
+        finally:
+            if delete_after:
+                await asyncio.to_thread(os.unlink, image)
+
+    def start():
+        nonlocal started
+        started = True
+        return generate()
+
+    # Identical prompts submitted at the same time share one Gemini call
+    try:
+        result = await llm_flight.do(cache_key, start)
+    finally:
+        if delete_after and not started:
+            # Joined another request's call, which reads its own copy of the image
+            await asyncio.to_thread(os.unlink, image)
+    if image_report:
+        result = result.model_copy(update={"imagePrep": image_report})
+    return result
+
+
 @app.post("/api/ai-generate-orgchart", response_model=AIGenerateResponse)
 async def ai_generate_orgchart(request: AIGenerateRequest):
     try:
@@ -249,126 +642,157 @@ async def ai_generate_orgchart(request: AIGenerateRequest):
         if not user_prompt:
             raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
 
-        # If org chart is included, extract image-node context
-        image_context = ""
-        if hasattr(request, 'orgChart') and request.orgChart:
-            image_nodes = [n for n in request.orgChart.nodes if getattr(n, 'type', 'text') == 'image']
-            if image_nodes:
-                image_context = "\nThe org chart includes the following company logo/image nodes: "
-                for img in image_nodes:
-                    image_context += f"\n- Title: {img.title or ''}, Description: {img.description or ''}"
-
-        system_prompt = f'''
-            You are LegalSoft AI, an expert in organizational design and virtual staffing. You can handle this type of request:
-
-            1. **Org Chart Generation**: Create complete organizational charts from descriptions or images
-
-            For **Org Chart Generation**, return a JSON object with this schema:
-            {{
-            "nodes": [
-                {{
-                "id": "string", // unique identifier
-                "type": "text" or "image", // node type
-                "src": "string", // for image nodes (data URI or URL)
-                "title": "string", // for image nodes
-                "description": "string", // for image nodes
-                "name": "string", // for text nodes
-                "role": "string", // for text nodes
-                "department": "string", // for text nodes
-                "position": {{"x": number, "y": number}} // layout position
-                }}
-            ],
-            "edges": [
-                {{"source": "string", "target": "string"}} // reporting relationships
-            ]
-            }}
-
-            Instructions:
-            - Infer missing roles, hierarchy, or structure if the request is vague or incomplete
-            - Use logical, realistic org chart structures
-            - Assign unique IDs to each node
-            - Assign reasonable x/y positions for layout (e.g., root at y=50, children at y=200, etc.)
-            - For improvements, focus on LegalSoft's virtual staffing capabilities
-            - If the org chart includes image/logo nodes (type: 'image'), preserve them and reference their title/description as company branding.
-            - Return only a valid JSON object matching the appropriate schema, no extra text
-            {image_context}
-
-            User prompt : {user_prompt}
-            '''
-        
         if request.mode == "text":
-            # Text-only mode using myGemini
-            ai_response = await gemini_ai.chat(user_prompt)
-            print(ai_response)
+            return FastJSONResponse(await _generate_orgchart(user_prompt))
         elif request.mode == "image_and_text":
-            # Image + text mode using myGemini
-            if not request.image_data:
-                raise HTTPException(status_code=400, detail="Image data is required for image_and_text mode.")
-            try:
-                image_bytes = base64.b64decode(request.image_data)
-                #print(image_bytes)
-                # Detect image type
-                image_type = imghdr.what(None, h=image_bytes)
-                mime_type = f"image/{image_type}"
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
-            ai_response = await gemini_ai.chat_image(user_prompt, image_bytes, mime_type)
+            image_bytes, mime_type = _decode_image_data(request)
+            return FastJSONResponse(await _generate_orgchart(
+                user_prompt, image_bytes, mime_type, crop=request.crop, grayscale=request.grayscale
+            ))
         else:
             raise HTTPException(status_code=400, detail="Invalid mode. Use 'text' or 'image_and_text'.")
-        
-        # Check for errors in AI response
-        if isinstance(ai_response, str) and ai_response.startswith("Error:"):
-            raise HTTPException(status_code=500, detail=ai_response)
-        
-        # Parse JSON from AI response
-        try:
-            start_idx = ai_response.find('{')
-            end_idx = ai_response.rfind('}') + 1
-            if start_idx != -1 and end_idx != 0:
-                json_str = ai_response[start_idx:end_idx]
-                ai_json = json.loads(json_str)
-                # Validate chart (including image-nodes)
-                nodes = []
-                for node in ai_json['nodes']:
-                    if node.get('type', 'text') == 'image':
-                        if not node.get('src'):
-                            raise ValueError(f"Image node {node.get('id')} missing 'src' field.")
-                        if not node.get('position'):
-                            raise ValueError(f"Image node {node.get('id')} missing 'position' field.")
-                    nodes.append(NodeData(**node))
-                chart = ChartData(nodes=nodes, edges=[EdgeData(**edge) for edge in ai_json['edges']])
-                return AIGenerateResponse(orgChart=chart)
-            else:
-                raise ValueError("AI response did not contain a valid JSON object.")
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"Error parsing AI response: {e}")
-            print(f"AI Response: {ai_response}")
-            raise HTTPException(status_code=500, detail="AI returned invalid org chart JSON.")
     except Exception as e:
         print(f"Error in ai_generate_orgchart: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.post("/api/ai-generate-orgchart/upload", response_model=AIGenerateResponse)
+async def ai_generate_orgchart_upload(
+    prompt: str = Form(...),
+    image: Optional[UploadFile] = File(None),
+    logo_id: Optional[str] = Form(None),
+    crop: Optional[str] = Form(None),
+    grayscale: bool = Form(False)
+):
+    """
+    Multipart variant of /api/ai-generate-orgchart for image_and_text mode
+
+    The image arrives as raw bytes (no base64) and is streamed to a temp
+    file, or logo_id points at an image already sent to /api/upload-logo.
+    crop is "left,top,right,bottom" as 0-1 fractions.
+    """
+    user_prompt = prompt.strip()
+    if not user_prompt:
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+    if (image is None) == (not logo_id):
+        raise HTTPException(status_code=400, detail="Send either an image file or a logo_id.")
+    try:
+        crop_box = [float(v) for v in crop.split(",")] if crop else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="crop must be [left, top, right, bottom] fractions between 0 and 1.")
+    _check_crop(crop_box)
+
+    temp_path = None
+    try:
+        if image is not None:
+            try:
+                temp_path, image_hash, _ = await spool_upload(image, MAX_SOURCE_IMAGE_SIZE)
+            except UploadTooLarge:
+                raise HTTPException(status_code=400, detail=f"Image too large. Max {MAX_SOURCE_IMAGE_SIZE} bytes allowed.")
+            path = temp_path
+        else:
+            path = find_upload(logo_id)
+            if not path:
+                raise HTTPException(status_code=404, detail="Uploaded image not found.")
+            image_hash = await asyncio.to_thread(file_sha256, path)
+
+        image_type = await asyncio.to_thread(imghdr.what, path)
+        if not image_type:
+            raise HTTPException(status_code=400, detail="Unsupported image format.")
+        # From here the generation call owns the temp file and deletes it
+        delete_after, temp_path = temp_path is not None, None
+        return FastJSONResponse(await _generate_orgchart(
+            user_prompt, path, f"image/{image_type}", image_hash, crop=crop_box, grayscale=grayscale,
+            delete_after=delete_after
+        ))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in ai_generate_orgchart_upload: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        if temp_path:
+            await asyncio.to_thread(os.unlink, temp_path)
+
+@app.post("/api/ai-generate-orgchart/stream")
+async def ai_generate_orgchart_stream(request: AIGenerateRequest):
+    """
+    Server-Sent Events version of /api/ai-generate-orgchart
+
+    Emits 'node' and 'edge' events as Gemini writes them, then 'done' with
+    the full AIGenerateResponse, or 'error'. With the compact line format
+    'node' events have no position; the laid-out chart comes with 'done'.
+    """
+    user_prompt = request.prompt.strip()
+    if not user_prompt:
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+    if request.mode == "text":
+        image_bytes, mime_type = None, None
+    elif request.mode == "image_and_text":
+        image_bytes, mime_type = _decode_image_data(request)
+    else:
+        raise HTTPException(status_code=400, detail="Invalid mode. Use 'text' or 'image_and_text'.")
+    cache_key = _generate_key(user_prompt, image_bytes, crop=request.crop, grayscale=request.grayscale)
+
+    async def event_stream():
+        if gemini_ai.template is GENERATE_LINES_PROMPT:
+            extractor = ChartLineStream()
+        else:
+            extractor = JsonItemStream(GENERATE_ITEM_PATHS)
+        ai_response = await response_cache.get(cache_key)
+        from_cache = ai_response is not None
+        image_report = None
+        try:
+            if from_cache:
+                chunks = [ai_response]
+            elif image_bytes is None:
+                chunks = gemini_ai.chat_stream(user_prompt)
+            else:
+                prepared, prepared_mime, image_report = await image_preprocessor.prepare(
+                    image_bytes, mime_type, request.crop, request.grayscale
+                )
+                chunks = gemini_ai.chat_stream(user_prompt, prepared, prepared_mime)
+            parts = []
+            async for chunk in _aiter(chunks):
+                parts.append(chunk)
+                for event, item in extractor.feed(chunk):
+                    yield _sse(event, item)
+            for event, item in extractor.close():
+                yield _sse(event, item)
+            ai_response = "".join(parts)
+            result, complete = _parse_generated(ai_response)
+        except Exception as e:
+            print(f"Error in ai_generate_orgchart_stream: {e}")
+            yield _sse("error", {"detail": str(e)})
+            return
+        if not from_cache and complete:
+            await response_cache.set(cache_key, ai_response)
+        if image_report:
+            result = result.model_copy(update={"imagePrep": image_report})
+        yield _sse("done", result.model_dump())
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/api/upload-logo")
 async def upload_logo(file: UploadFile = File(...)):
     # Validate file type
     if file.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported file type. Only PNG, JPG, and SVG allowed.")
-    # Validate file size
-    contents = await file.read()
-    if len(contents) > MAX_IMAGE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Max 5MB allowed.")
-    # Generate unique filename
-    ext = os.path.splitext(file.filename)[1].lower()
+    ext = os.path.splitext(file.filename or "")[1].lower()
     if ext not in ['.png', '.jpg', '.jpeg', '.svg']:
-        ext = '.png' if file.content_type == 'image/png' else '.jpg'
-    unique_id = str(uuid.uuid4())
-    filename = f"{unique_id}{ext}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(contents)
-    url = f"/uploads/{filename}"
-    return {"id": unique_id, "url": url}
+        ext = {'image/png': '.png', 'image/svg+xml': '.svg'}.get(file.content_type, '.jpg')
+    # Stream to disk under the content hash, stopping at the size limit
+    try:
+        stored = await store_upload(file, ext, MAX_IMAGE_SIZE)
+    except UploadTooLarge:
+        raise HTTPException(status_code=400, detail="File too large. Max 5MB allowed.")
+    url = f"/uploads/{stored['filename']}"
+    # Precompressed SVGs and node-sized thumbnails, built once per unique logo
+    thumbnails = await asyncio.to_thread(generate_derivatives, stored["filename"])
+    return {
+        "id": stored["id"],
+        "url": url,
+        "thumbnails": {str(size): f"/uploads/{name}" for size, name in thumbnails.items()}
+    }
 
 
 #legalcrawler functions 
@@ -376,11 +800,33 @@ async def upload_logo(file: UploadFile = File(...)):
 class ScrapedData(BaseModel):
     url: str
     max_wait_time: Optional[int] = 300
+    use_cache: Optional[bool] = True
+    clean_markdown: Optional[bool] = True
+
+class BatchCrawlRequest(BaseModel):
+    urls: List[str]
+    max_wait_time: Optional[int] = 300
+    use_cache: Optional[bool] = True
+    clean_markdown: Optional[bool] = True
+
+# Firms from one batch request that run their pipeline at the same time
+CRAWL_BATCH_CONCURRENCY = int(os.getenv("CRAWL_BATCH_CONCURRENCY", "10"))
 
 
+def _crawl_response(result, accept: str):
+    """
+    Stream a crawl result: NDJSON (summary line, then one line per scraped
+    page) when the client accepts it, otherwise chunked JSON
+    """
+    if "application/x-ndjson" in (accept or ""):
+        header = {k: v for k, v in result.items() if k != "scraped"}
+        return StreamingResponse(iter_ndjson(header, result.get("scraped", [])), media_type="application/x-ndjson")
+    return StreamingResponse(iter_json(result, ("all_links", "scraped")), media_type="application/json")
+
 @app.post("/api/crawl-lawfirm")
 async def crawl_lawfirm_data(
     payload: ScrapedData,
+    request: Request,
     x_firecrawl_api_key: str = Header(None, alias="X-Firecrawl-API-Key"),
     x_openai_api_key: str = Header(None, alias="X-OpenAI-API-Key")
 ):
@@ -394,16 +840,112 @@ async def crawl_lawfirm_data(
         if not x_openai_api_key:
             raise HTTPException(status_code=400, detail="X-OpenAI-API-Key header is required")
         
-        result = legalcrawler.crawl_lawfirm_website(
+        result = await legalcrawler.crawl_lawfirm_website_async(
             url=payload.url, 
             max_wait_time=payload.max_wait_time,
             api_key_firecrawl=x_firecrawl_api_key,
-            api_key_openai=x_openai_api_key
+            api_key_openai=x_openai_api_key,
+            use_cache=payload.use_cache,
+            clean_markdown=payload.clean_markdown
         )
-        return result 
+        return _crawl_response(result, request.headers.get("accept"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error crawling law firm website: {str(e)}")
 
+@app.post("/api/crawl-lawfirm/batch")
+async def crawl_lawfirm_batch(
+    payload: BatchCrawlRequest,
+    x_firecrawl_api_key: str = Header(None, alias="X-Firecrawl-API-Key"),
+    x_openai_api_key: str = Header(None, alias="X-OpenAI-API-Key")
+):
+    """
+    Crawl many law firm websites at once, streaming one NDJSON line per firm
+    as soon as that firm finishes
+    """
+    if not x_firecrawl_api_key:
+        raise HTTPException(status_code=400, detail="X-Firecrawl-API-Key header is required")
+    if not x_openai_api_key:
+        raise HTTPException(status_code=400, detail="X-OpenAI-API-Key header is required")
+    if not payload.urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required")
+
+    slots = asyncio.Semaphore(CRAWL_BATCH_CONCURRENCY)
+
+    async def crawl_one(index, url):
+        async with slots:
+            result = await legalcrawler.crawl_lawfirm_website_async(
+                url=url,
+                max_wait_time=payload.max_wait_time,
+                api_key_firecrawl=x_firecrawl_api_key,
+                api_key_openai=x_openai_api_key,
+                use_cache=payload.use_cache,
+                clean_markdown=payload.clean_markdown
+            )
+        return {"index": index, "url": url, "result": result}
+
+    async def result_stream():
+        tasks = [asyncio.create_task(crawl_one(i, url)) for i, url in enumerate(payload.urls)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield dumps_bytes(await finished) + b"\n"
+        finally:
+            # Client went away: stop the remaining crawls
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+@app.post("/api/crawl-lawfirm/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_crawl_job(
+    payload: ScrapedData,
+    x_firecrawl_api_key: str = Header(None, alias="X-Firecrawl-API-Key"),
+    x_openai_api_key: str = Header(None, alias="X-OpenAI-API-Key")
+):
+    """
+    Start a law firm crawl in the background and return its job id right away
+    """
+    if not x_firecrawl_api_key:
+        raise HTTPException(status_code=400, detail="X-Firecrawl-API-Key header is required")
+    if not x_openai_api_key:
+        raise HTTPException(status_code=400, detail="X-OpenAI-API-Key header is required")
+    job = crawl_jobs.submit(
+        payload.url, payload.max_wait_time, x_firecrawl_api_key, x_openai_api_key,
+        use_cache=payload.use_cache, clean_markdown=payload.clean_markdown
+    )
+    return job.summary()
+
+def _get_crawl_job(job_id: str):
+    job = crawl_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Crawl job {job_id} not found")
+    return job
+
+@app.get("/api/crawl-lawfirm/jobs/{job_id}")
+async def crawl_job_status(job_id: str):
+    return _get_crawl_job(job_id).summary()
+
+@app.get("/api/crawl-lawfirm/jobs/{job_id}/result")
+async def crawl_job_result(job_id: str, request: Request):
+    job = _get_crawl_job(job_id)
+    if not job.done:
+        # Not finished yet: tell the client to keep polling
+        return FastJSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job.summary())
+    return _crawl_response({**job.summary(), **(job.result or {})}, request.headers.get("accept"))
+
+@app.get("/api/crawl-lawfirm/jobs/{job_id}/events")
+async def crawl_job_events(job_id: str):
+    """
+    Server-Sent Events stream of crawl progress, ending when the job finishes
+    """
+    job = _get_crawl_job(job_id)
+
+    async def event_stream():
+        async for event in job.follow():
+            yield _sse("progress", event)
+        yield _sse("done", job.summary())
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/api/scrape-page")
 async def scrape_page(
     url: str,
@@ -0,0 +1,249 @@
+import os
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+# Optional codecs: negotiated only when the package is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL_GZIP = int(os.getenv("COMPRESSION_LEVEL_GZIP", "6"))
+COMPRESSION_LEVEL_BROTLI = int(os.getenv("COMPRESSION_LEVEL_BROTLI", "4"))
+COMPRESSION_LEVEL_ZSTD = int(os.getenv("COMPRESSION_LEVEL_ZSTD", "3"))
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml"
+)
+# SSE must reach the client event by event, so it is never compressed
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def _available_encodings():
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+SUPPORTED_ENCODINGS = _available_encodings()
+
+# Per-encoding totals across all middleware instances, for /api/metrics
+compression_stats = {encoding: {"responses": 0, "bytes_in": 0, "bytes_out": 0} for encoding in SUPPORTED_ENCODINGS}
+
+
+def choose_encoding(accept_encoding, supported=SUPPORTED_ENCODINGS):
+    """
+    Pick the best supported encoding from an Accept-Encoding header
+
+    Highest q-value wins; ties go to the server preference order (zstd, br, gzip).
+    """
+    accepted = {}
+    for part in (accept_encoding or "").lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL_ZSTD).compressobj()
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=COMPRESSION_LEVEL_BROTLI)
+        else:
+            self._obj = zlib.compressobj(COMPRESSION_LEVEL_GZIP, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        """Compress and flush, so each streamed chunk reaches the client promptly"""
+        if self.encoding == "zstd":
+            return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data=b""):
+        if self.encoding == "zstd":
+            return self._obj.compress(data) + self._obj.flush()
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.finish()
+        return self._obj.compress(data) + self._obj.flush()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware negotiating zstd/br/gzip response compression. Streamed
+    responses are compressed chunk by chunk, so they stay streamed.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+        stats = compression_stats[encoding]
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk tells us what to do
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    # A byte range addresses the uncompressed body; compressing it breaks resumes
+                    or start_message["status"] == 206
+                    or "content-range" in headers
+                    or content_type.startswith(UNCOMPRESSED_TYPES)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                vary = [token.strip().lower() for token in headers.get("vary", "").split(",")]
+                if "accept-encoding" not in vary:
+                    headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The bytes differ from the uncompressed body, so the tag can only be weak
+                    headers["ETag"] = f"W/{etag}"
+                stats["responses"] += 1
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    # Single-chunk body: compress it whole and keep a correct length
+                    body_out = compressor.finish(body)
+                    headers["Content-Length"] = str(len(body_out))
+                    stats["bytes_in"] += len(body)
+                    stats["bytes_out"] += len(body_out)
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body_out})
+                    return
+                await send(start_message)
+
+            out = compressor.chunk(body) if more_body else compressor.finish(body)
+            stats["bytes_in"] += len(body)
+            stats["bytes_out"] += len(out)
+            await send({"type": "http.response.body", "body": out, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class BodyLimitMiddleware:
+    """
+    ASGI middleware that cuts off request bodies over a per-path byte limit
+    with 413, before the framework buffers or spools them.
+
+    Declared Content-Length is checked up front; chunked bodies are counted
+    as they arrive and end early once they pass the limit.
+    """
+
+    def __init__(self, app, limits):
+        """
+        Args:
+            limits (dict): Path -> maximum request body size in bytes
+        """
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        declared = Headers(scope=scope).get("content-length")
+        if declared and declared.isdigit() and int(declared) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Stop reading; the app sees a disconnect and fails fast
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded:
+                # Replace whatever error the app produced with a 413
+                if not response_started:
+                    response_started = True
+                    await self._reject(send, limit)
+                return
+            response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+    @staticmethod
+    async def _reject(send, limit):
+        body = f'{{"detail":"Request body too large. Max {limit} bytes allowed."}}'.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
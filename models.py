@@ -0,0 +1,87 @@
+from typing import Annotated, List, Dict, Optional
+from pydantic import AfterValidator, BaseModel, TypeAdapter
+
+
+class NodeData(BaseModel):
+    id: str
+    # Node type: 'text' (default) or 'image'
+    type: Optional[str] = "text"
+    # For text nodes
+    name: Optional[str] = None
+    role: Optional[str] = None
+    department: Optional[str] = None
+    position: Dict[str, float]
+    # For image nodes
+    src: Optional[str] = None  # data URI or URL
+    title: Optional[str] = None
+    description: Optional[str] = None
+    # Optionally allow extra fields for compatibility
+    class Config:
+        extra = "allow"
+
+
+def check_image_nodes(nodes):
+    """
+    Image nodes are useless without something to show and somewhere to show
+    it. Checked once per list rather than per node: a per-node Python
+    validator costs more than the rest of the node's validation.
+    """
+    for node in nodes:
+        if node.type == "image":
+            if not node.src:
+                raise ValueError(f"Image node {node.id} missing 'src' field.")
+            if not node.position:
+                raise ValueError(f"Image node {node.id} missing 'position' field.")
+    return nodes
+
+
+NodeList = Annotated[List[NodeData], AfterValidator(check_image_nodes)]
+
+
+class EdgeData(BaseModel):
+    source: str
+    target: str
+
+
+class ChartData(BaseModel):
+    nodes: List[NodeData]
+    edges: List[EdgeData]
+
+
+class CheckedChartData(ChartData):
+    """
+    ChartData with the image-node rules, for charts loaded from a file.
+    Charts the front end is still editing (save, diff, layout, suggest) may
+    hold an image node whose src is not set yet.
+    """
+    nodes: NodeList
+
+
+class ChangeData(BaseModel):
+    employeeId: str
+    action: str
+    reason: str
+
+
+# Built once; validating a whole list in one call stays in pydantic-core.
+# AI output goes through NODE_LIST, so it gets the image-node rules too
+NODE_LIST = TypeAdapter(NodeList)
+EDGE_LIST = TypeAdapter(List[EdgeData])
+
+
+def parse_chart(data):
+    """
+    Validate a loaded chart in a single pass, image-node rules included
+
+    Args:
+        data (bytes, str or dict): Raw JSON is parsed straight into the
+            models without building an intermediate dict
+    Returns:
+        CheckedChartData
+    Raises:
+        pydantic.ValidationError: If the JSON or any node/edge is invalid
+            (image nodes without 'src' or 'position' included)
+    """
+    if isinstance(data, (bytes, bytearray, str)):
+        return CheckedChartData.model_validate_json(data)
+    return CheckedChartData.model_validate(data)
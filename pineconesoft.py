@@ -1,10 +1,13 @@
 
 import os 
+import asyncio
 import pandas as pd
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv 
-from pinecone import Pinecone
 from pinecone_plugins.assistant.models.chat import Message
+from clientpool import client_pool, UPSTREAM_TIMEOUT
 
 # Load env variables from .env file 
 load_dotenv()
@@ -15,18 +18,35 @@ pinecone_api_key = os.getenv('PINECONE_API_KEY')
 if not pinecone_api_key:
     raise ValueError("Where yo Pinecone API key at??")
 
-# Initialize Pinecone
-pc = Pinecone(api_key=pinecone_api_key)
+# Initialize Pinecone (pooled client shared with the rest of the app)
+pc = client_pool.pinecone(pinecone_api_key)
 
 
 ASSISTANT_NAME = "hamidceo"  
 
+# Max number of assistant calls running at once; extra callers wait in line
+PINECONE_MAX_CONCURRENCY = int(os.getenv("PINECONE_MAX_CONCURRENCY", "4"))
+
 
 class PineconeAssistantChat:
-    def __init__(self, assistant_name):
+    def __init__(self, assistant_name, max_concurrency=PINECONE_MAX_CONCURRENCY):
         self.assistant_name = assistant_name
         self.pc = pc
         self.chat_history = []
+
+        # The assistant SDK is blocking, so async callers go through a
+        # dedicated pool instead of the default loop executor
+        self.max_concurrency = max(1, max_concurrency)
+        # Twice the slots: a timed-out call still holds its thread until the
+        # SDK returns, and must not stall the calls admitted after it
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency * 2,
+            thread_name_prefix="pinecone-assistant"
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
         
         # Get the assistant
         try:
@@ -59,6 +79,103 @@ class PineconeAssistantChat:
             print(f"Error chatting with assistant: {e}")
             return None
     
+    async def achat(self, message, include_citations=True):
+        """
+        Async version of chat() that runs the blocking call on the assistant
+        executor, keeping the event loop free for other requests
+        """
+        loop = asyncio.get_running_loop()
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            # The blocking SDK call can't be interrupted; on timeout its thread is
+            # abandoned and the caller gets None, like any other failed chat()
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.executor, self.chat, message, include_citations), UPSTREAM_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"Assistant call timed out after {UPSTREAM_TIMEOUT}s")
+            return None
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+    async def achat_stream(self, message):
+        """
+        Stream the assistant's reply as text deltas
+
+        The blocking SDK stream is consumed on the assistant executor and
+        handed to the event loop through a queue; the concurrency slot is
+        held until that thread is done.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        finished = object()
+        stop = threading.Event()
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # Loop already closed; nobody is listening any more
+                stop.set()
+
+        def produce():
+            try:
+                user_message = Message(role="user", content=message)
+                for chunk in self.assistant.chat(messages=[user_message], stream=True):
+                    if stop.is_set():
+                        break
+                    text = getattr(getattr(chunk, "delta", None), "content", None)
+                    if text:
+                        put(text)
+            except Exception as e:
+                print(f"Error streaming from assistant: {e}")
+                put(e)
+            finally:
+                put(finished)
+
+        def release(_):
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        loop.run_in_executor(self.executor, produce).add_done_callback(release)
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), UPSTREAM_TIMEOUT)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"Assistant stream stalled for {UPSTREAM_TIMEOUT}s")
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Client went away or the stream ended: let the thread wind down
+            stop.set()
+
+    def stats(self):
+        """Concurrency metrics for the assistant executor"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "completed": self.completed
+        }
+
     def chat_with_context():
         try:
             # Create message object
@@ -0,0 +1,226 @@
+import hashlib
+import threading
+
+# Optional: cl100k_base token counts when tiktoken is installed, otherwise ~4 chars
+# per token. tiktoken is not in requirements.txt and Gemini tokenizes differently
+# anyway, so prompt budgets are estimates either way.
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_encoding = None
+
+
+def count_tokens(text):
+    """Approximate input token count of a prompt"""
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None and _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # The encoding file is downloaded on first use; fall back offline
+            print(f"Error loading tiktoken encoding: {e}")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+class PromptTemplate:
+    """
+    A prompt split into a static prefix (instructions, identical for every
+    call) and a per-call body. The prefix comes first so upstream prefix
+    caching can reuse it, and it is measured once when the template is built.
+    """
+
+    def __init__(self, name, prefix, body="{input}"):
+        """
+        Args:
+            name (str): Registry name
+            prefix (str): Static instructions
+            body (str): str.format template for the per-call part
+        """
+        self.name = name
+        self.prefix = prefix.strip()
+        self.body = body
+        self.prefix_tokens = count_tokens(self.prefix)
+        # Changes whenever the wording does, so cached responses age out with it
+        self.fingerprint = hashlib.sha256(f"{self.prefix}\0{self.body}".encode("utf-8")).hexdigest()[:16]
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.body_tokens = 0
+        self.prefix_tokens_sent = 0
+        self.upstream_prompt_tokens = 0
+        self.upstream_cached_tokens = 0
+        self.upstream_output_tokens = 0
+        self.seconds = 0.0
+
+    def render(self, **values):
+        """Per-call part only, for providers that take the prefix separately"""
+        return self.body.format(**values)
+
+    def full(self, **values):
+        """Prefix and body as one prompt, for providers with a single message"""
+        return f"{self.prefix}\n\n{self.render(**values)}"
+
+    def record(self, body, prefix_sent=True, usage=None, seconds=None):
+        """
+        Count one upstream call
+
+        Args:
+            body (str): Rendered per-call part that was sent
+            prefix_sent (bool): False when the prefix came from a provider-side cache
+            usage: Optional upstream usage object; Gemini's usage_metadata or
+                an OpenAI-style usage with prompt_tokens
+            seconds (float): Optional wall time of the call
+        """
+        prompt_tokens = 0
+        cached_tokens = 0
+        output_tokens = 0
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_token_count", None) or getattr(usage, "prompt_tokens", None) or 0
+            cached_tokens = getattr(usage, "cached_content_token_count", None) or 0
+            output_tokens = getattr(usage, "candidates_token_count", None) or getattr(usage, "completion_tokens", None) or 0
+        with self._lock:
+            self.calls += 1
+            self.body_tokens += count_tokens(body)
+            if prefix_sent:
+                self.prefix_tokens_sent += self.prefix_tokens
+            self.upstream_prompt_tokens += prompt_tokens
+            self.upstream_cached_tokens += cached_tokens
+            self.upstream_output_tokens += output_tokens
+            self.seconds += seconds or 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "fingerprint": self.fingerprint,
+                "prefix_tokens": self.prefix_tokens,
+                "calls": self.calls,
+                "input_tokens": self.prefix_tokens_sent + self.body_tokens,
+                "avg_body_tokens": round(self.body_tokens / self.calls, 1) if self.calls else 0.0,
+                "prefix_tokens_saved": self.calls * self.prefix_tokens - self.prefix_tokens_sent,
+                "upstream_prompt_tokens": self.upstream_prompt_tokens,
+                "upstream_cached_tokens": self.upstream_cached_tokens,
+                # Output tokens drive generation latency; compare templates by these two
+                "avg_output_tokens": round(self.upstream_output_tokens / self.calls, 1) if self.calls else 0.0,
+                "avg_latency_ms": round(self.seconds * 1000 / self.calls, 1) if self.calls else 0.0
+            }
+
+
+PROMPTS = {}
+
+
+def register(template):
+    PROMPTS[template.name] = template
+    return template
+
+
+def get_prompt(name):
+    return PROMPTS[name]
+
+
+def prompt_stats():
+    return {
+        "tokenizer": "tiktoken" if _encoding else "chars/4",
+        "templates": {name: template.stats() for name, template in PROMPTS.items()}
+    }
+
+
+SUGGEST_PROMPT = register(PromptTemplate(
+    "suggest",
+    """
+You are LegalSoft AI, an expert in virtual staffing and organizational design. Analyze the org chart below and recommend improvements, focusing on where LegalSoft virtual staff can replace or augment roles for greater efficiency, productivity, or cost savings.
+
+Instructions:
+- Use knowledge of Legalsoft and the organization structure and scale to suggest replacements or additions of virtual staff where appropriate.
+- For each recommended replacement or new virtual staff member, include a clear, concise justification in natural language explaining why the change improves efficiency, productivity, or cost. Focus on LegalSoft's core strengths in virtual staffing.
+- Return a JSON object with two keys:
+  1. 'modifiedChart': the improved org chart (with 'nodes' and 'edges')
+  2. 'changes': an array of objects, each with these keys: employeeId, action, reason,(in a pydandic dic) describing every replacement or addition and the reason for it.
+- Use the same employeeId for any replaced or added node as in the chart, or a new unique id for new staff.
+- Preserve any image/logo nodes (type: 'image') in the chart and do not remove or alter them unless explicitly instructed.
+- Format your response as a clean JSON object, no extra text or explanation.
+
+The chart is an outline with one node per line, "id|name|role|department", indented under the person it reports to. Image/logo nodes are "id|[image]|title|description". Lines ending in "~ +N hidden reports" stand for whole teams that are not shown; leave them as they are.
+In your response refer to existing nodes by these ids (n1, n2, ...). Nodes only need id, type, name, role and department (title and description for image nodes); positions and image sources are filled in automatically.
+""",
+    """Current org chart:
+{chart_outline}
+"""
+))
+
+GENERATE_PROMPT = register(PromptTemplate(
+    "generate",
+    '''
+You are LegalSoft AI, an expert in organizational design and virtual staffing. You can handle this type of request:
+
+**Org Chart Generation**: Create complete organizational charts from descriptions or images
+
+For **Org Chart Generation**, return a JSON object with this schema:
+{
+"nodes": [
+    {
+    "id": "string", // unique identifier
+    "name": "string", // employee name
+    "role": "string", // job title
+    "department": "string", // department name
+    "position": {"x": number, "y": number} // layout position
+    }
+],
+"edges": [
+    {"source": "string", "target": "string"} // reporting relationships
+]
+}
+
+
+Instructions:
+- Infer missing roles, hierarchy, or structure if the request is vague or incomplete
+- Use logical, realistic org chart structures
+- Assign unique IDs to each node
+- Assign reasonable x/y positions for layout (e.g., root at y=50, children at y=200, etc.)
+- For improvements, focus on LegalSoft's virtual staffing capabilities
+- Return only a valid JSON object matching the appropriate schema, no extra text
+- Do not assign random names when asked to make an org chart, however if there are names on an org chart image that is submitted include those
+- If arrows or hierarchy are extremely ambigious for a position just create the nodes without edges
+''',
+    "User Request: {user_prompt}"
+))
+
+# Same task as GENERATE_PROMPT, answered as one short line per person instead
+# of JSON; ids, edges and positions are filled in by chartcodec.ChartLineStream
+GENERATE_LINES_PROMPT = register(PromptTemplate(
+    "generate_lines",
+    '''
+You are LegalSoft AI, an expert in organizational design and virtual staffing. You create complete organizational charts from descriptions or images.
+
+Write the chart as one line per person, with the fields separated by "|":
+id|name|role|department|manager id
+
+- id: a short unique id (1, 2, 3, ...)
+- name: the person's name, or empty when unknown
+- role: job title
+- department: department name
+- manager id: id of the person they report to; empty for the top of the chart. Separate several managers with ";"
+- List every manager before the people who report to them
+- Finish with a line containing only END
+
+Example:
+1||Managing Partner|Executive|
+2||Office Manager|Operations|1
+3|Jane Doe|Paralegal|Litigation|1
+END
+
+Instructions:
+- Infer missing roles, hierarchy, or structure if the request is vague or incomplete
+- Use logical, realistic org chart structures
+- For improvements, focus on LegalSoft's virtual staffing capabilities
+- Return only the lines, no JSON, no header, no extra text
+- Do not assign random names when asked to make an org chart, however if there are names on an org chart image that is submitted include those
+- If arrows or hierarchy are extremely ambigious for a position leave its manager id empty
+''',
+    "User Request: {user_prompt}"
+))
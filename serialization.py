@@ -0,0 +1,206 @@
+import json
+import textwrap
+from fastapi.responses import JSONResponse
+
+# Optional: several times faster than the json module for large charts
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Serialized output is buffered into chunks of about this many bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _default(obj):
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, indent=None):
+    """
+    Encode to UTF-8 JSON bytes, compact or pretty-printed
+
+    Args:
+        obj: JSON-compatible value; Pydantic models are allowed anywhere in it
+        indent (int): Pretty-print indentation, or None for compact output
+    """
+    if orjson is not None and indent in (None, 2):
+        # orjson only pretty-prints with two spaces; other widths use json
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    return _dumps(obj, indent).encode("utf-8")
+
+
+def _dumps(obj, indent=None):
+    if orjson is not None and indent in (None, 2):
+        return dumps_bytes(obj, indent).decode("utf-8")
+    if indent:
+        return json.dumps(obj, indent=indent, ensure_ascii=False, default=_default)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Compact JSON response encoded with orjson when available
+
+    A Pydantic model passed as content is serialized by pydantic-core
+    directly. Endpoints that return one skip FastAPI's response_model
+    re-validation and jsonable_encoder pass.
+    """
+
+    def render(self, content):
+        if hasattr(content, "model_dump_json"):
+            return content.model_dump_json().encode("utf-8")
+        return dumps_bytes(content)
+
+
+def _as_dict(obj):
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return obj
+
+
+def _chunked(pieces, chunk_size=STREAM_CHUNK_SIZE):
+    """Join small string pieces into ~chunk_size byte chunks"""
+    buffer, size = [], 0
+    for piece in pieces:
+        data = piece.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _iter_object(obj, list_keys, indent=None):
+    """
+    Serialize a dict whose list_keys hold large lists, one list item at a
+    time, so the full JSON string never exists in memory. The output is
+    the same JSON as a single dumps of the whole object.
+    """
+    keys = list(obj.keys())
+    if not keys:
+        yield "{}"
+        return
+    pad = " " * indent if indent else ""
+    newline = "\n" if indent else ""
+    item_sep = "," + newline
+    yield "{" + newline
+    for position, key in enumerate(keys):
+        value = obj[key]
+        yield pad + json.dumps(key) + (": " if indent else ":")
+        if key in list_keys and isinstance(value, (list, tuple)) and value:
+            yield "[" + newline
+            for index, item in enumerate(value):
+                if not indent and hasattr(item, "model_dump_json"):
+                    # pydantic-core writes compact JSON without building a dict
+                    text = item.model_dump_json()
+                else:
+                    text = _dumps(_as_dict(item), indent)
+                if indent:
+                    text = textwrap.indent(text, pad * 2)
+                yield text + (item_sep if index < len(value) - 1 else newline)
+            yield pad + "]" if indent else "]"
+        else:
+            text = _dumps(_as_dict(value), indent)
+            if indent:
+                # Nested lines need the object's own indentation
+                text = text.replace("\n", "\n" + pad)
+            yield text
+        yield item_sep if position < len(keys) - 1 else newline
+    yield "}"
+
+
+def iter_json(obj, list_keys=(), indent=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Incrementally encode a dict (or Pydantic model) as JSON bytes chunks
+
+    Args:
+        obj: dict or model to serialize
+        list_keys (tuple): Top-level keys whose lists are streamed item by item
+        indent (int): Pretty-print indentation, or None for compact output
+    Yields:
+        bytes: Encoded chunks
+    """
+    if hasattr(obj, "model_dump"):
+        # Keep list items as models so each one is dumped only when reached
+        obj = {name: getattr(obj, name) for name in obj.model_fields}
+    yield from _chunked(_iter_object(obj, set(list_keys), indent), chunk_size)
+
+
+def iter_chart_json(chart, indent=2, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream a chart's JSON, serializing nodes and edges one at a time"""
+    yield from iter_json(chart, ("nodes", "edges"), indent, chunk_size)
+
+
+def iter_ndjson(header, items, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Newline-delimited JSON: one header line, then one line per item
+
+    Args:
+        header (dict): First line (e.g. everything except the large list)
+        items (iterable): Items to emit, one per line, as they are produced
+    """
+    def lines():
+        if header is not None:
+            yield _dumps(_as_dict(header)) + "\n"
+        for item in items:
+            yield _dumps(_as_dict(item)) + "\n"
+    yield from _chunked(lines(), chunk_size)
+
+
+if __name__ == "__main__":
+    # Requests/sec for chart responses: FastAPI's default path vs FastJSONResponse,
+    # and /api/save-style streaming, pretty vs compact
+    import sys
+    import time
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from models import ChartData, parse_chart
+
+    app = FastAPI()
+    state = {}
+
+    @app.get("/default", response_model=ChartData)
+    def default_path():
+        return state["chart"]
+
+    @app.get("/fast", response_model=ChartData)
+    def fast_path():
+        return FastJSONResponse(state["chart"])
+
+    @app.get("/save")
+    def save(pretty: bool = True):
+        from fastapi.responses import StreamingResponse
+        return StreamingResponse(iter_chart_json(state["chart"], indent=2 if pretty else None))
+
+    def legacy_save():
+        return json.dumps(state["chart"].model_dump(), indent=2)
+
+    client = TestClient(app)
+    print(f"orjson: {'yes' if orjson else 'no'}")
+    for count in [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]:
+        state["chart"] = parse_chart({
+            "nodes": [{"id": str(i), "name": f"Person {i}", "role": "Associate", "department": "Litigation",
+                       "position": {"x": i % 50 * 180, "y": i // 50 * 150}} for i in range(count)],
+            "edges": [{"source": str((i - 1) // 4), "target": str(i)} for i in range(1, count)]
+        })
+        runs = max(3, 20000 // count)
+        cases = (
+            ("response_model + JSONResponse", lambda: client.get("/default").content),
+            ("FastJSONResponse(model)", lambda: client.get("/fast").content),
+            ("save: json.dumps(indent=2)", legacy_save),
+            ("save: streamed, pretty", lambda: client.get("/save").content),
+            ("save: streamed, compact", lambda: client.get("/save?pretty=false").content)
+        )
+        for label, call in cases:
+            size = len(call())
+            start = time.perf_counter()
+            for _ in range(runs):
+                call()
+            seconds = (time.perf_counter() - start) / runs
+            print(f"{count:>7} nodes  {label:<30} {1 / seconds:8.1f} req/s  {size / 1e6:7.2f} MB")
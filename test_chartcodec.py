@@ -0,0 +1,131 @@
+from chartcodec import ChartCodec, ChartLineStream, expand_chart_lines
+from jsonstream import extract_json
+
+
+def test_markdown_table_response():
+    text = "\n".join([
+        "| id | name | role | department | manager id |",
+        "|---|---|:---:|---|---|",
+        "| 1 | Ada Park | Managing Partner | Leadership | |",
+        "| 2 | Ben Cho | Associate | Litigation | 1 |",
+        "END"
+    ])
+    chart, complete = expand_chart_lines(text)
+    assert complete
+    assert [node["id"] for node in chart["nodes"]] == ["1", "2"]
+    assert chart["edges"] == [{"source": "1", "target": "2"}]
+
+
+def test_separator_row_streamed_in_chunks():
+    stream = ChartLineStream()
+    events = stream.feed("id|name|role|department|manager id\n---|")
+    events += stream.feed("---|---|---|---\n1|Ada Park|Partner|Leadership|\n")
+    events += stream.close()
+    assert events == [("node", stream.nodes["1"])]
+
+
+def _chart(count):
+    nodes = [{"id": str(i), "name": f"Person {i}", "role": "Associate", "position": {"x": i, "y": 0}} for i in range(count)]
+    edges = [{"source": str((i - 1) // 3), "target": str(i)} for i in range(1, count)]
+    return {"nodes": nodes, "edges": edges}
+
+
+def test_truncated_suggestion_is_laid_over_the_original():
+    chart = _chart(11)
+    codec = ChartCodec(chart)
+    reply = ('{"modifiedChart": {"nodes": [{"id": "n1", "name": "Person 0"}, {"id": "n2", "name": "Renamed"}, '
+             '{"id": "n3", "name": "Person 2"}, {"id": "n4", "na')
+    value, outcome = extract_json(reply, {("modifiedChart", "nodes"): "node"})
+    assert outcome == "repaired"
+    decoded = codec.decode_chart(value["modifiedChart"], partial=True)
+    assert [node["id"] for node in decoded["nodes"]] == [str(i) for i in range(11)]
+    assert decoded["nodes"][1]["name"] == "Renamed"
+    assert decoded["nodes"][1]["position"] == {"x": 1, "y": 0}
+    assert decoded["edges"] == chart["edges"]
+
+
+def test_truncated_suggestion_keeps_its_rewiring():
+    chart = _chart(11)
+    codec = ChartCodec(chart)
+    # n5 is node "4", moved from manager "1" to "2"; the reply stops in the edges
+    reply = ('{"modifiedChart": {"nodes": [], "edges": [{"source": "n3", "target": "n5"}, {"source": "n1", "tar')
+    value, _ = extract_json(reply, {("modifiedChart", "edges"): "edge"})
+    decoded = codec.decode_chart(value["modifiedChart"], partial=True)
+    pairs = {(e["source"], e["target"]) for e in decoded["edges"]}
+    assert ("2", "4") in pairs and ("1", "4") not in pairs
+    assert len(decoded["nodes"]) == 11 and len(pairs) == 10
+
+
+def test_complete_suggestion_replaces_the_chart():
+    codec = ChartCodec(_chart(4))
+    decoded = codec.decode_chart({"nodes": [{"id": "n1"}, {"id": "n2"}], "edges": [{"source": "n1", "target": "n2"}]})
+    assert [node["id"] for node in decoded["nodes"]] == ["0", "1"]
+    assert decoded["edges"] == [{"source": "0", "target": "1"}]
+
+
+def _org(managers, reports):
+    # One root, `managers` managers under it, `reports` reports under each manager
+    nodes = [{"id": "root", "name": "Root", "role": "CEO", "position": {"x": 0, "y": 0}, "color": "gold"}]
+    edges = []
+    for m in range(managers):
+        nodes.append({"id": f"m{m}", "name": f"Manager {m}", "role": "Partner", "position": {"x": m, "y": 1}})
+        edges.append({"source": "root", "target": f"m{m}"})
+        for r in range(reports):
+            nodes.append({"id": f"m{m}r{r}", "name": f"Report {m}.{r}", "role": "Associate", "position": {"x": r, "y": 2}})
+            edges.append({"source": f"m{m}", "target": f"m{m}r{r}"})
+    nodes.append({"id": "logo", "type": "image", "src": "/uploads/logo.png", "title": "Firm", "position": {"x": 9, "y": 9}})
+    return {"nodes": nodes, "edges": edges}
+
+
+def _short_chart(codec, chart):
+    # What a model echoing the encoded chart unchanged would send back
+    return {
+        "nodes": [{"id": codec.short[node["id"]], "name": node.get("name")} for node in chart["nodes"]],
+        "edges": [{"source": codec.short[e["source"]], "target": codec.short[e["target"]]} for e in chart["edges"]]
+    }
+
+
+def test_round_trip_restores_ids_positions_and_extra_fields():
+    chart = _org(2, 2)
+    codec = ChartCodec(chart)
+    assert not codec.hidden
+    assert "/uploads/logo.png" not in codec.text and "position" not in codec.text
+    decoded = codec.decode_chart(_short_chart(codec, chart))
+    assert decoded["nodes"] == chart["nodes"]
+    assert decoded["edges"] == chart["edges"]
+
+
+def test_new_node_keeps_its_id_and_goes_under_its_manager():
+    chart = _org(1, 0)
+    codec = ChartCodec(chart)
+    reply = _short_chart(codec, chart)
+    reply["nodes"].append({"id": "m0", "name": "Clashing id"})
+    reply["edges"].append({"source": codec.short["m0"], "target": "m0"})
+    decoded = codec.decode_chart(reply)
+    new = decoded["nodes"][-1]
+    assert new["id"] == "m0-new" and new["name"] == "Clashing id"
+    assert new["position"] == {"x": 0 + 0 * 180, "y": 1 + 150}
+
+
+def test_over_budget_chart_folds_deepest_level():
+    chart = _org(4, 10)
+    full = ChartCodec(chart, budget=0)
+    codec = ChartCodec(chart, budget=full.tokens // 2)
+    assert codec.tokens <= codec.budget
+    assert codec.hidden == {f"m{m}r{r}" for m in range(4) for r in range(10)}
+    assert "~ +10 hidden reports: Associate x10" in codec.text
+    # A reply that only mentions the visible nodes keeps the folded ones
+    visible = {"nodes": [n for n in chart["nodes"] if n["id"] not in codec.hidden],
+               "edges": [e for e in chart["edges"] if e["target"] not in codec.hidden]}
+    decoded = codec.decode_chart(_short_chart(codec, visible))
+    assert sorted(n["id"] for n in decoded["nodes"]) == sorted(n["id"] for n in chart["nodes"])
+    assert sorted(map(tuple, (e.values() for e in decoded["edges"]))) == \
+        sorted(map(tuple, (e.values() for e in chart["edges"])))
+
+
+def test_tiny_budget_cuts_the_tail_but_keeps_the_root():
+    chart = _org(4, 10)
+    codec = ChartCodec(chart, budget=20)
+    assert codec.text.splitlines()[1].startswith("n1|Root|CEO ~ +44 hidden reports")
+    assert codec.text.endswith("~ 1 more nodes not shown")
+    assert codec.hidden == {node["id"] for node in chart["nodes"]} - {"root"}
@@ -0,0 +1,96 @@
+from chartdiff import describe_changes, diff_charts, merge_changes
+from models import ChangeData, ChartData
+
+
+def _chart():
+    # ana -> ben, ana -> cy
+    return {
+        "nodes": [
+            {"id": "ana", "name": "Ana", "role": "Partner", "position": {"x": 0, "y": 0}},
+            {"id": "ben", "name": "Ben", "role": "Associate", "position": {"x": 0, "y": 150}},
+            {"id": "cy", "name": "Cy", "role": "Associate", "position": {"x": 180, "y": 150}}
+        ],
+        "edges": [{"source": "ana", "target": "ben"}, {"source": "ana", "target": "cy"}]
+    }
+
+
+def test_identical_and_moved_charts_have_no_changes():
+    moved = _chart()
+    moved["nodes"][1]["position"] = {"x": 500, "y": 500}
+    diff = diff_charts(_chart(), moved)
+    assert not any(diff["summary"].values())
+    assert diff_charts(_chart(), moved, ignore_positions=False)["summary"]["nodes_modified"] == 1
+
+
+def test_rename():
+    modified = _chart()
+    modified["nodes"][1]["name"] = "Benjamin"
+    diff = diff_charts(_chart(), modified)
+    assert diff["modified"] == [{"id": "ben", "changes": {"name": {"old": "Ben", "new": "Benjamin"}}}]
+    assert describe_changes(diff) == [
+        {"employeeId": "ben", "action": "modify", "reason": "Name changed from 'Ben' to 'Benjamin'."}
+    ]
+
+
+def test_reparent():
+    modified = _chart()
+    modified["edges"][1] = {"source": "ben", "target": "cy"}
+    diff = diff_charts(_chart(), modified)
+    assert diff["reparented"] == [{"id": "cy", "from": ["ana"], "to": ["ben"]}]
+    assert diff["edges"] == {"added": [{"source": "ben", "target": "cy"}], "removed": [{"source": "ana", "target": "cy"}]}
+    assert describe_changes(diff, _chart(), modified) == [
+        {"employeeId": "cy", "action": "reparent", "reason": "Now reports to Ben instead of Ana."}
+    ]
+
+
+def test_add_and_remove():
+    modified = _chart()
+    modified["nodes"] = modified["nodes"][:2] + [
+        {"id": "dee", "role": "Paralegal", "department": "Litigation", "position": {"x": 0, "y": 300}}
+    ]
+    modified["edges"] = [{"source": "ana", "target": "ben"}, {"source": "ben", "target": "dee"}]
+    diff = diff_charts(_chart(), modified)
+    assert [item["id"] for item in diff["added"]] == ["dee"]
+    assert diff["added"][0]["managers"] == ["ben"]
+    assert [item["id"] for item in diff["removed"]] == ["cy"]
+    assert diff["summary"]["edges_added"] == diff["summary"]["edges_removed"] == 1
+    assert describe_changes(diff, _chart(), modified) == [
+        {"employeeId": "dee", "action": "add", "reason": "Added Paralegal in Litigation, reporting to Ben."},
+        {"employeeId": "cy", "action": "remove", "reason": "Removed Cy."}
+    ]
+
+
+def test_modified_and_reparented_node_gets_one_record():
+    modified = _chart()
+    modified["nodes"][2]["role"] = "Senior Associate"
+    modified["edges"][1] = {"source": "ben", "target": "cy"}
+    records = describe_changes(diff_charts(_chart(), modified), _chart(), modified)
+    assert records == [{
+        "employeeId": "cy", "action": "modify",
+        "reason": "Role changed from 'Associate' to 'Senior Associate'. Now reports to Ben instead of Ana."
+    }]
+
+
+def test_models_are_accepted():
+    modified = ChartData.model_validate(_chart())
+    modified.nodes[0].name = "Ana Lee"
+    diff = diff_charts(ChartData.model_validate(_chart()), modified)
+    assert diff["modified"] == [{"id": "ana", "changes": {"name": {"old": "Ana", "new": "Ana Lee"}}}]
+
+
+def test_merge_uses_model_reasons_and_drops_unreal_changes():
+    computed = [
+        {"employeeId": "ben", "action": "modify", "reason": "Name changed."},
+        {"employeeId": "cy", "action": "reparent", "reason": "Now reports to Ben instead of Ana."}
+    ]
+    claimed = [
+        ChangeData(employeeId="cy", action="reparent", reason="Ben mentors the associates."),
+        {"employeeId": "ana", "action": "remove", "reason": "Retired."},
+        {"employeeId": "ben", "action": "modify", "reason": ""}
+    ]
+    merged, dropped = merge_changes(computed, claimed)
+    assert merged == [
+        {"employeeId": "ben", "action": "modify", "reason": "Name changed."},
+        {"employeeId": "cy", "action": "reparent", "reason": "Ben mentors the associates."}
+    ]
+    assert dropped == 1
@@ -0,0 +1,104 @@
+from chartgraph import ChartGraph, repair_chart, validate_chart
+from models import ChartData
+
+
+def _node(node_id, **fields):
+    return {"id": node_id, "position": {"x": 0, "y": 0}, **fields}
+
+
+def _edge(source, target):
+    return {"source": source, "target": target}
+
+
+def _tree():
+    # a -> b -> c, a -> d
+    return {"nodes": [_node("a"), _node("b"), _node("c"), _node("d")],
+            "edges": [_edge("a", "b"), _edge("b", "c"), _edge("a", "d")]}
+
+
+def test_clean_chart_is_valid():
+    report = validate_chart(_tree())
+    assert report == {"valid": True, "nodes": 4, "edges": 3, "issues": {}}
+    assert repair_chart(_tree()) == (_tree(), [])
+
+
+def test_cycle_reported_once_and_broken_by_repair():
+    chart = _tree()
+    chart["edges"].append(_edge("c", "a"))
+    report = validate_chart(chart)
+    assert not report["valid"]
+    assert report["issues"]["cycles"] == {"count": 1, "examples": [_edge("c", "a")]}
+    repaired, actions = repair_chart(chart)
+    assert repaired["edges"] == _tree()["edges"]
+    assert actions == ["removed cycle-closing edge c -> a"]
+    assert ChartGraph(repaired).valid
+
+
+def test_cycle_without_a_root_is_found():
+    chart = {"nodes": [_node("x"), _node("y"), _node("z")],
+             "edges": [_edge("x", "y"), _edge("y", "z"), _edge("z", "x")]}
+    assert validate_chart(chart)["issues"]["cycles"]["count"] == 1
+    assert ChartGraph(repair_chart(chart)[0]).valid
+
+
+def test_dangling_edges_name_the_missing_end():
+    chart = _tree()
+    chart["edges"] += [_edge("ghost", "c"), _edge("a", "nobody")]
+    issues = validate_chart(chart)["issues"]
+    assert issues["dangling_edges"]["examples"] == [
+        {"source": "ghost", "target": "c", "missing": ["source"]},
+        {"source": "a", "target": "nobody", "missing": ["target"]}
+    ]
+    repaired, actions = repair_chart(chart)
+    assert repaired["edges"] == _tree()["edges"]
+    assert actions == ["removed dangling edge ghost -> c", "removed dangling edge a -> nobody"]
+
+
+def test_duplicate_ids_renamed_and_first_node_keeps_its_edges():
+    chart = _tree()
+    chart["nodes"] += [_node("b", name="Second b"), _node("b-2"), _node("b", name="Third b")]
+    report = validate_chart(chart)
+    assert report["issues"]["duplicate_ids"] == {"count": 2, "examples": ["b", "b"]}
+    repaired, actions = repair_chart(chart)
+    ids = [node["id"] for node in repaired["nodes"]]
+    assert ids == ["a", "b", "c", "d", "b-3", "b-2", "b-4"]
+    assert repaired["nodes"][4]["name"] == "Second b"
+    assert repaired["edges"] == chart["edges"]
+    assert actions == ["renamed duplicate node id b to b-3", "renamed duplicate node id b to b-4"]
+
+
+def test_self_loops_and_repeated_edges_dropped():
+    chart = _tree()
+    chart["edges"] += [_edge("d", "d"), _edge("a", "b")]
+    issues = validate_chart(chart)["issues"]
+    assert issues["self_loops"]["count"] == 1
+    assert issues["duplicate_edges"]["count"] == 1
+    repaired, actions = repair_chart(chart)
+    assert repaired["edges"] == _tree()["edges"]
+    assert actions == ["removed self-referencing edge d -> d", "removed duplicate edge a -> b"]
+
+
+def test_warnings_do_not_invalidate():
+    chart = _tree()
+    chart["nodes"] += [_node("lonely"), _node("logo", type="image"), _node("root2")]
+    chart["edges"] += [_edge("root2", "c")]
+    report = validate_chart(chart)
+    assert report["valid"]
+    assert report["issues"]["orphans"]["examples"] == ["lonely"]
+    assert report["issues"]["multiple_roots"]["examples"] == ["a", "root2"]
+    assert report["issues"]["multiple_managers"]["examples"] == ["c"]
+
+
+def test_examples_capped_but_counts_exact():
+    chart = {"nodes": [_node("a")], "edges": [_edge("a", f"x{i}") for i in range(5)]}
+    issue = ChartGraph(chart).report(examples=2)["issues"]["dangling_edges"]
+    assert issue["count"] == 5
+    assert len(issue["examples"]) == 2
+
+
+def test_repair_keeps_models():
+    chart = ChartData.model_validate({**_tree(), "nodes": _tree()["nodes"] + [_node("a")]})
+    repaired, _ = repair_chart(chart)
+    assert [node.id for node in repaired["nodes"]] == ["a", "b", "c", "d", "a-2"]
+    assert repaired["nodes"][0] is chart.nodes[0]
+    assert chart.nodes[4].id == "a"
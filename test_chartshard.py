@@ -0,0 +1,118 @@
+from chartshard import merge_suggestions, shard_chart
+
+
+def _chart():
+    # ceo -> m0..m2, each manager with three reports e<m><k>
+    nodes = [{"id": "ceo", "position": {"x": 0, "y": 0}}]
+    edges = []
+    for m in range(3):
+        nodes.append({"id": f"m{m}", "position": {"x": 0, "y": 0}})
+        edges.append({"source": "ceo", "target": f"m{m}"})
+        for k in range(3):
+            nodes.append({"id": f"e{m}{k}", "position": {"x": 0, "y": 0}})
+            edges.append({"source": f"m{m}", "target": f"e{m}{k}"})
+    return {"nodes": nodes, "edges": edges}
+
+
+def _echo(shard):
+    return {"nodes": list(shard.chart["nodes"]), "edges": list(shard.chart["edges"]), "changes": []}
+
+
+def _pairs(merged):
+    return {(edge["source"], edge["target"]) for edge in merged["edges"]}
+
+
+def _original_pairs(chart):
+    return {(edge["source"], edge["target"]) for edge in chart["edges"]}
+
+
+def test_shards_cover_every_node_once():
+    chart = _chart()
+    shards = shard_chart(chart, max_nodes=5)
+    owned = [node_id for shard in shards for node_id in shard.owned]
+    assert sorted(owned) == sorted(node["id"] for node in chart["nodes"])
+    assert all(len(shard.owned) <= 5 for shard in shards)
+
+
+def test_unchanged_results_merge_back_to_the_original():
+    chart = _chart()
+    shards = shard_chart(chart, max_nodes=5)
+    merged = merge_suggestions(chart, shards, [_echo(shard) for shard in shards])
+    assert _pairs(merged) == _original_pairs(chart)
+    assert len(merged["nodes"]) == len(chart["nodes"])
+    assert merged["conflicts"] == 0
+
+
+def test_cross_shard_edge_removed_by_its_owner_stays_removed():
+    chart = _chart()
+    shards = shard_chart(chart, max_nodes=5)
+    results = [_echo(shard) for shard in shards]
+    owner = next(k for k, shard in enumerate(shards) if "m0" in shard.owned)
+    results[owner]["edges"] = [e for e in results[owner]["edges"] if e != {"source": "ceo", "target": "m0"}]
+    results[owner]["edges"].append({"source": "e01", "target": "m0"})
+    merged = merge_suggestions(chart, shards, results)
+    assert ("ceo", "m0") not in _pairs(merged)
+    assert ("e01", "m0") in _pairs(merged)
+
+
+def test_failed_shard_keeps_its_original_nodes_and_edges():
+    chart = _chart()
+    shards = shard_chart(chart, max_nodes=5)
+    results = [_echo(shard) for shard in shards]
+    owner = next(k for k, shard in enumerate(shards) if "m0" in shard.owned)
+    results[owner] = None
+    merged = merge_suggestions(chart, shards, results)
+    assert _pairs(merged) == _original_pairs(chart)
+    assert len(merged["nodes"]) == len(chart["nodes"])
+
+
+def test_unseen_second_manager_is_kept():
+    chart = _chart()
+    chart["edges"].append({"source": "e10", "target": "e00"})
+    shards = shard_chart(chart, max_nodes=5)
+    merged = merge_suggestions(chart, shards, [_echo(shard) for shard in shards])
+    assert ("e10", "e00") in _pairs(merged)
+    assert merged["conflicts"] == 0
+
+
+def test_new_node_reusing_another_shards_id_is_renamed():
+    chart = _chart()
+    shards = shard_chart(chart, max_nodes=5)
+    results = [_echo(shard) for shard in shards]
+    k = next(k for k, shard in enumerate(shards) if "m0" in shard.owned)
+    # "e10" belongs to another shard; to this one it is a new hire under m0
+    results[k]["nodes"].append({"id": "e10", "name": "New hire", "position": {"x": 0, "y": 0}})
+    results[k]["edges"].append({"source": "m0", "target": "e10"})
+    results[k]["changes"].append({"employeeId": "e10", "action": "add", "reason": "Hire"})
+    merged = merge_suggestions(chart, shards, results)
+    new_id = f"e10-s{k}"
+    assert {node["id"]: node for node in merged["nodes"]}[new_id]["name"] == "New hire"
+    assert ("m0", new_id) in _pairs(merged)
+    assert ("m1", "e10") in _pairs(merged)
+    assert merged["changes"] == [{"employeeId": new_id, "action": "add", "reason": "Hire"}]
+    assert merged["conflicts"] == 0
+
+
+def test_new_ids_from_two_shards_stay_unique():
+    chart = _chart()
+    shards = shard_chart(chart, max_nodes=5)
+    results = [_echo(shard) for shard in shards]
+    for k, shard in enumerate(shards):
+        if shard.anchor is not None:
+            manager = min(m for m in shard.owned if m.startswith("m"))
+            results[k]["nodes"].append({"id": "x", "position": {"x": 0, "y": 0}})
+            results[k]["edges"].append({"source": manager, "target": "x"})
+    merged = merge_suggestions(chart, shards, results)
+    ids = [node["id"] for node in merged["nodes"]]
+    assert len(ids) == len(set(ids)) == len(chart["nodes"]) + 3
+
+
+def test_edge_to_a_node_the_shard_never_saw_is_a_conflict():
+    chart = _chart()
+    shards = shard_chart(chart, max_nodes=5)
+    results = [_echo(shard) for shard in shards]
+    k = next(k for k, shard in enumerate(shards) if "m0" in shard.owned)
+    results[k]["edges"].append({"source": "m1", "target": "e00"})
+    merged = merge_suggestions(chart, shards, results)
+    assert merged["conflicts"] == 1
+    assert ("m1", "e00") not in _pairs(merged)
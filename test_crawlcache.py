@@ -0,0 +1,56 @@
+import pytest
+
+from crawlcache import CrawlCache, normalize_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://Example.COM/About/", "https://example.com/About"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com:443/a#team", "https://example.com/a"),
+    ("http://example.com:8080/a", "http://example.com:8080/a"),
+    ("https://example.com/a?b=2&utm_source=x&a=1&gclid=y", "https://example.com/a?a=1&b=2"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CrawlCache(str(tmp_path / "cache.sqlite3"), max_age={"news": 3600, "core": 3600, "other": 3600})
+
+
+def test_store_and_split_round_trip(cache):
+    page = {"title": "About", "url": "https://example.com/about-us", "markdown": "We are a firm."}
+    # Requested URL redirected to about-us; the next crawl asks for the requested one again
+    assert cache.store([page], source_urls=["https://example.com/about/?utm_source=x"]) == 1
+    cached, stale = cache.split(["https://EXAMPLE.com/about", "https://example.com/careers"])
+    assert cached == [{"title": "About", "url": "https://example.com/about-us", "markdown": "We are a firm."}]
+    assert stale == ["https://example.com/careers"]
+    assert cache.stats() == {"enabled": True, "pages": 1, "hits": 1, "misses": 1}
+
+
+def test_store_counts_only_changed_pages(cache):
+    page = {"title": "Team", "url": "https://example.com/team", "markdown": "A, B"}
+    assert cache.store([page]) == 1
+    assert cache.store([page]) == 0
+    assert cache.store([{**page, "markdown": "A, B, C"}]) == 1
+    assert cache.split(["https://example.com/team"])[0][0]["markdown"] == "A, B, C"
+
+
+def test_freshness_depends_on_the_page_category(tmp_path):
+    cache = CrawlCache(str(tmp_path / "cache.sqlite3"), max_age={"news": 0, "core": 3600, "other": 3600})
+    urls = ["https://example.com/blog/post", "https://example.com/about"]
+    cache.store([{"title": None, "url": url, "markdown": ""} for url in urls])
+    cached, stale = cache.split(urls)
+    assert [page["url"] for page in cached] == ["https://example.com/about"]
+    assert stale == ["https://example.com/blog/post"]
+    assert cache.is_fresh("https://example.com/about", 0, now=3599)
+    assert not cache.is_fresh("https://example.com/about", 0, now=3600)
+
+
+def test_disabled_cache_scrapes_everything():
+    cache = CrawlCache("")
+    assert not cache.enabled
+    assert cache.split(["https://example.com/a"]) == ([], ["https://example.com/a"])
+    assert cache.store([{"url": "https://example.com/a"}]) == 0
+    assert cache.stats()["pages"] == 0
@@ -0,0 +1,84 @@
+import pytest
+
+from jsonstream import JsonItemStream, JsonParseError, _strip_trailing_commas, extract_json
+
+PATHS = {("modifiedChart", "nodes"): "node", ("modifiedChart", "edges"): "edge", ("changes",): "change"}
+
+
+def test_clean_object():
+    assert extract_json('{"a": 1}') == ({"a": 1}, "clean")
+
+
+def test_fenced_block_preferred_over_prose_braces():
+    text = 'Here is {the chart}:\n```json\n{"a": [1, 2]}\n```\nDone {really}.'
+    assert extract_json(text) == ({"a": [1, 2]}, "fenced")
+
+
+def test_prose_with_stray_braces_before_object():
+    assert extract_json('prefix { not json } then {"ok": true}') == ({"ok": True}, "clean")
+    assert extract_json('a {b} c {d: 1} e {"x": {"y": null}} f') == ({"x": {"y": None}}, "clean")
+
+
+def test_trailing_commas():
+    value, outcome = extract_json('{"a": [1, 2, ], "b": {"c": "x,]",},}')
+    assert outcome == "clean"
+    assert value == {"a": [1, 2], "b": {"c": "x,]"}}
+
+
+def test_strip_trailing_commas_leaves_strings_alone():
+    assert _strip_trailing_commas('["a,]", "b,}",\n ]') == '["a,]", "b,}"\n ]'
+    assert _strip_trailing_commas('{"a": 1}') == '{"a": 1}'
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "done", "b": "cut sho', {"a": "done"}),
+    ('{"a": 1, "b": 23', {"a": 1}),
+    ('{"a": 1, "b": 23,', {"a": 1, "b": 23}),
+    ('{"a": true, "b": fal', {"a": True}),
+    ('{"a": null, "b": [1, 2, 3', {"a": None, "b": [1, 2]}),
+    ('{"a": {"b": {"c": 1}, "d": {"e"', {"a": {"b": {"c": 1}, "d": {}}}),
+    ('{"a": [{"id": "1"}, {"id": "2"}, {"id"', {"a": [{"id": "1"}, {"id": "2"}, {}]}),
+    ('{"a": [], "b"', {"a": []}),
+])
+def test_truncation_repaired_at_last_complete_value(text, expected):
+    assert extract_json(text) == (expected, "repaired")
+
+
+def test_truncated_reply_keeps_complete_nodes():
+    text = 'Sure!\n{"modifiedChart": {"nodes": [{"id": "n1", "name": "A"}, {"id": "n2", "na'
+    value, outcome = extract_json(text, PATHS)
+    assert outcome == "repaired"
+    assert value["modifiedChart"]["nodes"][0] == {"id": "n1", "name": "A"}
+
+
+def test_salvage_from_complete_items():
+    stream = JsonItemStream(PATHS)
+    stream.feed('{"modifiedChart": {"nodes": [{"id": "n1"}, {"id": "n2"}], "edges": [{"source": "n1", "target": "n2"}')
+    assert stream.salvage() == {
+        "modifiedChart": {"nodes": [{"id": "n1"}, {"id": "n2"}], "edges": [{"source": "n1", "target": "n2"}]},
+        "changes": []
+    }
+    assert JsonItemStream(PATHS).salvage() is None
+
+
+def test_feed_emits_items_as_they_complete():
+    stream = JsonItemStream(PATHS)
+    text = 'ok {"modifiedChart": {"nodes": [{"id": "n1", "tags": {"a": "}"}}, {"id": "n2",}], "edges": []}, ' \
+           '"changes": [{"employeeId": "n2", "action": "add", "reason": "x"}]} trailing'
+    events = []
+    for i in range(0, len(text), 3):
+        events.extend(stream.feed(text[i:i + 3]))
+    assert events == [
+        ("node", {"id": "n1", "tags": {"a": "}"}}),
+        ("node", {"id": "n2"}),
+        ("change", {"employeeId": "n2", "action": "add", "reason": "x"})
+    ]
+    assert stream.done
+    assert stream.text().endswith('"reason": "x"}]}')
+
+
+def test_nothing_usable():
+    with pytest.raises(JsonParseError):
+        extract_json("no json { here } at all")
+    with pytest.raises(JsonParseError):
+        extract_json("")
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+import layout
+from layout import LAYOUT_IMAGE_WIDTH, LAYOUT_LEVEL_HEIGHT, LAYOUT_NODE_WIDTH, LAYOUT_SIBLING_GAP, compute_layout
+
+
+def _random_chart(count, seed):
+    rng = random.Random(seed)
+    nodes = [{"id": str(i), "position": {"x": 0, "y": 0}} for i in range(count)]
+    edges = [{"source": str(rng.randrange(0, i)), "target": str(i)} for i in range(1, count)]
+    return {"nodes": nodes, "edges": edges}
+
+
+def _assert_no_overlaps(chart, positions):
+    widths = {node["id"]: LAYOUT_IMAGE_WIDTH if node.get("type") == "image" else LAYOUT_NODE_WIDTH
+              for node in chart["nodes"]}
+    rows = {}
+    for node_id, position in positions.items():
+        rows.setdefault(position["y"], []).append((position["x"], node_id))
+    for row in rows.values():
+        row.sort()
+        for (left_x, left), (right_x, right) in zip(row, row[1:]):
+            assert right_x - (left_x + widths[left]) >= LAYOUT_SIBLING_GAP - 1e-6, (left, right)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_trees_do_not_overlap(seed):
+    chart = _random_chart(300, seed)
+    positions = compute_layout(chart)
+    assert len(positions) == 300
+    _assert_no_overlaps(chart, positions)
+
+
+def test_manager_centred_over_reports_and_levels_spaced():
+    chart = {
+        "nodes": [{"id": i, "position": {"x": 0, "y": 0}} for i in ("boss", "a", "b", "c")],
+        "edges": [{"source": "boss", "target": i} for i in ("a", "b", "c")]
+    }
+    positions = compute_layout(chart)
+    assert positions["boss"]["y"] == 0
+    assert {positions[i]["y"] for i in "abc"} == {LAYOUT_LEVEL_HEIGHT}
+    assert positions["boss"]["x"] == positions["b"]["x"]
+    assert positions["a"]["x"] == 0
+    assert positions["b"]["x"] - positions["a"]["x"] == LAYOUT_NODE_WIDTH + LAYOUT_SIBLING_GAP
+
+
+def test_forest_cycles_and_loose_images():
+    chart = _random_chart(40, 7)
+    chart["nodes"] += [{"id": f"c{i}", "position": {"x": 0, "y": 0}} for i in range(3)]
+    chart["edges"] += [{"source": "c0", "target": "c1"}, {"source": "c1", "target": "c2"}, {"source": "c2", "target": "c0"}]
+    chart["nodes"] += [{"id": "photo", "type": "image", "position": {"x": 0, "y": 0}},
+                       {"id": "logo", "type": "image", "position": {"x": 0, "y": 0}}]
+    chart["edges"].append({"source": "3", "target": "photo"})
+    positions = compute_layout(chart)
+    assert len(positions) == len(chart["nodes"])
+    assert positions["logo"] == {"x": 0, "y": -LAYOUT_LEVEL_HEIGHT}
+    del positions["logo"]
+    _assert_no_overlaps(chart, positions)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_numpy_and_pure_python_agree(seed, monkeypatch):
+    pytest.importorskip("numpy")
+    chart = _random_chart(500, seed)
+    with_numpy = compute_layout(chart)
+    monkeypatch.setattr(layout, "np", None)
+    without = compute_layout(chart)
+    assert with_numpy.keys() == without.keys()
+    for node_id, position in without.items():
+        assert with_numpy[node_id]["x"] == pytest.approx(position["x"])
+        assert with_numpy[node_id]["y"] == pytest.approx(position["y"])
@@ -0,0 +1,86 @@
+import asyncio
+
+from legalcrawler import BatchScrapePoller, deslopify_markdown
+
+NAV = "[Home](/) | [About](/about) | [Attorneys](/attorneys) | [Contact](/contact)"
+FOOTER = "Copyright 2024 Smith and Partners LLP. All rights reserved. Attorney advertising."
+
+
+def _page(n, body):
+    return {"title": f"Page {n}", "url": f"https://firm.example/{n}", "markdown": f"{NAV}\n\n{body}\n\n{FOOTER}"}
+
+
+def _clean(pages, **kwargs):
+    stats = {}
+    return [page["markdown"] for page in deslopify_markdown(pages, stats=stats, **kwargs)], stats
+
+
+def test_blocks_on_most_pages_are_removed():
+    pages = [_page(n, f"Unique text about practice area number {n}.") for n in range(4)]
+    cleaned, stats = _clean(pages)
+    assert cleaned == [f"Unique text about practice area number {n}." for n in range(4)]
+    assert stats["pages"] == 4
+    assert stats["boilerplate_blocks"] == 2
+    assert stats["bytes_saved"] == stats["bytes_in"] - stats["bytes_out"] > 0
+
+
+def test_min_share_threshold():
+    # The footer is on 2 of 4 pages: boilerplate at 0.5, kept at 0.75
+    pages = [_page(n, f"Body {n}") for n in range(2)]
+    pages += [{"title": "", "url": "", "markdown": f"Body {n}"} for n in range(2, 4)]
+    assert _clean(pages, min_share=0.5)[0] == ["Body 0", "Body 1", "Body 2", "Body 3"]
+    kept = _clean(pages, min_share=0.75)[0]
+    assert FOOTER in kept[0] and "Home | About" in kept[0]
+
+
+def test_repeated_long_line_inside_a_block_is_removed():
+    banner = "We use cookies to improve your experience on our website, see our policy."
+    pages = [{"markdown": f"Heading {n}\n{banner}\nDetails for page {n}"} for n in range(3)]
+    assert _clean(pages)[0] == [f"Heading {n}\nDetails for page {n}" for n in range(3)]
+
+
+def test_single_page_keeps_everything_but_images_and_links():
+    page = {"url": "https://firm.example/", "markdown": "![logo](https://x/logo.png)\n# Welcome\n\nSee [our team](/team) at <https://firm.example/team>."}
+    assert _clean([page])[0] == ["# Welcome\n\nSee our team at https://firm.example/team."]
+
+
+def test_short_lines_are_never_boilerplate():
+    pages = [{"markdown": f"## Contact\n| a | b |\n|---|---|\n| {n} | x |"} for n in range(3)]
+    assert _clean(pages)[0] == [page["markdown"] for page in pages]
+
+
+class _Status:
+    def __init__(self, status):
+        self.status = status
+
+
+class _App:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def check_batch_scrape_status(self, batch_id):
+        return _Status(self.statuses.pop(0))
+
+
+def test_poller_loop_exits_once_the_last_batch_finishes():
+    poller = BatchScrapePoller(initial_interval=0.01, max_interval=0.01)
+
+    async def run():
+        result = await poller.wait(_App(["scraping", "completed"]), "key", "batch", max_wait_time=5)
+        await asyncio.wait_for(poller._task, 1)
+        return result.status
+
+    assert asyncio.run(run()) == "completed"
+    assert poller.checks == 2
+    assert poller.stats()["outstanding_batches"] == 0
+
+
+def test_poller_loop_exits_after_a_timeout():
+    poller = BatchScrapePoller(initial_interval=0.01, max_interval=0.01)
+
+    async def run():
+        result = await poller.wait(_App(["scraping"] * 100), "key", "batch", max_wait_time=0.05)
+        await asyncio.wait_for(poller._task, 1)
+        return result
+
+    assert asyncio.run(run()) is None
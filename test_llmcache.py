@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+import llmcache
+from llmcache import ResponseCache, SingleFlight
+
+
+class _Clock:
+    now = 1000.0
+
+    @classmethod
+    def time(cls):
+        return cls.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(llmcache, "time", _Clock)
+    _Clock.now = 1000.0
+    return _Clock
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, ttl=60, db_path="")
+
+    async def run():
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        assert await cache.get("a") == "1"
+        await cache.set("c", "3")
+        return [await cache.get(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(run()) == ["1", None, "3"]
+    assert cache.stats()["entries"] == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(max_entries=10, ttl=60, db_path="")
+    asyncio.run(cache.set("a", "1"))
+    clock.now += 59
+    assert asyncio.run(cache.get("a")) == "1"
+    clock.now += 2
+    assert asyncio.run(cache.get("a")) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_empty_values_are_not_cached():
+    cache = ResponseCache(db_path="")
+    asyncio.run(cache.set("a", ""))
+    assert asyncio.run(cache.get("a")) is None
+
+
+def test_sqlite_tier_survives_a_restart(tmp_path, clock):
+    db = str(tmp_path / "cache.sqlite3")
+    asyncio.run(ResponseCache(ttl=60, db_path=db).set("a", "1"))
+
+    cache = ResponseCache(ttl=60, db_path=db)
+    assert cache.stats()["disk"]
+    assert asyncio.run(cache.get("a")) == "1"
+    assert cache.disk_hits == 1
+    # Promoted to memory: the next hit doesn't touch the disk
+    assert asyncio.run(cache.get("a")) == "1"
+    assert cache.disk_hits == 1
+
+    clock.now += 61
+    restarted = ResponseCache(ttl=60, db_path=db)
+    assert asyncio.run(restarted.get("a")) is None
+    assert restarted._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 0
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    db = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(db_path=db)
+    asyncio.run(cache.set("a", "1"))
+    cache.clear()
+    assert asyncio.run(ResponseCache(db_path=db).get("a")) is None
+    assert asyncio.run(cache.get("a")) is None
+
+
+def test_unusable_database_falls_back_to_memory(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "missing" / "cache.sqlite3"))
+    assert not cache.stats()["disk"]
+    asyncio.run(cache.set("a", "1"))
+    assert asyncio.run(cache.get("a")) == "1"
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def run():
+        shared = await asyncio.gather(*(flight.do("k", lambda: work(1)) for _ in range(5)))
+        other = await flight.do("other", lambda: work(2))
+        again = await flight.do("k", lambda: work(3))
+        return shared, other, again
+
+    assert asyncio.run(run()) == ([1] * 5, 2, 3)
+    assert calls == [1, 2, 3]
+    assert flight.stats() == {"in_flight": 0, "leaders": 3, "joined": 4}
+
+
+def test_single_flight_propagates_exceptions_to_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert [str(e) for e in errors] == ["upstream down"] * 3
+    assert errors[0] is errors[1] is errors[2]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_caller_cancel_does_not_cancel_the_call():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(run()) == ("done", True)
@@ -0,0 +1,36 @@
+import pytest
+from pydantic import ValidationError
+
+from models import ChartData, NODE_LIST, parse_chart
+
+DRAFT = {
+    "nodes": [
+        {"id": "1", "name": "Ana", "position": {"x": 0, "y": 0}},
+        # An image node the user has placed but not uploaded a picture for yet
+        {"id": "logo", "type": "image", "position": {"x": 0, "y": -150}}
+    ],
+    "edges": [{"source": "1", "target": "logo"}]
+}
+
+
+def test_request_bodies_accept_image_node_without_src():
+    chart = ChartData.model_validate(DRAFT)
+    assert chart.nodes[1].src is None
+
+
+def test_loaded_chart_rejects_image_node_without_src():
+    with pytest.raises(ValidationError):
+        parse_chart(DRAFT)
+    with pytest.raises(ValidationError):
+        parse_chart(ChartData.model_validate(DRAFT).model_dump_json())
+
+
+def test_ai_nodes_reject_image_node_without_src():
+    with pytest.raises(ValidationError):
+        NODE_LIST.validate_python(DRAFT["nodes"])
+
+
+def test_loaded_chart_accepts_complete_image_node():
+    chart = parse_chart({**DRAFT, "nodes": [DRAFT["nodes"][0], {**DRAFT["nodes"][1], "src": "/uploads/logo.png"}]})
+    assert chart.nodes[1].src == "/uploads/logo.png"
+    assert isinstance(chart, ChartData)
@@ -0,0 +1,116 @@
+import asyncio
+import io
+import os
+import stat
+
+import pytest
+from starlette.datastructures import UploadFile
+
+import uploads
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _store(data, ext):
+    return asyncio.run(uploads.store_upload(UploadFile(io.BytesIO(data), filename=f"logo{ext}"), ext))
+
+
+def test_store_upload_is_content_addressed(upload_dir):
+    first = _store(b"<svg/>", ".svg")
+    second = _store(b"<svg/>", ".svg")
+    assert first["filename"] == second["filename"] == f"{first['id']}.svg"
+    assert not first["deduplicated"] and second["deduplicated"]
+    assert (upload_dir / first["filename"]).read_bytes() == b"<svg/>"
+    assert [name for name in os.listdir(upload_dir) if name.endswith(".part")] == []
+
+
+def test_published_files_are_world_readable(upload_dir):
+    stored = _store(b"<svg/>" * 10, ".svg")
+    uploads.generate_derivatives(stored["filename"])
+    for name in os.listdir(upload_dir):
+        assert stat.S_IMODE(os.stat(upload_dir / name).st_mode) == 0o644, name
+
+
+def test_store_upload_rejects_oversized_body(upload_dir):
+    with pytest.raises(uploads.UploadTooLarge):
+        asyncio.run(uploads.store_upload(UploadFile(io.BytesIO(b"x" * 100), filename="a.png"), ".png", max_size=10))
+    assert os.listdir(upload_dir) == []
+
+
+@pytest.fixture
+def client(upload_dir):
+    from starlette.applications import Starlette
+    from starlette.testclient import TestClient
+    app = Starlette()
+    app.mount("/uploads", uploads.UploadStaticFiles(directory=str(upload_dir)))
+    return TestClient(app)
+
+
+SVG = b"<svg xmlns='http://www.w3.org/2000/svg'>" + b"<rect/>" * 500 + b"</svg>"
+
+
+def _svg():
+    stored = _store(SVG, ".svg")
+    uploads.generate_derivatives(stored["filename"])
+    return f"/uploads/{stored['filename']}"
+
+
+def test_content_addressed_files_are_immutable(client, upload_dir):
+    url = _svg()
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.content == SVG
+    assert response.headers["cache-control"] == uploads.IMMUTABLE_CACHE_CONTROL
+    (upload_dir / "logo.svg").write_bytes(SVG)
+    assert client.get("/uploads/logo.svg").headers["cache-control"] == uploads.MUTABLE_CACHE_CONTROL
+
+
+@pytest.mark.skipif(uploads.brotli is None, reason="brotli not installed")
+def test_brotli_variant(client):
+    url = _svg()
+    response = client.get(url, headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["accept-ranges"] == "none"
+    assert response.content == SVG
+
+
+def test_gzip_variant(client):
+    response = client.get(_svg(), headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == SVG
+
+
+def test_variants_are_not_served_directly(client):
+    url = _svg()
+    assert client.get(url + ".gz").status_code == 404
+    assert client.get(url + ".br").status_code == 404
+
+
+def test_byte_ranges(client):
+    url = _svg()
+    headers = {"Accept-Encoding": "identity"}
+    response = client.get(url, headers={**headers, "Range": "bytes=0-99"})
+    assert response.status_code == 206
+    assert response.content == SVG[:100]
+    assert response.headers["content-range"] == f"bytes 0-99/{len(SVG)}"
+    response = client.get(url, headers={**headers, "Range": "bytes=-10"})
+    assert response.status_code == 206 and response.content == SVG[-10:]
+    response = client.get(url, headers={**headers, "Range": f"bytes={len(SVG)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(SVG)}"
+    # Stale If-Range: the whole file instead
+    response = client.get(url, headers={**headers, "Range": "bytes=0-9", "If-Range": '"other"'})
+    assert response.status_code == 200 and response.content == SVG
+
+
+def test_not_modified(client):
+    url = _svg()
+    etag = client.get(url, headers={"Accept-Encoding": "identity"}).headers["etag"]
+    assert client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": '"x"'}).status_code == 200
@@ -0,0 +1,69 @@
+import pytest
+
+from urlfilter import (
+    HARD_MAX_URLS, TIER_CORE, TIER_HOMEPAGE, TIER_NEWS_LEGAL, TIER_OTHER, classify_url, prefilter_lawfirm_urls, url_category
+)
+
+SITE = "https://firm.example"
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/", ("keep", TIER_HOMEPAGE)),
+    ("/attorneys/jane-doe", ("keep", TIER_CORE)),
+    ("/practice-areas/litigation", ("keep", TIER_CORE)),
+    ("/files/brochure.pdf", ("keep", TIER_CORE)),
+    ("/blog/court-wins-2024", ("keep", TIER_NEWS_LEGAL)),
+    ("/blog/office-party", ("keep", TIER_OTHER)),
+    ("/press/podcast-launch", ("keep", TIER_OTHER)),
+    ("/category/family-law", ("keep", TIER_NEWS_LEGAL)),
+    ("/tag/holidays", ("drop", None)),
+    ("/privacy-policy", ("drop", None)),
+    ("/wp-content/theme.css", ("drop", None)),
+    # Inclusion wins over exclusion
+    ("/careers/search", ("keep", TIER_CORE)),
+    ("/some-page", ("ambiguous", None)),
+])
+def test_classify_url(path, expected):
+    assert classify_url(SITE + path) == expected
+
+
+def test_social_profiles_kept_and_queries_not_homepage():
+    assert classify_url("https://www.linkedin.com/company/firm") == ("keep", TIER_OTHER)
+    assert classify_url(SITE + "/?s=divorce") == ("ambiguous", None)
+
+
+def test_url_category():
+    assert url_category(SITE + "/news/verdict") == "news"
+    assert url_category(SITE + "/team") == "core"
+    assert url_category(SITE + "/some-page") == "other"
+
+
+def test_prefilter_orders_by_tier_and_dedupes():
+    urls = [SITE + "/blog/court-ruling", SITE + "/about", SITE + "/", SITE + "/login",
+            SITE + "/some-page", SITE + "/about", None]
+    result = prefilter_lawfirm_urls(urls)
+    assert result == {
+        "results": [SITE + "/", SITE + "/about", SITE + "/blog/court-ruling"],
+        "ambiguous": [SITE + "/some-page"],
+        "dropped": 1
+    }
+
+
+def test_prefilter_adds_missing_homepage():
+    result = prefilter_lawfirm_urls([SITE + "/team/ana", SITE + "/contact"])
+    assert result["results"] == [SITE + "/", SITE + "/team/ana", SITE + "/contact"]
+
+
+def test_prefilter_cap_keeps_homepage_then_core_then_news():
+    news = [SITE + f"/news/legal-update-{i}" for i in range(20)]
+    core = [SITE + f"/attorneys/{i}" for i in range(20)]
+    result = prefilter_lawfirm_urls(news + core + [SITE + "/"], max_urls=25)
+    assert len(result["results"]) == 25
+    assert result["results"][0] == SITE + "/"
+    assert result["results"][1:21] == core
+    assert result["results"][21:] == news[:4]
+
+
+def test_prefilter_hard_cap():
+    urls = [SITE + "/"] + [SITE + f"/team/{i}" for i in range(100)]
+    assert len(prefilter_lawfirm_urls(urls, max_urls=500)["results"]) == HARD_MAX_URLS
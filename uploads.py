@@ -0,0 +1,338 @@
+import os
+import re
+import gzip
+import asyncio
+import hashlib
+import tempfile
+import mimetypes
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from middleware import choose_encoding
+
+# Optional: raster thumbnails need Pillow, .br variants need brotli
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+UPLOAD_DIR = os.path.join(os.path.dirname(__file__), 'uploads')
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+ALLOWED_IMAGE_TYPES = {"image/png", "image/jpeg", "image/jpg", "image/svg+xml"}
+MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
+# Limit for photos sent straight to org chart generation (not kept on disk)
+MAX_SOURCE_IMAGE_SIZE = int(os.getenv("MAX_SOURCE_IMAGE_SIZE", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 256 * 1024
+# Length of the content-hash prefix used as the upload id and file name
+UPLOAD_ID_LENGTH = 32
+# Thumbnail widths for org chart nodes (1x and 2x displays)
+THUMBNAIL_SIZES = (96, 192)
+# Content-addressed files never change, so clients may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=3600"
+# Precompressed variants served in place of the original, by suffix
+PRECOMPRESSED_TYPES = (".svg",)
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{%d}$" % UPLOAD_ID_LENGTH)
+_CONTENT_ADDRESSED_RE = re.compile(r"^[0-9a-f]{%d}(?:_w\d+)?\.[a-z]+$" % UPLOAD_ID_LENGTH)
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def _open_temp(directory=None):
+    # Temp file in the upload dir itself so the final rename is atomic
+    return tempfile.NamedTemporaryFile(dir=directory or UPLOAD_DIR, prefix=".upload-", suffix=".part", delete=False)
+
+
+def _discard(temp):
+    temp.close()
+    try:
+        os.unlink(temp.name)
+    except FileNotFoundError:
+        pass
+
+
+def _commit(temp, path):
+    """Move the finished temp file into place unless identical content already exists"""
+    temp.flush()
+    os.fsync(temp.fileno())
+    temp.close()
+    if os.path.exists(path):
+        os.unlink(temp.name)
+        return True
+    # NamedTemporaryFile is 0600; published files must be readable by a proxy/CDN user
+    os.chmod(temp.name, 0o644)
+    os.replace(temp.name, path)
+    return False
+
+
+async def _spool(file, max_size, directory=None):
+    """Copy an UploadFile into a temp file chunk by chunk, hashing as it goes"""
+    digest = hashlib.sha256()
+    size = 0
+    temp = await asyncio.to_thread(_open_temp, directory)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLarge(f"File larger than {max_size} bytes")
+            digest.update(chunk)
+            await asyncio.to_thread(temp.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(_discard, temp)
+        raise
+    return temp, digest, size
+
+
+async def store_upload(file, ext, max_size=MAX_IMAGE_SIZE):
+    """
+    Stream an UploadFile to disk under its content hash
+
+    The body is read in chunks and rejected as soon as it passes max_size.
+    Chunks go to a temp file off the event loop, which is atomically renamed
+    to <sha256 prefix><ext>; re-uploading the same bytes reuses that file.
+
+    Args:
+        file: Starlette UploadFile
+        ext (str): File extension including the dot
+        max_size (int): Byte limit
+    Returns:
+        dict: 'id', 'filename', 'size' and 'deduplicated'
+    Raises:
+        UploadTooLarge: If the body exceeds max_size
+    """
+    temp, digest, size = await _spool(file, max_size)
+    upload_id = digest.hexdigest()[:UPLOAD_ID_LENGTH]
+    filename = f"{upload_id}{ext}"
+    deduplicated = await asyncio.to_thread(_commit, temp, os.path.join(UPLOAD_DIR, filename))
+    return {"id": upload_id, "filename": filename, "size": size, "deduplicated": deduplicated}
+
+
+async def spool_upload(file, max_size=MAX_SOURCE_IMAGE_SIZE):
+    """
+    Stream an UploadFile to a private temp file, for one-off inputs that
+    should not be published under /uploads. The caller deletes the file.
+
+    Returns:
+        tuple: (path, sha256 hex digest, size)
+    Raises:
+        UploadTooLarge: If the body exceeds max_size
+    """
+    temp, digest, size = await _spool(file, max_size, tempfile.gettempdir())
+    await asyncio.to_thread(temp.close)
+    return temp.name, digest.hexdigest(), size
+
+
+def find_upload(upload_id, extensions=(".png", ".jpg", ".jpeg", ".svg")):
+    """Path of a stored upload by id, or None"""
+    if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+        return None
+    for ext in extensions:
+        path = os.path.join(UPLOAD_DIR, f"{upload_id}{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def thumbnail_name(upload_id, size, ext):
+    return f"{upload_id}_w{size}{ext}"
+
+
+def generate_derivatives(filename):
+    """
+    Precompute the variants served for an upload: gzip/brotli copies of SVGs
+    and node-sized thumbnails of PNG/JPEG logos. Existing files are kept.
+
+    Returns:
+        dict: Thumbnail width -> file name (the original when it is already small)
+    """
+    path = os.path.join(UPLOAD_DIR, filename)
+    upload_id, ext = os.path.splitext(filename)
+    thumbnails = {}
+    try:
+        if ext in PRECOMPRESSED_TYPES:
+            with open(path, "rb") as f:
+                data = f.read()
+            variants = {".gz": lambda d: gzip.compress(d, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = lambda d: brotli.compress(d, quality=11)
+            for suffix, compress in variants.items():
+                if not os.path.exists(path + suffix):
+                    _write_atomic(path + suffix, compress(data))
+        elif Image is not None and ext in (".png", ".jpg", ".jpeg"):
+            with Image.open(path) as img:
+                for size in THUMBNAIL_SIZES:
+                    if img.width <= size:
+                        thumbnails[size] = filename
+                        continue
+                    name = thumbnail_name(upload_id, size, ext)
+                    thumbnails[size] = name
+                    if os.path.exists(os.path.join(UPLOAD_DIR, name)):
+                        continue
+                    thumb = img.copy()
+                    thumb.thumbnail((size, size * 4), Image.LANCZOS)
+                    temp = _open_temp()
+                    try:
+                        if ext == ".png":
+                            thumb.save(temp, format="PNG", optimize=True)
+                        else:
+                            thumb.convert("RGB").save(temp, format="JPEG", quality=85, optimize=True, progressive=True)
+                    except BaseException:
+                        _discard(temp)
+                        raise
+                    _commit(temp, os.path.join(UPLOAD_DIR, name))
+    except Exception as e:
+        print(f"Error generating derivatives for {filename}: {e}")
+    return thumbnails
+
+
+def _write_atomic(path, data):
+    temp = _open_temp()
+    try:
+        temp.write(data)
+    except BaseException:
+        _discard(temp)
+        raise
+    _commit(temp, path)
+
+
+def _parse_range(header, size):
+    """
+    Parse a single 'bytes=start-end' range
+
+    Returns:
+        tuple (start, end) inclusive, None to ignore the header (serve the
+        whole file), or False if the range can't be satisfied
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges: a full response is always allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+async def _iter_file_range(path, start, end, chunk_size=UPLOAD_CHUNK_SIZE):
+    with open(path, "rb") as f:
+        await anyio.to_thread.run_sync(f.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(f.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class UploadStaticFiles(StaticFiles):
+    """
+    StaticFiles for /uploads with long-lived caching for content-addressed
+    files, precompressed SVG variants and single byte-range requests
+    """
+
+    def is_not_modified(self, response_headers, request_headers):
+        # Weak comparison: CompressionMiddleware hands out W/ tags for the bodies it compresses
+        if_none_match = request_headers.get("if-none-match")
+        etag = response_headers.get("etag")
+        if if_none_match and etag:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            if "*" in tags or etag.removeprefix("W/") in tags:
+                return True
+        return super().is_not_modified(response_headers, request_headers)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        name = os.path.basename(full_path)
+        base, suffix = os.path.splitext(name)
+        if suffix in PRECOMPRESSED_SUFFIXES.values() and base.endswith(PRECOMPRESSED_TYPES):
+            # Precompressed variants are only served as an encoding of their original
+            raise HTTPException(status_code=404)
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if _CONTENT_ADDRESSED_RE.match(name) else MUTABLE_CACHE_CONTROL,
+            "Accept-Ranges": "bytes"
+        }
+
+        encoding = None
+        if name.endswith(PRECOMPRESSED_TYPES):
+            headers["Vary"] = "Accept-Encoding"
+            available = [e for e, suffix in PRECOMPRESSED_SUFFIXES.items() if os.path.exists(str(full_path) + suffix)]
+            encoding = choose_encoding(request_headers.get("accept-encoding"), supported=available)
+            if encoding:
+                full_path = str(full_path) + PRECOMPRESSED_SUFFIXES[encoding]
+                stat_result = os.stat(full_path)
+                headers["Content-Encoding"] = encoding
+                # Ranges would address the compressed bytes; keep it simple
+                headers["Accept-Ranges"] = "none"
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+            method=scope["method"]
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if not range_header or encoding or scope["method"] != "GET" or status_code != 200:
+            return response
+        if_range = request_headers.get("if-range")
+        if if_range and if_range != response.headers.get("etag"):
+            return response
+
+        size = stat_result.st_size
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return response
+        if byte_range is False:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        range_headers = {
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(end - start + 1),
+            "ETag": response.headers["etag"],
+            "Last-Modified": response.headers["last-modified"]
+        }
+        return StreamingResponse(
+            _iter_file_range(full_path, start, end),
+            status_code=206,
+            headers=range_headers,
+            media_type=media_type
+        )
@@ -0,0 +1,197 @@
+import re
+import sys
+import json
+import time
+from urllib.parse import urlsplit
+
+# Rules from the firecrawl_filter prompt in legalcrawler.py, compiled once.
+# A URL "includes a segment" when its lowercase path contains "/<segment>".
+CORE_SEGMENTS = (
+    "about", "team", "leadership", "people", "attorney", "partner", "bio",
+    "careers", "jobs", "open-positions", "were-hiring",
+    "contact", "locations",
+    "services", "practice-areas", "solutions", "technology", "tech-stack",
+    "testimonials", "reviews", "case-studies", "success-stories",
+    "resources", "brochures", "white-papers"
+)
+NEWS_SEGMENTS = ("blog", "news", "updates", "insights", "publications", "news-resources", "victories")
+EXCLUDED_SEGMENTS = ("login", "signup", "search", "events", "calendar", "privacy", "terms", "sitemap", "archive")
+EXCLUDED_EXTENSIONS = (".js", ".css", ".jpg", ".png", ".svg", ".ico", ".woff", ".map")
+LEGAL_TERMS = ("law", "legal", "firm", "client", "case", "practice", "attorney", "lawyer", "court", "verdict")
+# Marketing and social pages are kept under the prompt's "Exceptions" clause
+MARKETING_SEGMENTS = ("marketing", "media", "press", "social", "podcast", "video", "community")
+SOCIAL_DOMAINS = (
+    "linkedin.com", "facebook.com", "twitter.com", "x.com", "instagram.com",
+    "youtube.com", "tiktok.com", "threads.net"
+)
+
+# Output caps from the prompt: soft cap with priority ordering, hard cap overall
+MAX_FILTERED_URLS = 30
+HARD_MAX_URLS = 80
+
+TIER_HOMEPAGE = 0
+TIER_CORE = 1
+TIER_NEWS_LEGAL = 2
+TIER_OTHER = 3
+
+
+def _segments_re(segments):
+    return re.compile("/(?:" + "|".join(re.escape(s) for s in segments) + ")")
+
+
+_CORE_RE = _segments_re(CORE_SEGMENTS)
+_NEWS_RE = _segments_re(NEWS_SEGMENTS)
+_EXCLUDED_RE = _segments_re(EXCLUDED_SEGMENTS)
+_MARKETING_RE = _segments_re(MARKETING_SEGMENTS)
+_LEGAL_RE = re.compile("|".join(re.escape(t) for t in LEGAL_TERMS))
+_TAXONOMY_RE = re.compile(r"/(?:category|tag|tags|categories)/([^/]+)")
+_SOCIAL_RE = re.compile(r"(?:^|\.)(?:" + "|".join(re.escape(d) for d in SOCIAL_DOMAINS) + r")$")
+
+
+def classify_url(url):
+    """
+    Classify one URL against the filter rules
+
+    Args:
+        url (str): Absolute URL
+    Returns:
+        tuple: (decision, tier) where decision is "keep", "drop" or "ambiguous"
+    """
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    path = parts.path.lower() or "/"
+
+    if _SOCIAL_RE.search(host):
+        return "keep", TIER_OTHER
+    if path == "/" and not parts.query:
+        return "keep", TIER_HOMEPAGE
+    if path.endswith(EXCLUDED_EXTENSIONS):
+        return "drop", None
+
+    taxonomy = _TAXONOMY_RE.search(path)
+    if taxonomy:
+        # Category/tag pages only survive when the term itself is legal
+        if _LEGAL_RE.search(taxonomy.group(1)):
+            return "keep", TIER_NEWS_LEGAL
+        return "drop", None
+
+    # Inclusion wins over exclusion, so check it first
+    if _CORE_RE.search(path) or path.endswith(".pdf"):
+        return "keep", TIER_CORE
+    if _NEWS_RE.search(path):
+        return "keep", TIER_NEWS_LEGAL if _LEGAL_RE.search(path) else TIER_OTHER
+    if _MARKETING_RE.search(path):
+        return "keep", TIER_OTHER
+    if _EXCLUDED_RE.search(path):
+        return "drop", None
+    return "ambiguous", None
+
+
+def url_category(url):
+    """
+    Coarse content category of a URL: "news" for blog/news style pages,
+    "core" for about/team/services style pages, otherwise "other"
+    """
+    path = urlsplit(url).path.lower() or "/"
+    if _NEWS_RE.search(path) or _TAXONOMY_RE.search(path):
+        return "news"
+    if path == "/" or _CORE_RE.search(path) or path.endswith(".pdf"):
+        return "core"
+    return "other"
+
+
+def prefilter_lawfirm_urls(urls, max_urls=MAX_FILTERED_URLS):
+    """
+    Deterministic version of the firecrawl_filter prompt
+
+    Args:
+        urls (list): Raw URLs from map_url, all from the same domain
+        max_urls (int): Soft cap; when exceeded, keep homepage, core pages,
+            then news, in that order
+    Returns:
+        dict: 'results' (kept URLs, homepage first), 'ambiguous' (URLs no
+            rule decided on, in original order) and 'dropped' (count)
+    """
+    seen = set()
+    kept = []
+    ambiguous = []
+    dropped = 0
+    has_homepage = False
+
+    for index, url in enumerate(urls):
+        if not isinstance(url, str) or url in seen:
+            continue
+        seen.add(url)
+        decision, tier = classify_url(url)
+        if decision == "keep":
+            kept.append((tier, index, url))
+            has_homepage = has_homepage or tier == TIER_HOMEPAGE
+        elif decision == "ambiguous":
+            ambiguous.append(url)
+        else:
+            dropped += 1
+
+    if not has_homepage and urls:
+        # The homepage is always included, even if map_url didn't return it
+        first = urlsplit(next((u for u in urls if isinstance(u, str)), ""))
+        if first.scheme and first.netloc:
+            kept.append((TIER_HOMEPAGE, -1, f"{first.scheme}://{first.netloc}/"))
+
+    kept.sort()
+    if len(kept) > max_urls:
+        kept = kept[:max_urls]
+    return {
+        "results": [url for _, _, url in kept[:HARD_MAX_URLS]],
+        "ambiguous": ambiguous,
+        "dropped": dropped
+    }
+
+
+def compare_filters(urls, openai_client, runs=1000):
+    """
+    Benchmark the rule-based prefilter against the full LLM filter
+
+    Args:
+        urls (list): Mapped URLs of one site
+        openai_client: OpenAI client for the LLM filter
+        runs (int): Prefilter iterations to average over
+    Returns:
+        dict: Latency of both filters and overlap of their outputs
+    """
+    import legalcrawler
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        rules = prefilter_lawfirm_urls(urls)
+    rules_ms = (time.perf_counter() - start) * 1000 / runs
+
+    start = time.perf_counter()
+    llm = legalcrawler.llm_filter_lawfirm_urls(urls, openai_client) or []
+    llm_ms = (time.perf_counter() - start) * 1000
+
+    rule_set, llm_set = set(rules["results"]), set(llm)
+    union = rule_set | llm_set
+    return {
+        "input_urls": len(urls),
+        "rules_ms": round(rules_ms, 4),
+        "llm_ms": round(llm_ms, 1),
+        "rules_count": len(rule_set),
+        "ambiguous_count": len(rules["ambiguous"]),
+        "llm_count": len(llm_set),
+        "jaccard": round(len(rule_set & llm_set) / len(union), 3) if union else 1.0,
+        "only_rules": sorted(rule_set - llm_set),
+        "only_llm": sorted(llm_set - rule_set)
+    }
+
+
+# Example usage: python urlfilter.py links.json  (a JSON array of mapped URLs)
+if __name__ == "__main__":
+    import os
+    from openai import OpenAI
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    with open(sys.argv[1]) as f:
+        links = json.load(f)
+    report = compare_filters(links, OpenAI(api_key=os.getenv("OPENAI_API_KEY")))
+    print(json.dumps(report, indent=2))